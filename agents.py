@@ -1,22 +1,25 @@
 import json
 import logging
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import google.generativeai as genai
 from dotenv import load_dotenv
 import re
 import uuid
 import os
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from tracing import span, traced
+from log_config import setup_logging, SampledWarnings
+from pattern_stats import DecayingSpaceSaving
+import dates
+from work_calendar import WorkCalendar
+from task_extractor import RuleBasedExtractor
+from name_index import TrigramIndex, normalize
+from llm_meter import meter
 
 # ロギング設定
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('gantt_app.log', encoding='utf-8')
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # 環境変数の読み込み
@@ -27,8 +30,35 @@ api_key = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=api_key)
 model = genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
 
+def freeze_settings(settings):
+    """設定の辞書を読み取り専用の複製にする（入れ子の辞書も複製する）"""
+    return MappingProxyType({key: freeze_settings(value) if isinstance(value, dict) else value
+                             for key, value in settings.items()})
+
+@contextmanager
+def borrow_index(index, lock, tasks):
+    """共有のインデックスを tasks に同期して使う（他のスレッドが使用中なら一時的なインデックスを作る）
+
+    同期はタスク数に比例するので、タスクを保持している側（GanttChart・ProjectStore）は自分の
+    インデックスを変更のあったタスクだけ更新して明示的に渡すこと。
+    """
+    if not lock.acquire(blocking=False):
+        local = TrigramIndex()
+        local.sync(tasks)
+        yield local
+        return
+    try:
+        index.sync(tasks)
+        yield index
+    finally:
+        lock.release()
+
 class BaseAgent:
-    """すべてのエージェントの基底クラス"""
+    """すべてのエージェントの基底クラス
+
+    複数のスレッドから同時に使える。カウンタとリクエスト履歴の更新は _lock の中で行い、
+    モデルの呼び出しの間はロックを持たない（リモート呼び出しの待ち時間はスレッド間で重なる）。
+    """
     def __init__(self, name):
         self.name = name
         self.logger = logging.getLogger(name)
@@ -36,30 +66,78 @@ class BaseAgent:
         self.created_at = datetime.now()
         self.request_count = 0
         self.success_count = 0
-        self.request_history = {}  # 環境適応のためのリクエスト履歴
+        # 環境適応のためのリクエスト履歴（固定サイズ・時間減衰付き）
+        self.request_history = DecayingSpaceSaving()
+        self._lock = threading.Lock()
 
     def log_request(self, request):
         """リクエストを記録し、パターンを学習"""
-        self.request_count += 1
         # リクエストパターンを抽出（単純な例として最初の2単語を使用）
         pattern = ' '.join(request.lower().split()[:2])
-        self.request_history[pattern] = self.request_history.get(pattern, 0) + 1
+        with self._lock:
+            self.request_count += 1
+            self.request_history.add(pattern)
+
+    def record_success(self):
+        """リクエストの成功を記録"""
+        with self._lock:
+            self.success_count += 1
+
+    def generate(self, prompt, operation):
+        """モデルの呼び出し（計量・予算の管理・一時的な失敗の再試行は llm_meter で行う）"""
+        return meter.generate(self.model, prompt, f"{self.name}.{operation}")
 
     def get_top_patterns(self, limit=3):
         """最も頻繁に使用されるリクエストパターンを取得"""
-        if not self.request_history:
-            return []
-        sorted_patterns = sorted(self.request_history.items(), key=lambda x: x[1], reverse=True)
-        return sorted_patterns[:limit]
+        with self._lock:
+            if not self.request_history:
+                return []
+            return self.request_history.top(limit)
+
+    def save_request_history(self, path):
+        """リクエスト履歴を保存"""
+        try:
+            with self._lock:
+                data = self.request_history.to_dict()
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            self.logger.error(f"リクエスト履歴の保存に失敗: {str(e)}")
+
+    def load_request_history(self, path):
+        """保存済みのリクエスト履歴を読み込み"""
+        if not os.path.exists(path):
+            return
+        try:
+            history = DecayingSpaceSaving.load(path)
+            with self._lock:
+                self.request_history = history
+        except Exception as e:
+            self.logger.error(f"リクエスト履歴の読み込みに失敗: {str(e)}")
 
     def is_adaptable(self):
         """エージェントが適応可能かどうかを判断（リクエスト数が一定以上）"""
         return self.request_count >= 10
 
+    def stats(self):
+        """リクエスト数と成功数（同じ時点の値）"""
+        with self._lock:
+            return {'requests': self.request_count, 'successes': self.success_count}
+
 class TaskAgent(BaseAgent):
     """タスク管理を担当するエージェント（進化機能を含む）"""
+    # 検証で補う項目（metadata は created_at・updated_at も確認する）
+    REQUIRED_FIELDS = ('id', 'start_date', 'end_date', 'status', 'progress', 'dependencies', 'metadata')
+
     def __init__(self):
         super().__init__("TaskAgent")
+        self.calendar = WorkCalendar.from_env()  # 期間は稼働日で数える
+        # 定型文はローカルで抽出し、確信度が低いときだけモデルを呼ぶ
+        self.extractor = RuleBasedExtractor(hours_per_day=self.calendar.hours_per_day)
+        self.extract_threshold = float(os.getenv('GANTT_EXTRACT_THRESHOLD', 0.8))
+        self.offline = os.getenv('GANTT_OFFLINE') == '1' or not api_key
+        self.name_index = TrigramIndex()  # 依存先のタスク名の解決用
+        self._index_lock = threading.Lock()  # name_index を使っている呼び出しの排他
         self.task_schema = {
             "id": "string(uuid)",
             "name": "string",
@@ -68,6 +146,7 @@ class TaskAgent(BaseAgent):
             "progress": "number(0-100)",
             "status": "string(created|in_progress|completed)",
             "dependencies": "array of task ids",
+            "parent": "string(task id, optional)",
             "metadata": {
                 "created_at": "string(ISO date)",
                 "updated_at": "string(ISO date)",
@@ -76,14 +155,26 @@ class TaskAgent(BaseAgent):
             }
         }
 
+    @traced('agent.validate_tasks')
     def validate_tasks(self, tasks):
-        """タスクのバリデーション"""
+        """タスクのバリデーション
+
+        足りない項目を補うタスクは複製して返し、渡されたタスクの辞書は書き換えない
+        （同じタスクを複数のスレッドや履歴の版が共有していてもよい）。
+        """
         valid_tasks = []
+        unnamed = SampledWarnings(self.logger, "タスク名が設定されていません")
         for task in tasks:
             # 最低限必要な項目の確認
             if 'name' not in task or not task['name']:
-                self.logger.warning(f"タスク名が設定されていません: {task}")
+                unnamed.warn(task)
                 continue
+            metadata = task.get('metadata')
+            if (all(field in task for field in self.REQUIRED_FIELDS) and isinstance(metadata, dict)
+                    and 'created_at' in metadata and 'updated_at' in metadata):
+                valid_tasks.append(task)
+                continue
+            task = dict(task)
                 
             # IDの確認（なければ生成）
             if 'id' not in task:
@@ -91,11 +182,11 @@ class TaskAgent(BaseAgent):
                 
             # 日付の確認
             if 'start_date' not in task:
-                task['start_date'] = datetime.now().isoformat()
+                task['start_date'] = dates.to_iso(dates.today())
             if 'end_date' not in task:
-                # 開始日から1日後をデフォルトに
-                start = datetime.fromisoformat(task['start_date'].split('T')[0])
-                task['end_date'] = (start + timedelta(days=1)).isoformat()
+                # 1稼働日のタスクをデフォルトに（終了日は当日を含む）
+                start = dates.to_ordinal(task['start_date']) or dates.today()
+                task['end_date'] = dates.to_iso(int(self.calendar.add_workdays(start, 0)))
                 
             # ステータスと進捗率の確認
             if 'status' not in task:
@@ -108,34 +199,32 @@ class TaskAgent(BaseAgent):
                 task['dependencies'] = []
                 
             # メタデータの確認
-            if 'metadata' not in task:
-                task['metadata'] = {}
-            if 'created_at' not in task['metadata']:
-                task['metadata']['created_at'] = datetime.now().isoformat()
-            if 'updated_at' not in task['metadata']:
-                task['metadata']['updated_at'] = datetime.now().isoformat()
+            task['metadata'] = metadata = dict(task.get('metadata') or {})
+            if 'created_at' not in metadata:
+                metadata['created_at'] = datetime.now().isoformat()
+            if 'updated_at' not in metadata:
+                metadata['updated_at'] = datetime.now().isoformat()
                 
             valid_tasks.append(task)
             
+        unnamed.flush()
         return valid_tasks
 
     def create_task(self, name, start_date=None, duration=1):
-        """タスクの作成"""
-        if not start_date:
-            start_date = datetime.now()
-        elif isinstance(start_date, str):
-            try:
-                start_date = datetime.fromisoformat(start_date.split('T')[0])
-            except ValueError:
-                start_date = datetime.now()
+        """タスクの作成（durationは稼働日数）"""
+        start = dates.to_ordinal(start_date) if start_date else None
+        if start is None:
+            start = dates.today()
                 
-        end_date = start_date + timedelta(days=duration)
+        # 開始日は稼働日に送り、終了日は最終稼働日（当日を含む、CSVの作業時間からの計算と同じ）
+        start = int(self.calendar.roll_forward(start))
+        end = int(self.calendar.add_workdays(start, max(int(duration), 1) - 1))
         
         task = {
             'id': str(uuid.uuid4()),
             'name': name,
-            'start_date': start_date.isoformat(),
-            'end_date': end_date.isoformat(),
+            'start_date': dates.to_iso(start),
+            'end_date': dates.to_iso(end),
             'progress': 0,
             'status': 'created',
             'dependencies': [],
@@ -167,6 +256,36 @@ class TaskAgent(BaseAgent):
         self.logger.info(f"タスクのステータスを更新しました: {task['name']} ({old_status} -> {new_status})")
         return task
 
+    def reschedule_task(self, task, new_start_date):
+        """開始日を変更し、稼働日数を保ったまま終了日を再計算（開始日は稼働日に送る）"""
+        start, end = dates.task_start(task), dates.task_end(task)
+        new_start = dates.to_ordinal(new_start_date)
+        if new_start is None:
+            self.logger.error(f"無効な開始日: {new_start_date}")
+            return task
+        workdays = int(self.calendar.workdays_in(start, end)) if start is not None and end is not None else 1
+        new_start = int(self.calendar.roll_forward(new_start))
+        task['start_date'] = dates.to_iso(new_start)
+        task['end_date'] = dates.to_iso(int(self.calendar.add_workdays(new_start, max(workdays, 1) - 1)))
+        task['metadata']['updated_at'] = datetime.now().isoformat()
+        self.logger.info(f"タスクの日程を変更しました: {task['name']} ({task['start_date']} - {task['end_date']})")
+        return task
+
+    def reschedule_tasks(self, tasks, shift_days):
+        """複数タスクの日程を稼働日単位でまとめてずらす（列ごとに計算、日付のないタスクはそのまま）"""
+        dated = [(task, dates.task_start(task), dates.task_end(task)) for task in tasks]
+        dated = [(task, start, end) for task, start, end in dated if start is not None and end is not None]
+        if not dated:
+            return tasks
+        new_starts = self.calendar.add_workdays([start for _, start, _ in dated], shift_days)
+        new_ends = self.calendar.add_workdays([end for _, _, end in dated], shift_days)
+        now = datetime.now().isoformat()
+        for (task, _, _), start, end in zip(dated, new_starts, new_ends):
+            task['start_date'] = dates.to_iso(int(start))
+            task['end_date'] = dates.to_iso(int(end))
+            task['metadata']['updated_at'] = now
+        return tasks
+
     def set_dependency(self, task, dependency_task):
         """依存関係の設定（進化機能）"""
         if dependency_task['id'] not in task['dependencies']:
@@ -175,8 +294,51 @@ class TaskAgent(BaseAgent):
             self.logger.info(f"依存関係を設定しました: {task['name']} -> {dependency_task['name']}")
         return task
 
-    def extract_task_info(self, text):
-        """自然言語テキストからタスク情報を抽出"""
+    def set_parent(self, task, parent_task, tasks=()):
+        """親タスクの設定（parent_task が None なら親を外す）
+
+        tasks を渡すと、自分の子孫を親にする循環を防ぐ。
+        """
+        parent_id = parent_task['id'] if parent_task is not None else None
+        if parent_id is not None:
+            parents = {t['id']: t.get('parent') for t in tasks}
+            ancestor = parent_id
+            while ancestor is not None:
+                if ancestor == task['id']:
+                    self.logger.error(f"親子関係が循環します: {task['name']} -> {parent_task['name']}")
+                    return task
+                ancestor = parents.get(ancestor)
+        if task.get('parent') != parent_id:
+            task['parent'] = parent_id
+            task['metadata']['updated_at'] = datetime.now().isoformat()
+            self.logger.info(f"親タスクを設定しました: {task['name']} -> {parent_task['name'] if parent_task else 'なし'}")
+        return task
+
+    def extract_task_info(self, text, offline=None):
+        """自然言語テキストからタスク情報を抽出
+
+        ローカル抽出の確信度が閾値以上ならその結果を使い、そうでなければモデルに問い合わせる。
+        オフライン時（またはモデルの呼び出しに失敗した場合）はローカル抽出の結果を返す。
+        """
+        with span('extract.local'):
+            result = self.extractor.extract(text)
+        hit = bool(result) and result.confidence >= self.extract_threshold
+        self.extractor.record(hit)
+        if hit:
+            return result.info
+        if offline if offline is not None else self.offline:
+            return result.info if result else None
+        info = self._extract_task_info_remote(text)
+        if info is None and result:
+            return result.info
+        return info
+
+    def extraction_stats(self):
+        """ローカル抽出の利用状況（件数と高速経路のヒット率）"""
+        return self.extractor.stats()
+
+    def _extract_task_info_remote(self, text):
+        """モデルでタスク情報を抽出"""
         try:
             prompt = f"""
             以下のテキストからタスク情報を抽出し、JSONとして返してください:
@@ -198,7 +360,8 @@ class TaskAgent(BaseAgent):
             }}
             """
             
-            response = self.model.generate_content(prompt)
+            with span('gemini.extract_task_info'):
+                response = self.generate(prompt, 'extract_task_info')
             json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
             if json_match:
                 info = json.loads(json_match.group())
@@ -212,11 +375,26 @@ class TaskAgent(BaseAgent):
         """タスクリストの処理"""
         return self.validate_tasks(tasks)
 
-    def process_input(self, text, current_tasks=[]):
+    def find_task_by_name(self, name, tasks, index=None):
+        """タスク名からタスクを探す（完全一致がなければ最も近い名前が1つに決まる場合に採用）
+
+        index を省略するとエージェントのインデックスを tasks に同期してから使う。
+        """
+        if index is None:
+            with borrow_index(self.name_index, self._index_lock, tasks) as index:
+                return self.find_task_by_name(name, tasks, index)
+        keys = index.lookup(name)
+        if not keys:
+            candidates = index.search(name, limit=2, min_score=0.5)
+            if candidates and (len(candidates) == 1 or candidates[0][1] > candidates[1][1]):
+                keys = {candidates[0][0]}
+        return next((task for task in tasks if task['id'] in keys), None) if keys else None
+
+    def process_input(self, text, current_tasks=[], offline=None, index=None):
         """自然言語入力からタスク処理"""
         self.log_request(text)  # 環境適応のためのリクエスト記録
         
-        task_info = self.extract_task_info(text)
+        task_info = self.extract_task_info(text, offline)
         if not task_info:
             return {
                 'status': 'error',
@@ -226,16 +404,21 @@ class TaskAgent(BaseAgent):
         # タスク作成
         if 'name' in task_info:
             start_date = task_info.get('start_date', datetime.now().isoformat())
-            duration = int(task_info.get('duration', 1))
+            duration = task_info.get('duration')
+            if duration is None and task_info.get('end_date') and task_info.get('start_date'):
+                # 期間の代わりに終了日が指定された場合は稼働日数に換算
+                duration = max(1, int(self.calendar.workdays_in(
+                    dates.to_ordinal(start_date), dates.to_ordinal(task_info['end_date']))))
+            duration = int(duration or 1)
             new_task = self.create_task(task_info['name'], start_date, duration)
             
             # 依存関係の処理
             if 'depends_on' in task_info and task_info['depends_on']:
-                for task in current_tasks:
-                    if task['name'].lower() == task_info['depends_on'].lower():
-                        new_task = self.set_dependency(new_task, task)
-                        break
+                dependency = self.find_task_by_name(task_info['depends_on'], current_tasks, index)
+                if dependency is not None:
+                    new_task = self.set_dependency(new_task, dependency)
             
+            self.record_success()
             return {
                 'status': 'success',
                 'message': f"タスク「{new_task['name']}」を作成しました",
@@ -247,6 +430,28 @@ class TaskAgent(BaseAgent):
             'message': 'タスク名が指定されていません'
         }
 
+    def create_tasks_from_text(self, lines, current_tasks=(), offline=True):
+        """複数行のテキストからタスクをまとめて作成（既定ではモデルを呼ばない）
+
+        依存先には既存のタスクに加え、同じ入力の前の行で作成したタスクも指定できる。
+        戻り値は (作成したタスクのリスト, 抽出できなかった行のリスト)。
+        """
+        created = []
+        failed = []
+        known = list(current_tasks)
+        with borrow_index(self.name_index, self._index_lock, known) as index:
+            for line in lines:
+                if not line.strip():
+                    continue
+                result = self.process_input(line, known, offline=offline, index=index)
+                if result['status'] == 'success':
+                    created.append(result['task'])
+                    known.append(result['task'])
+                    index.add(result['task']['id'], result['task']['name'])
+                else:
+                    failed.append(line)
+        return created, failed
+
     def suggest_optimizations(self, tasks):
         """タスクの最適化提案（環境適応）"""
         if not self.is_adaptable() or not tasks:
@@ -284,22 +489,32 @@ class ChartAgent(BaseAgent):
             "display": {
                 "show_dependencies": True,
                 "show_progress": True,
-                "view_mode": "days"  # days, weeks, months
+                "view_mode": "days",  # days, weeks, months
+                "show_load": True,  # 日ごとの同時実行数の表示
+                "load_capacity": 5  # これを超える同時実行数を過負荷として表示
             }
         }
-        self.current_settings = self.default_settings.copy()
+        # 現在の設定は読み取り専用の版で持ち、更新のたびに新しい版に差し替える
+        # （読み出した版は他のスレッドの更新で変わらない）
+        self._settings = freeze_settings(self.default_settings)
+
+    @property
+    def current_settings(self):
+        """現在の設定（読み取り専用）"""
+        return self._settings
         
     def process_settings(self, settings):
-        """チャート設定の処理"""
+        """チャート設定の処理（更新後の設定の版を返す）"""
         self.log_request(f"update settings: {settings}")  # 環境適応のためのリクエスト記録
         
-        # 設定の更新
-        if 'colors' in settings:
-            self.current_settings['colors'].update(settings['colors'])
-        if 'display' in settings:
-            self.current_settings['display'].update(settings['display'])
-            
-        return self.current_settings
+        # 設定の更新（同時の更新が失われないよう、読み出しから差し替えまでをロックの中で行う）
+        with self._lock:
+            updated = {section: dict(values) for section, values in self._settings.items()}
+            for section in ('colors', 'display'):
+                if section in settings:
+                    updated[section].update(settings[section])
+            self._settings = freeze_settings(updated)
+            return self._settings
         
     def process_input(self, text, current_tasks=[]):
         """自然言語入力からチャート設定を更新"""
@@ -332,11 +547,13 @@ class ChartAgent(BaseAgent):
             }}
             """
             
-            response = self.model.generate_content(prompt)
+            with span('gemini.chart_settings'):
+                response = self.generate(prompt, 'chart_settings')
             json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
             if json_match:
                 settings = json.loads(json_match.group())
                 # 設定を更新
+                self.record_success()
                 return {
                     'status': 'success',
                     'message': 'チャート設定を更新しました',
@@ -381,6 +598,9 @@ class ChartAgent(BaseAgent):
 class DialogueAgent:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.name_index = TrigramIndex()  # タスク名の解決用（呼び出し側から渡されなければ使う）
+        self._index_lock = threading.Lock()  # name_index を使っている呼び出しの排他
+        self.fuzzy_threshold = 0.6  # 表記ゆれとみなす名前のgramの一致率
         # 進捗更新の表現パターンを修正
         self.progress_patterns = [
             r'進捗[をにが](\d+)[%％]',
@@ -391,16 +611,14 @@ class DialogueAgent:
             r'(\d+)[%％]に[設定更新]'
         ]
 
-    def process_input(self, user_input, tasks):
+    @traced('agent.dialogue')
+    def process_input(self, user_input, tasks, index=None):
+        """index: タスク名の TrigramIndex（呼び出し側で差分更新している場合に渡す）"""
         try:
-            # 複数コマンドの処理
-            if '\n' in user_input:
-                commands = [cmd.strip() for cmd in user_input.split('\n') if cmd.strip()]
-                return self._process_multiple_commands(commands, tasks)
-
-            # 単一コマンドの処理
-            return self._process_single_command(user_input, tasks)
-                
+            if index is None:
+                with borrow_index(self.name_index, self._index_lock, tasks) as index:
+                    return self._process_commands(user_input, tasks, index)
+            return self._process_commands(user_input, tasks, index)
         except Exception as e:
             self.logger.error(f"対話処理中にエラー: {str(e)}")
             return {
@@ -408,13 +626,22 @@ class DialogueAgent:
                 'message': f'エラーが発生しました: {str(e)}'
             }
 
-    def _process_multiple_commands(self, commands, tasks):
-        """複数コマンドを順次処理"""
+    def _process_commands(self, user_input, tasks, index):
+        # 複数コマンドの処理
+        if '\n' in user_input:
+            commands = [cmd.strip() for cmd in user_input.split('\n') if cmd.strip()]
+            return self._process_multiple_commands(commands, tasks, index)
+
+        # 単一コマンドの処理
+        return self._process_single_command(user_input, tasks, index)
+
+    def _process_multiple_commands(self, commands, tasks, index):
+        """複数コマンドを順次処理（コマンドではタスク名は変わらないのでインデックスは共通）"""
         current_tasks = tasks.copy()
         results = []
         
         for command in commands:
-            result = self._process_single_command(command, current_tasks)
+            result = self._process_single_command(command, current_tasks, index)
             if result['action'] == 'update_tasks':
                 current_tasks = result['tasks']
                 results.append(result['message'])
@@ -427,14 +654,31 @@ class DialogueAgent:
             }
         return {'action': 'none', 'message': 'コマンドを認識できませんでした'}
 
-    def _process_single_command(self, command, tasks):
+    def resolve_task_name(self, command, index):
+        """コマンド中のタスク名を解決
+
+        名前がそのまま含まれていれば最も長いものを、なければ表記ゆれ・入力ミスとして
+        最も近い名前が1つに決まる場合だけそれを返す。
+        """
+        candidates = index.find_in(command, limit=20, min_score=self.fuzzy_threshold)
+        normalized_command = normalize(command)
+        exact = next((key for key, score in candidates
+                      if score == 1.0 and index.normalized[key] in normalized_command), None)
+        fuzzy = []  # (名前, スコア, 長さ) 同じ名前は1つにまとめる
+        for key, score in candidates:
+            if key != exact and index.names[key] not in (item[0] for item in fuzzy):
+                fuzzy.append((index.names[key], score, len(index.normalized[key])))
+        if fuzzy and (len(fuzzy) == 1 or fuzzy[0][1] > fuzzy[1][1]):
+            name, score, length = fuzzy[0]
+            # 完全一致した名前より多くの文字を説明できる近い名前があればそちらを採用
+            if exact is None or score * length > len(index.normalized[exact]):
+                return name
+        return index.names[exact] if exact is not None else None
+
+    def _process_single_command(self, command, tasks, index):
         """単一コマンドの処理"""
         # タスク名の抽出
-        task_name = None
-        for task in tasks:
-            if task['name'] in command:
-                task_name = task['name']
-                break
+        task_name = self.resolve_task_name(command, index)
 
         if not task_name:
             return {'action': 'none', 'message': 'タスクが見つかりませんでした'}
@@ -460,14 +704,15 @@ class DialogueAgent:
         return {'action': 'none', 'message': 'コマンドを認識できませんでした'}
 
     def _update_task_status(self, tasks, task_name, status, progress=None):
-        updated_tasks = []
-        for task in tasks:
-            new_task = task.copy()
+        # 変更するタスクだけを複製し、その他のタスクは同じオブジェクトを共有する
+        updated_tasks = list(tasks)
+        for i, task in enumerate(tasks):
             if task['name'] == task_name:
+                new_task = task.copy()
                 new_task['status'] = status
                 if progress is not None:
                     new_task['progress'] = progress
-            updated_tasks.append(new_task)
+                updated_tasks[i] = new_task
         
         return {
             'action': 'update_tasks',
@@ -476,13 +721,13 @@ class DialogueAgent:
         }
 
     def _update_task_progress(self, tasks, task_name, progress):
-        updated_tasks = []
-        for task in tasks:
-            new_task = task.copy()
+        updated_tasks = list(tasks)
+        for i, task in enumerate(tasks):
             if task['name'] == task_name:
+                new_task = task.copy()
                 new_task['progress'] = progress
                 new_task['status'] = 'completed' if progress == 100 else 'in_progress'
-            updated_tasks.append(new_task)
+                updated_tasks[i] = new_task
         
         return {
             'action': 'update_tasks',
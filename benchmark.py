@@ -0,0 +1,385 @@
+"""ホットパスのベンチマーク
+
+使い方:
+    python benchmark.py                          # 1k / 100k タスクで計測
+    python benchmark.py --sizes 1000,100000,1000000
+    python benchmark.py --save-baseline          # 結果をベースラインとして保存
+    python benchmark.py --threshold 0.2          # ベースラインより20%以上遅ければ終了コード1
+    python benchmark.py --csv-mb 4096            # 4GBのShift_JIS・タブ区切りCSVで形式の判定と読み込みを計測
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from agents import TaskAgent, DialogueAgent
+from csv_analyzer_ai import GeminiCSVAnalyzer
+from csv_format import sniff_csv
+from progress_series import ProgressLog
+from gantt_layout import GanttLayout
+from chart_export import ChartModel, export_chart
+import dates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [1000, 100000]
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+PROJECT_START = date(2024, 1, 1)
+
+
+def generate_tasks(count, seed=0, max_deps=3, dep_window=50, span_days=730):
+    """依存関係グラフを持つ合成タスクを生成（依存先は常に前方のタスクなのでDAGになる）"""
+    rng = random.Random(seed)
+    now = datetime.now().isoformat()
+    tasks = []
+    for i in range(count):
+        start = PROJECT_START + timedelta(days=rng.randrange(span_days))
+        end = start + timedelta(days=rng.randint(1, 20))
+        dependencies = []
+        if i:
+            for _ in range(rng.randint(0, max_deps)):
+                dep = tasks[rng.randrange(max(0, i - dep_window), i)]['id']
+                if dep not in dependencies:
+                    dependencies.append(dep)
+        progress = rng.choice([0, 0, 25, 50, 75, 100])
+        tasks.append({
+            'id': f'task-{i:07d}',
+            'name': f'タスク{i:07d}',
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'progress': progress,
+            'status': 'completed' if progress == 100 else ('in_progress' if progress else 'created'),
+            'dependencies': dependencies,
+            'metadata': {'created_at': now, 'updated_at': now}
+        })
+    return tasks
+
+
+def generate_csv_frame(count, seed=0, span_days=730):
+    """CSVインポート相当のDataFrameとカラムマッピングを生成"""
+    rng = random.Random(seed)
+    names, starts, ends, progress = [], [], [], []
+    for i in range(count):
+        start = PROJECT_START + timedelta(days=rng.randrange(span_days))
+        names.append(f'タスク{i:07d}')
+        starts.append(start.strftime('%Y/%m/%d'))
+        ends.append((start + timedelta(days=rng.randint(1, 20))).strftime('%Y/%m/%d'))
+        progress.append(f'{rng.randint(0, 100)}%')
+    df = pd.DataFrame({'タスク名': names, '開始日': starts, '終了日': ends, '進捗': progress})
+    mapping = {'task_name': 'タスク名', 'start_date': '開始日', 'end_date': '終了日', 'progress': '進捗'}
+    return df, mapping
+
+
+def write_csv_file(path, size_bytes, encoding='cp932', delimiter='\t', block_rows=10000):
+    """日本語の業務システムの出力を模したCSV（既定はShift_JIS・タブ区切り・CRLF）を size_bytes 以上書き出す
+
+    同じ行のブロックを繰り返して書くため、数GBのファイルでも生成は書き込みの速度で済む。
+    """
+    df, mapping = generate_csv_frame(block_rows)
+    header = df.iloc[:0].to_csv(sep=delimiter, index=False, lineterminator='\r\n').encode(encoding)
+    block = df.to_csv(sep=delimiter, index=False, header=False, lineterminator='\r\n').encode(encoding)
+    written = 0
+    with open(path, 'wb') as f:
+        f.write(header)
+        written += len(header)
+        while written < size_bytes:
+            f.write(block)
+            written += len(block)
+    return written, mapping
+
+
+def generate_commands(tasks, count, seed=0):
+    """DialogueAgent向けの複数行コマンドを生成"""
+    rng = random.Random(seed)
+    templates = ['{}の進捗を{}%に更新', '{}を開始', '{}を完了', '{}の完了率を{}%に変更']
+    lines = []
+    for _ in range(count):
+        task = tasks[rng.randrange(len(tasks))]
+        lines.append(rng.choice(templates).format(task['name'], rng.randint(0, 100)))
+    return '\n'.join(lines)
+
+
+def generate_task_sentences(count, seed=0):
+    """タスク作成の定型文を生成"""
+    rng = random.Random(seed)
+    templates = ['設計レビュー{} {}/{}から{}日間、実装{}に依存', 'タスク{}を{}/{}から{}日', '結合テスト{} {}/{}〜 {}週間',
+                 'Design review {} on Mar {} for {} days']
+    lines = []
+    for i in range(count):
+        template = rng.choice(templates)
+        values = [i, rng.randint(1, 12), rng.randint(1, 28), rng.randint(1, 10), rng.randint(0, i + 1)]
+        if template.startswith('Design'):
+            values = [i, rng.randint(1, 28), rng.randint(1, 10)]
+        lines.append(template.format(*values))
+    return lines
+
+
+def measure(func, repeat=3, setup=None, budget=30.0):
+    """関数の実行時間を計測（setupの時間は含めない）
+
+    合計時間がbudget秒を超えた時点で繰り返しを打ち切る。
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+        if sum(timings) > budget:
+            break
+    return {'seconds': min(timings), 'median': statistics.median(timings), 'repeat': len(timings)}
+
+
+def bench_validate_and_transform(size, repeat):
+    analyzer = GeminiCSVAnalyzer()
+    df, mapping = generate_csv_frame(size)
+    return measure(lambda: analyzer.validate_and_transform_data(df, mapping), repeat)
+
+
+def bench_validate_tasks(size, repeat):
+    agent = TaskAgent()
+    tasks = generate_tasks(size)
+    for task in tasks[::2]:
+        # 半分のタスクは補完が必要な状態にする
+        del task['metadata']
+        del task['dependencies']
+    return measure(agent.validate_tasks, repeat,
+                   setup=lambda: ([dict(task) for task in tasks],))
+
+
+def bench_dialogue_batch(size, repeat, commands=20):
+    agent = DialogueAgent()
+    tasks = generate_tasks(size)
+    batch = generate_commands(tasks, commands)
+    result = measure(lambda: agent.process_input(batch, tasks), repeat)
+    result['commands'] = commands
+    return result
+
+
+def bench_extract(size, repeat, max_lines=10000):
+    """ローカル抽出（TaskAgent.extract_task_info の高速経路）"""
+    agent = TaskAgent()
+    lines = generate_task_sentences(min(size, max_lines))
+
+    def extract():
+        for line in lines:
+            agent.extract_task_info(line, offline=True)
+
+    result = measure(extract, repeat)
+    result['lines'] = len(lines)
+    result['hit_rate'] = round(agent.extractor.hit_rate, 3)
+    return result
+
+
+def bench_layout(size, repeat, calls=1000):
+    layout = GanttLayout()
+    tasks = generate_tasks(size)
+    samples = [dates.task_start(task) for task in tasks[:calls]]
+
+    def date_to_x_calls():
+        # GanttChart.update_gantt_chart と同様に開始日は描画ごとに1回だけ求める
+        project_start = layout.project_start(tasks)
+        for sample in samples:
+            layout.date_to_x(sample, project_start)
+
+    def draw_date_axis():
+        project_start, project_end = layout.project_range(tasks)
+        layout.date_axis_ticks(project_start, project_end)
+
+    return {
+        'date_to_x': dict(measure(date_to_x_calls, repeat), calls=len(samples)),
+        'draw_date_axis': measure(draw_date_axis, repeat)
+    }
+
+
+def bench_csv_file(path, repeat, chunksize=200000):
+    """CSVの形式の判定（先頭の一部だけを読む）と、判定結果を使ったチャンク単位の全件読み込み"""
+    csv_format = sniff_csv(path)
+    rows = 0
+
+    def read_all():
+        nonlocal rows
+        rows = 0
+        for chunk in pd.read_csv(path, chunksize=chunksize, **csv_format.read_options()):
+            rows += len(chunk)
+
+    size = os.path.getsize(path)
+    read = measure(read_all, repeat)
+    read.update(rows=rows, mb_per_second=round(size / read['seconds'] / 2 ** 20, 1))
+    return {
+        'sniff': dict(measure(lambda: sniff_csv(path), repeat), bytes=size),
+        'read': read
+    }
+
+
+def bench_csv(size, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tasks.csv')
+        df, _ = generate_csv_frame(size)
+        df.to_csv(path, sep='\t', index=False, encoding='cp932', lineterminator='\r\n')
+        return bench_csv_file(path, repeat)
+
+
+def bench_large_csv(size_mb, repeat=1):
+    """size_mb MB のCSVを一時ディレクトリに書き出して計測（読み込みは既定で1回）"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'large.csv')
+        write_csv_file(path, size_mb * 2 ** 20)
+        return bench_csv_file(path, repeat)
+
+
+def generate_progress_log(tasks, samples_per_task=10, seed=0, span_days=90):
+    """タスクごとに進捗率が少しずつ上がっていく履歴を生成"""
+    rng = random.Random(seed)
+    started = int(datetime.combine(PROJECT_START, datetime.min.time()).timestamp())
+    events = []
+    for task in tasks:
+        progress = 0
+        for _ in range(samples_per_task):
+            progress = min(100, progress + rng.randint(0, 20))
+            events.append((started + rng.randrange(span_days * 86400), task['id'], progress))
+    events.sort()
+    log = ProgressLog()
+    for timestamp, task_id, progress in events:
+        log.record({'id': task_id, 'progress': progress, 'status': 'in_progress'}, timestamp)
+    return log
+
+
+def bench_burndown(size, repeat, samples_per_task=10):
+    tasks = generate_tasks(size)
+    log = generate_progress_log(tasks, samples_per_task)
+    weights = {task['id']: float(dates.task_end(task) - dates.task_start(task) + 1) for task in tasks}
+    start = PROJECT_START.toordinal()
+    result = measure(lambda: log.burndown(start, start + 89, weights), repeat)
+    result.update(samples=len(log), bytes=log.nbytes())
+    return result
+
+
+def bench_export(size, repeat, rows_per_page=500):
+    """SVGの書き出し（1ファイルと行方向のページ分割）"""
+    tasks = generate_tasks(size)
+    results = {'model': measure(lambda: ChartModel(tasks), repeat)}
+    model = ChartModel(tasks)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chart.svg')
+        results['svg'] = measure(lambda: export_chart(model, path), repeat)
+        results['svg']['bytes'] = os.path.getsize(path)
+        results['svg_pages'] = measure(lambda: export_chart(model, path, rows_per_page), repeat)
+    return results
+
+
+def run_benchmarks(sizes, repeat=3, csv_mb=None):
+    """全ベンチマークを実行して結果を返す"""
+    results = {}
+    for size in sizes:
+        logger.info(f"ベンチマーク実行中: {size}件")
+        results[f'validate_and_transform_data[{size}]'] = bench_validate_and_transform(size, repeat)
+        results[f'TaskAgent.validate_tasks[{size}]'] = bench_validate_tasks(size, repeat)
+        results[f'DialogueAgent.process_input[{size}]'] = bench_dialogue_batch(size, repeat)
+        results[f'TaskAgent.extract_task_info[{size}]'] = bench_extract(size, repeat)
+        for name, result in bench_layout(size, repeat).items():
+            results[f'layout.{name}[{size}]'] = result
+        results[f'ProgressLog.burndown[{size}]'] = bench_burndown(size, repeat)
+        for name, result in bench_export(size, repeat).items():
+            results[f'export.{name}[{size}]'] = result
+        for name, result in bench_csv(size, repeat).items():
+            results[f'csv.{name}[{size}]'] = result
+    if csv_mb:
+        logger.info(f"ベンチマーク実行中: {csv_mb}MBのCSV")
+        for name, result in bench_large_csv(csv_mb).items():
+            results[f'csv.{name}[{csv_mb}MB]'] = result
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'repeat': repeat,
+            'csv_mb': csv_mb
+        },
+        'results': results
+    }
+
+
+def compare_results(current, baseline, threshold=0.2):
+    """ベースラインと比較し、閾値を超えて遅くなったケースを返す"""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('seconds'):
+            continue
+        ratio = result['seconds'] / base['seconds']
+        if ratio > 1 + threshold:
+            regressions.append({
+                'name': name,
+                'baseline': base['seconds'],
+                'current': result['seconds'],
+                'ratio': ratio
+            })
+    return regressions
+
+
+def load_baseline(path):
+    """ベースラインを読み込み（存在しなければNone）"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='ガントチャートのホットパスを計測')
+    arg_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help='タスク数（カンマ区切り）')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    arg_parser.add_argument('--save-baseline', action='store_true')
+    arg_parser.add_argument('--output', help='結果JSONの出力先')
+    arg_parser.add_argument('--csv-mb', type=int, help='形式の判定と読み込みを計測する大きなCSVのサイズ（MB）')
+    arg_parser.add_argument('--threshold', type=float, default=0.2,
+                            help='許容する劣化率（0.2 = 20%%）')
+    args = arg_parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = run_benchmarks(sizes, args.repeat, args.csv_mb)
+
+    for name, result in results['results'].items():
+        print(f"{name:45s} {result['seconds'] * 1000:12.2f} ms")
+
+    if args.output:
+        save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        print(f"ベースラインを保存しました: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("ベースラインがないため比較をスキップしました")
+        return 0
+
+    regressions = compare_results(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"劣化: {regression['name']} "
+              f"{regression['baseline'] * 1000:.2f} ms -> {regression['current'] * 1000:.2f} ms "
+              f"(x{regression['ratio']:.2f})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
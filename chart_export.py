@@ -0,0 +1,523 @@
+"""ガントチャートのファイル出力（SVG・PNG、画面なしで使える）
+
+ChartModel はタスクから行ごとのバーの座標・進捗率・依存関係の矢印を numpy の配列で求める描画方式に依存しない
+レイアウトで、ページ（行と列の範囲）ごとに図形を順に生成する。図形は次のタプルで表す:
+
+    ('rect', x1, y1, x2, y2, 塗り, 枠線)             枠線・塗りは None なら描かない
+    ('line', x1, y1, x2, y2, 色, 破線, 矢印)          矢印が True なら終点に矢じり
+    ('text', x, y, 文字列, 配置, 大きさ, 色)          配置は 'w'（左寄せ）または 'center'
+
+SVGWriter・PNGWriter は図形を受け取った順にファイルへ書き出すため、メモリ使用量はタスク数ではなく
+1ページの大きさで決まる（PNGは1ページ分の画素、SVGは書き込み待ちの数百要素）。PNGには文字を描かない。
+
+使い方:
+    python chart_export.py tasks.json chart.svg
+    python chart_export.py tasks.json chart.svg --rows-per-page 200 --columns-per-page 90
+    python chart_export.py --service 127.0.0.1:8765 chart.png --view-mode weeks
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import struct
+import zlib
+from datetime import date
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from gantt_layout import GanttLayout
+from wbs import WBSTree
+
+logger = logging.getLogger(__name__)
+
+# バーの色（ライブのチャートと同じ）
+STATUS_COLORS = {
+    'created': 'gray',
+    'in_progress': 'blue',
+    'completed': 'green'
+}
+PROGRESS_COLOR = 'lightgreen'
+SUMMARY_COLOR = 'dimgray'
+SUMMARY_PROGRESS_COLOR = 'darkgreen'
+GRID_COLOR = 'lightgray'
+
+# ページの図形を生成するときに一度に選ぶ行・矢印の数
+CHUNK = 4096
+
+# PNGの1ページの幅・高さの上限（ページ分割を指定しなければこの大きさで分割する）
+MAX_PNG_SIDE = 4096
+
+# PNGで使う色名（SVGは色名をそのまま書き出す）
+COLOR_RGB = {
+    'white': (255, 255, 255), 'black': (0, 0, 0), 'gray': (128, 128, 128), 'darkgray': (169, 169, 169),
+    'dimgray': (105, 105, 105), 'lightgray': (211, 211, 211), 'blue': (0, 0, 255),
+    'lightblue': (173, 216, 230), 'lightsteelblue': (176, 196, 222), 'green': (0, 128, 0),
+    'lightgreen': (144, 238, 144), 'darkgreen': (0, 100, 0), 'red': (255, 0, 0), 'orange': (255, 165, 0)
+}
+
+
+def color_rgb(color):
+    """色名または #rrggbb を (r, g, b) に変換（不明な色は灰色）"""
+    if color.startswith('#') and len(color) == 7:
+        return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return COLOR_RGB.get(color.lower(), COLOR_RGB['gray'])
+
+
+class Page:
+    """1ページ（行 row0〜row1-1、列 column0〜column1-1）"""
+    __slots__ = ('row', 'column', 'row0', 'row1', 'column0', 'column1')
+
+    def __init__(self, row, column, row0, row1, column0, column1):
+        self.row = row  # ページの位置（縦・横の何番目か）
+        self.column = column
+        self.row0 = row0
+        self.row1 = row1
+        self.column0 = column0
+        self.column1 = column1
+
+
+class ChartModel:
+    """出力用のガントチャートのレイアウト（折りたたんだ部分木は親の1行）
+
+    バーの座標はチャート全体の座標で持ち、ページの図形を生成するときにページの座標に移す。
+    バーは開始日のセルの左端から終了日のセルの右端まで。矢印は依存先のバーの右端から依存元のバーの左端へ引く。
+    """
+    def __init__(self, tasks, layout=None, collapsed=(), tree=None, colors=None):
+        self.layout = layout or GanttLayout()
+        self.colors = dict(STATUS_COLORS, **(colors or {}))
+        if tree is None:
+            tree = WBSTree()
+            tree.build(tasks)
+        by_id = {task['id']: task for task in tasks}
+        rows = tree.visible_rows(collapsed) if tasks else []
+        row_index = {task_id: i for i, task_id in enumerate(rows)}
+        self.names = []
+        self.statuses = []
+        self.markers = []  # 親タスクの行の ▼/▶（子のない行は None）
+        depths = []
+        starts = []
+        ends = []
+        progress = []
+        sources = []
+        targets = []
+        for i, task_id in enumerate(rows):
+            task = by_id[task_id]
+            summary = tree.summaries[task_id]
+            self.names.append(str(task.get('name', '')))
+            self.statuses.append(task.get('status'))
+            if tree.has_children(task_id):
+                self.markers.append('▶' if task_id in collapsed else '▼')
+            else:
+                self.markers.append(None)
+            depths.append(tree.depth(task_id))
+            starts.append(math.nan if summary.start is None else summary.start)
+            ends.append(math.nan if summary.end is None else summary.end + 1)
+            progress.append(summary.progress)
+            for dep_id in task.get('dependencies') or ():
+                dep_row = row_index.get(dep_id)
+                if dep_row is not None:
+                    sources.append(dep_row)
+                    targets.append(i)
+        self.depths = np.array(depths, dtype=np.int32)
+        self.progress = np.array(progress, dtype=np.float64)
+        self.sources = np.array(sources, dtype=np.int64)  # 矢印の始点（依存先）の行
+        self.targets = np.array(targets, dtype=np.int64)
+
+        self.start, self.end = tree.project_range() if rows else (None, None)
+        if self.start is None:
+            # 日付のあるタスクがなければ今日の1日分の軸にする
+            self.start = self.end = date.today().toordinal()
+        self.cells = None  # 週・月表示のセル (x, ラベル, バケットキー)
+        if self.layout.view_mode == 'days':
+            self.columns = self.end - self.start + 1
+        else:
+            self.cells = self.layout.bucket_cells(self.start, self.end)
+            self.columns = len(self.cells)
+        self.x1 = self._to_x(np.array(starts, dtype=np.float64))
+        self.x2 = self._to_x(np.array(ends, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _to_x(self, ordinals):
+        """日付の序数（NaNは日付なし）をチャート全体のX座標に変換"""
+        layout = self.layout
+        if layout.view_mode == 'days':
+            return layout.task_width + (ordinals - self.start) * layout.cell_width
+        return np.array([math.nan if math.isnan(ordinal) else layout.date_to_x(int(ordinal), self.start)
+                         for ordinal in ordinals], dtype=np.float64)
+
+    @property
+    def width(self):
+        return self.layout.task_width + self.columns * self.layout.cell_width
+
+    @property
+    def height(self):
+        return self.layout.header_height + len(self) * self.layout.row_height
+
+    def pages(self, rows_per_page=None, columns_per_page=None):
+        """ページを上の行のページから順に、同じ行では左から返す（省略した方向は分割しない）"""
+        rows_per_page = max(1, rows_per_page or len(self) or 1)
+        columns_per_page = max(1, columns_per_page or self.columns)
+        for row, row0 in enumerate(range(0, max(len(self), 1), rows_per_page)):
+            for column, column0 in enumerate(range(0, self.columns, columns_per_page)):
+                yield Page(row, column, row0, min(len(self), row0 + rows_per_page),
+                           column0, min(self.columns, column0 + columns_per_page))
+
+    def page_size(self, page):
+        layout = self.layout
+        return (layout.task_width + (page.column1 - page.column0) * layout.cell_width,
+                layout.header_height + (page.row1 - page.row0) * layout.row_height)
+
+    def layers(self, page):
+        """ページの図形を (クリップ矩形, 図形の列) の順に返す（クリップ矩形の外は描かない）"""
+        width, height = self.page_size(page)
+        layout = self.layout
+        return [
+            ((layout.task_width, 0, width, layout.header_height), self.header(page)),
+            ((0, layout.header_height, layout.task_width, height), self.labels(page)),
+            ((layout.task_width, layout.header_height, width, height), self.bars(page)),
+        ]
+
+    def header(self, page):
+        """日付軸（日表示は日と年月、週・月表示はバケットのラベル）"""
+        layout = self.layout
+        cell = layout.cell_width
+        top = layout.header_height
+        for column in range(page.column0, page.column1):
+            x = layout.task_width + (column - page.column0) * cell
+            yield ('line', x, top / 2, x, top, GRID_COLOR, False, False)
+            if self.cells is not None:
+                yield ('text', x + cell / 2, top * 0.75, self.cells[column][1], 'center', 8, 'black')
+                continue
+            day = date.fromordinal(self.start + column)
+            if column == page.column0 or day.day == 1:
+                yield ('text', x + 2, top * 0.25, day.strftime('%Y-%m'), 'w', 10, 'black')
+            yield ('text', x + cell / 2, top * 0.75, day.strftime('%d'), 'center', 9, 'black')
+        yield ('line', layout.task_width, top, self.page_size(page)[0], top, 'gray', False, False)
+
+    def labels(self, page):
+        """タスク名（字下げと折りたたみの記号付き）"""
+        layout = self.layout
+        for i in range(page.row0, page.row1):
+            y = layout.header_height + (i - page.row0 + 0.5) * layout.row_height
+            x = 5 + self.depths[i] * 15
+            if self.markers[i] is not None:
+                yield ('text', x, y, self.markers[i], 'w', 9, 'black')
+                x += 14
+            yield ('text', x, y, self.names[i], 'w', 10, 'black')
+        yield ('line', layout.task_width, layout.header_height, layout.task_width,
+               self.page_size(page)[1], 'gray', False, False)
+
+    def bars(self, page):
+        """グリッド線・バー・進捗・依存関係の矢印（ページにかかるものだけ）"""
+        layout = self.layout
+        width, height = self.page_size(page)
+        offset = page.column0 * layout.cell_width  # チャート全体のX座標からページのX座標への差
+        left = layout.task_width + offset
+        right = layout.task_width + page.column1 * layout.cell_width
+        row_height = layout.row_height
+        top = layout.header_height - page.row0 * row_height
+
+        # 月（週・月表示はバケット）の区切りの縦線
+        for column in range(page.column0, page.column1):
+            if self.cells is not None or date.fromordinal(self.start + column).day == 1:
+                x = layout.task_width + (column - page.column0) * layout.cell_width
+                yield ('line', x, layout.header_height, x, height, GRID_COLOR, False, False)
+
+        # 行と矢印は CHUNK 件ずつ選ぶ（1ページに全行を出力しても一時的な配列・リストは CHUNK 件分）
+        for chunk0 in range(page.row0, page.row1, CHUNK):
+            chunk1 = min(page.row1, chunk0 + CHUNK)
+            x1 = self.x1[chunk0:chunk1]
+            x2 = self.x2[chunk0:chunk1]
+            visible = np.flatnonzero((x2 >= left) & (x1 <= right))
+            for i in (visible + chunk0).tolist():
+                bar_x1 = self.x1[i] - offset
+                bar_x2 = self.x2[i] - offset
+                y = top + (i + 0.5) * row_height
+                progress = self.progress[i]
+                if self.markers[i] is not None:
+                    yield ('rect', bar_x1, y - 5, bar_x2, y + 5, SUMMARY_COLOR, 'black')
+                    if progress > 0:
+                        yield ('rect', bar_x1, y - 5, bar_x1 + (bar_x2 - bar_x1) * progress / 100, y + 5,
+                               SUMMARY_PROGRESS_COLOR, 'black')
+                    yield ('text', bar_x2 + 5, y, f"{progress:.0f}%", 'w', 9, 'black')
+                    continue
+                half = row_height / 2 - 5
+                yield ('rect', bar_x1, y - half, bar_x2, y + half,
+                       self.colors.get(self.statuses[i], 'gray'), 'darkgray')
+                if progress > 0:
+                    yield ('rect', bar_x1, y - half, bar_x1 + (bar_x2 - bar_x1) * progress / 100, y + half,
+                           PROGRESS_COLOR, 'darkgreen')
+
+        # 矢印の外接矩形がページにかかるものだけを選ぶ（何ページにもまたがる矢印はどのページにも描く）
+        for chunk0 in range(0, len(self.sources), CHUNK):
+            sources = self.sources[chunk0:chunk0 + CHUNK]
+            targets = self.targets[chunk0:chunk0 + CHUNK]
+            start_x = self.x2[sources]
+            end_x = self.x1[targets]
+            selected = np.flatnonzero(
+                (np.minimum(sources, targets) < page.row1) & (np.maximum(sources, targets) >= page.row0)
+                & (np.maximum(start_x, end_x) >= left) & (np.minimum(start_x, end_x) <= right))
+            for k in selected.tolist():
+                yield ('line', start_x[k] - offset, top + (sources[k] + 0.5) * row_height,
+                       end_x[k] - offset, top + (targets[k] + 0.5) * row_height, 'black', True, True)
+
+
+def _num(value):
+    return '%.1f' % value
+
+
+class SVGWriter:
+    """図形を順にSVGとして書き出す（書き込み待ちの要素は flush_every 件まで）"""
+    def __init__(self, f, width, height, flush_every=500):
+        self.f = f
+        self.flush_every = flush_every
+        self.pending = []
+        self.clips = 0
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}" height="{_num(height)}" '
+                f'viewBox="0 0 {_num(width)} {_num(height)}" font-family="sans-serif">\n'
+                '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" '
+                'markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z"/></marker></defs>\n'
+                f'<rect width="{_num(width)}" height="{_num(height)}" fill="white"/>\n')
+
+    def _emit(self, text):
+        self.pending.append(text)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.f.write(''.join(self.pending))
+        self.pending.clear()
+
+    def begin_clip(self, x1, y1, x2, y2):
+        self.clips += 1
+        self._emit(f'<clipPath id="c{self.clips}"><rect x="{_num(x1)}" y="{_num(y1)}" '
+                   f'width="{_num(x2 - x1)}" height="{_num(y2 - y1)}"/></clipPath>'
+                   f'<g clip-path="url(#c{self.clips})">\n')
+
+    def end_clip(self):
+        self._emit('</g>\n')
+
+    def draw(self, element):
+        kind = element[0]
+        if kind == 'rect':
+            _, x1, y1, x2, y2, fill, outline = element
+            self._emit(f'<rect x="{_num(x1)}" y="{_num(y1)}" width="{_num(max(0.0, x2 - x1))}" '
+                       f'height="{_num(y2 - y1)}" fill="{fill or "none"}" stroke="{outline or "none"}"/>\n')
+        elif kind == 'line':
+            _, x1, y1, x2, y2, color, dashed, arrow = element
+            style = (' stroke-dasharray="4 2"' if dashed else '') + (' marker-end="url(#arrow)"' if arrow else '')
+            self._emit(f'<line x1="{_num(x1)}" y1="{_num(y1)}" x2="{_num(x2)}" y2="{_num(y2)}" '
+                       f'stroke="{color}"{style}/>\n')
+        elif kind == 'text':
+            _, x, y, text, anchor, size, color = element
+            self._emit(f'<text x="{_num(x)}" y="{_num(y)}" font-size="{size}" fill={quoteattr(color)} '
+                       f'text-anchor="{"middle" if anchor == "center" else "start"}" '
+                       f'dominant-baseline="central">{escape(text)}</text>\n')
+
+    def close(self):
+        self._emit('</svg>\n')
+        self.flush()
+
+
+class PNGWriter:
+    """図形を1ページ分の画素に描き、PNGとして書き出す（文字は描かない）"""
+    def __init__(self, f, width, height):
+        self.f = f
+        self.width = int(math.ceil(width))
+        self.height = int(math.ceil(height))
+        self.pixels = np.full((self.height, self.width, 3), 255, dtype=np.uint8)
+        self.clip = (0, 0, self.width, self.height)
+
+    def begin_clip(self, x1, y1, x2, y2):
+        self.clip = (max(0, int(round(x1))), max(0, int(round(y1))),
+                     min(self.width, int(round(x2))), min(self.height, int(round(y2))))
+
+    def end_clip(self):
+        self.clip = (0, 0, self.width, self.height)
+
+    def _fill(self, x1, y1, x2, y2, rgb):
+        cx1, cy1, cx2, cy2 = self.clip
+        x1, x2 = max(cx1, int(round(x1))), min(cx2, int(round(x2)))
+        y1, y2 = max(cy1, int(round(y1))), min(cy2, int(round(y2)))
+        if x1 < x2 and y1 < y2:
+            self.pixels[y1:y2, x1:x2] = rgb
+
+    def _line(self, x1, y1, x2, y2, rgb, dashed=False):
+        cx1, cy1, cx2, cy2 = self.clip
+        # クリップ矩形の中の部分だけを画素にする（何ページにもまたがる矢印を全長分計算しない）
+        t0, t1 = 0.0, 1.0
+        dx, dy = x2 - x1, y2 - y1
+        for p, q in ((-dx, x1 - cx1), (dx, cx2 - 1 - x1), (-dy, y1 - cy1), (dy, cy2 - 1 - y1)):
+            if p == 0:
+                if q < 0:
+                    return
+            elif p < 0:
+                t0 = max(t0, q / p)
+            else:
+                t1 = min(t1, q / p)
+        if t0 > t1:
+            return
+        length = max(abs(dx), abs(dy))
+        first = int(math.ceil(t0 * length))
+        last = int(math.floor(t1 * length))
+        if last < first:
+            return
+        steps = np.arange(first, last + 1)
+        if dashed:
+            steps = steps[steps % 6 < 4]
+        fraction = steps / length if length else np.zeros(len(steps))
+        xs = np.rint(x1 + dx * fraction).astype(np.int64)
+        ys = np.rint(y1 + dy * fraction).astype(np.int64)
+        self.pixels[ys, xs] = rgb
+
+    def draw(self, element):
+        kind = element[0]
+        if kind == 'rect':
+            _, x1, y1, x2, y2, fill, outline = element
+            if fill:
+                self._fill(x1, y1, x2, y2, color_rgb(fill))
+            if outline:
+                rgb = color_rgb(outline)
+                self._fill(x1, y1, x2 + 1, y1 + 1, rgb)
+                self._fill(x1, y2, x2 + 1, y2 + 1, rgb)
+                self._fill(x1, y1, x1 + 1, y2 + 1, rgb)
+                self._fill(x2, y1, x2 + 1, y2 + 1, rgb)
+        elif kind == 'line':
+            _, x1, y1, x2, y2, color, dashed, arrow = element
+            rgb = color_rgb(color)
+            self._line(x1, y1, x2, y2, rgb, dashed)
+            if arrow and (x1, y1) != (x2, y2):
+                angle = math.atan2(y2 - y1, x2 - x1)
+                for side in (-0.45, 0.45):
+                    self._line(x2, y2, x2 - 7 * math.cos(angle + side), y2 - 7 * math.sin(angle + side), rgb)
+
+    def close(self):
+        def chunk(kind, data):
+            self.f.write(struct.pack('>I', len(data)) + kind + data
+                         + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+        self.f.write(b'\x89PNG\r\n\x1a\n')
+        chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0))
+        # 各行を上の行との差（フィルタの種類 2: Up）にして64行ずつ圧縮する（同じ行の続く部分はほぼ0になる）
+        compressor = zlib.compressobj(1)
+        filtered = np.full((min(64, self.height), self.width * 3 + 1), 2, dtype=np.uint8)
+        pixels = self.pixels.reshape(self.height, -1)
+        pending = []
+        size = 0
+        for y in range(0, self.height, 64):
+            rows = pixels[y:y + 64]
+            count = len(rows)
+            filtered[:count, 1:] = rows
+            filtered[1:count, 1:] -= rows[:-1]
+            if y:
+                filtered[0, 1:] -= pixels[y - 1]
+            data = compressor.compress(filtered[:count].tobytes())
+            if data:
+                pending.append(data)
+                size += len(data)
+            if size >= 1 << 16:
+                chunk(b'IDAT', b''.join(pending))
+                pending.clear()
+                size = 0
+        pending.append(compressor.flush())
+        chunk(b'IDAT', b''.join(pending))
+        chunk(b'IEND', b'')
+
+
+WRITERS = {'.svg': SVGWriter, '.png': PNGWriter}
+
+
+def write_page(model, page, f, writer_class=SVGWriter):
+    """1ページ分の図形を f に書き出す"""
+    writer = writer_class(f, *model.page_size(page))
+    for clip, elements in model.layers(page):
+        writer.begin_clip(*clip)
+        for element in elements:
+            writer.draw(element)
+        writer.end_clip()
+    writer.close()
+
+
+def page_path(path, page, paginated):
+    """ページの出力先（分割する場合は chart-r001-c001.svg のように行・列の番号を付ける）"""
+    if not paginated:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}-r{page.row + 1:03d}-c{page.column + 1:03d}{ext}"
+
+
+def export_chart(model, path, rows_per_page=None, columns_per_page=None):
+    """チャートを path の拡張子（.svg / .png）の形式で書き出し、書き出したファイルのリストを返す
+
+    PNGはページ分割を省略すると MAX_PNG_SIDE ピクセルに収まるように分割する。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    writer_class = WRITERS.get(ext)
+    if writer_class is None:
+        raise ValueError(f"対応していない形式です: {ext or path}")
+    layout = model.layout
+    if writer_class is PNGWriter:
+        rows_per_page = rows_per_page or max(1, (MAX_PNG_SIDE - layout.header_height) // layout.row_height)
+        columns_per_page = columns_per_page or max(1, (MAX_PNG_SIDE - layout.task_width) // layout.cell_width)
+    pages = model.pages(rows_per_page, columns_per_page)
+    paginated = ((rows_per_page or len(model)) < len(model)
+                 or (columns_per_page or model.columns) < model.columns)
+    written = []
+    for page in pages:
+        page_file = page_path(path, page, paginated)
+        if writer_class is PNGWriter:
+            with open(page_file, 'wb') as f:
+                write_page(model, page, f, writer_class)
+        else:
+            with open(page_file, 'w', encoding='utf-8') as f:
+                write_page(model, page, f, writer_class)
+        written.append(page_file)
+    logger.info(f"チャートを書き出しました: {len(model)}行, {len(written)}ファイル")
+    return written
+
+
+def load_tasks(path=None, service=None):
+    """タスクをJSONファイル（リストまたは {"tasks": [...]}）または共有サービスから読み込む"""
+    if service:
+        from project_service import ProjectClient
+        client = ProjectClient.from_address(service)
+        try:
+            return client.get_tasks()
+        finally:
+            client.close()
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data['tasks'] if isinstance(data, dict) else data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ガントチャートをSVG・PNGに書き出す')
+    parser.add_argument('tasks', nargs='?', help='タスクのJSONファイル')
+    parser.add_argument('output', help='出力先（.svg または .png）')
+    parser.add_argument('--service', help='タスクを読み込む共有サービス（host:port またはUnixソケットのパス）')
+    parser.add_argument('--view-mode', choices=('days', 'weeks', 'months'), default='days')
+    parser.add_argument('--rows-per-page', type=int, help='1ページの行数（省略すると分割しない）')
+    parser.add_argument('--columns-per-page', type=int, help='1ページの列（日・週・月）数')
+    parser.add_argument('--collapse', action='store_true', help='親タスクをすべて折りたたむ')
+    args = parser.parse_args(argv)
+    if not args.tasks and not args.service:
+        parser.error('タスクのJSONファイルか --service を指定してください')
+
+    tasks = load_tasks(args.tasks, args.service)
+    tree = WBSTree()
+    tree.build(tasks)
+    collapsed = set(tree.children) if args.collapse else set()
+    model = ChartModel(tasks, GanttLayout(view_mode=args.view_mode), collapsed, tree)
+    for path in export_chart(model, args.output, args.rows_per_page, args.columns_per_page):
+        print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -2,11 +2,15 @@ import os
 import logging
 import pandas as pd
 import json
-from datetime import datetime
 import google.generativeai as genai
 from dotenv import load_dotenv
 import re
-from dateutil import parser
+import dates
+from work_calendar import WorkCalendar
+from tracing import span, traced
+from log_config import SampledWarnings
+from csv_format import sniff_csv
+from llm_meter import meter
 
 # 環境変数の読み込み
 load_dotenv()
@@ -15,14 +19,20 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 class GeminiCSVAnalyzer:
-    def __init__(self):
+    def __init__(self, calendar=None, key_column=None):
         self.logger = logging.getLogger(__name__)
         self.model = genai.GenerativeModel('gemini-pro')
+        # 終了日のないCSV（開始日＋作業時間）の終了日計算に使う稼働日カレンダー
+        self.calendar = calendar or WorkCalendar.from_env()
+        # 再インポート時にタスクを突き合わせるキーのカラム（例: チケット）
+        self.key_column = key_column or os.getenv('GANTT_IMPORT_KEY')
 
-    def analyze_csv_structure(self, file_path):
-        """CSVファイルの構造を解析"""
+    def analyze_csv_structure(self, file_path, csv_format=None):
+        """CSVファイルの構造を解析（csv_format: 判定済みのCSVの形式、省略すると判定する）"""
         try:
-            df = pd.read_csv(file_path, nrows=0)  # ヘッダーのみ読み込み
+            with span('csv.read_header'):
+                csv_format = csv_format or sniff_csv(file_path)
+                df = pd.read_csv(file_path, nrows=0, **csv_format.read_options())  # ヘッダーのみ読み込み
             headers = df.columns.tolist()
             return self._analyze_with_gemini(headers)
         except Exception as e:
@@ -33,49 +43,114 @@ class GeminiCSVAnalyzer:
         """Gemini APIを使用してヘッダーを分析"""
         try:
             prompt = f"""
-            以下のCSVヘッダーから、タスク名、開始日、終了日、進捗率を表すカラムを特定してください：
+            以下のCSVヘッダーから、タスク名、開始日、終了日、作業時間、進捗率、チケット番号、親タスクを表すカラムを特定してください：
             {headers}
             
-            以下の形式でJSON形式で返答してください：
+            以下の形式でJSON形式で返答してください（該当するカラムがなければnull）：
             {{
                 "task_name": "タスク名のカラム",
                 "start_date": "開始日のカラム",
                 "end_date": "終了日のカラム",
-                "progress": "進捗率のカラム（オプション）"
+                "duration": "作業時間（時間単位）のカラム（オプション）",
+                "progress": "進捗率のカラム（オプション）",
+                "ticket": "チケット番号・課題キーのカラム（オプション）",
+                "parent": "親タスク・親チケットのキーのカラム（オプション）"
             }}
             """
             
-            response = self.model.generate_content(prompt)
-            mapping = eval(response.text)  # 注意: 実際の実装ではJSONパースを使用すべき
-            
-            return mapping if self._validate_mapping(mapping) else None
+            with span('gemini.analyze_headers'):
+                response = meter.generate(self.model, prompt, 'GeminiCSVAnalyzer.analyze_headers')
+            mapping = self._parse_mapping(response.text)
+            return mapping if mapping is not None and self._validate_mapping(mapping) else None
             
         except Exception as e:
             self.logger.error(f"Gemini API エラー: {str(e)}")
             return None
 
+    def _parse_mapping(self, text):
+        """応答のJSON（```json の囲みや前後の文章があってもよい）からカラムの対応を取り出す"""
+        json_match = re.search(r'\{.*\}', text or '', re.DOTALL)
+        if not json_match:
+            self.logger.error("Gemini API の応答にJSONがありません")
+            return None
+        mapping = json.loads(json_match.group())
+        mapping = mapping.get('column_mapping', mapping)
+        return mapping if isinstance(mapping, dict) else None
+
     def _validate_mapping(self, mapping):
-        """必須カラムが存在するか確認"""
-        required_columns = ['task_name', 'start_date', 'end_date']
-        return all(col in mapping for col in required_columns)
+        """必須カラムが存在するか確認（終了日がなければ作業時間が必要）"""
+        required_columns = ['task_name', 'start_date']
+        return (all(mapping.get(col) for col in required_columns)
+                and bool(mapping.get('end_date') or mapping.get('duration')))
 
-    def validate_and_transform_data(self, df, mapping):
-        """データの検証と変換"""
+    @traced('csv.validate_and_transform')
+    def validate_and_transform_data(self, df, mapping, ordinals=None):
+        """データの検証と変換（ordinals: 変換済みの日付の列 列名 -> 日の序数の配列）"""
         try:
             tasks = []
-            for _, row in df.iterrows():
+            invalid = SampledWarnings(self.logger, "無効なタスクデータ")
+            # 日付は列ごとにまとめて変換（同じ文字列は一度だけ解析）
+            ordinals = ordinals or {}
+
+            def column_ordinals(column):
+                if column in ordinals:
+                    return ordinals[column]
+                return dates.column_to_ordinals(df[column])
+
+            names = df[mapping['task_name']].tolist()
+            start_ordinals = column_ordinals(mapping['start_date'])
+            duration_column = mapping.get('duration')
+            hours = None
+            if duration_column in df.columns:
+                hours = pd.to_numeric(df[duration_column], errors='coerce').to_numpy()
+            if mapping.get('end_date') in df.columns:
+                end_dates = dates.ordinals_to_iso(column_ordinals(mapping['end_date']))
+            elif hours is not None:
+                # 終了日がなければ作業時間から稼働日カレンダーで計算（create_task と同じく、開始日は
+                # 稼働日に送り、終了日は最終稼働日）
+                start_ordinals = self.calendar.start_dates(start_ordinals)
+                end_dates = dates.ordinals_to_iso(self.calendar.end_dates(start_ordinals, hours))
+            else:
+                raise ValueError("終了日または作業時間のカラムが必要です")
+            start_dates = dates.ordinals_to_iso(start_ordinals)
+            progress_column = mapping.get('progress')
+            if progress_column in df.columns:
+                codes, uniques = pd.factorize(df[progress_column], use_na_sentinel=False)
+                converted = [self.convert_progress(value) for value in uniques]
+                progresses = [converted[code] for code in codes]
+            else:
+                progresses = [0] * len(df)
+            ticket_column = mapping.get('ticket')
+            tickets = df[ticket_column].tolist() if ticket_column in df.columns else None
+            key_column = mapping.get('key') or self.key_column
+            keys = df[key_column].tolist() if key_column in df.columns else None
+            parent_column = mapping.get('parent')
+            parents = df[parent_column].tolist() if parent_column in df.columns else None
+
+            for i, (name, start_date, end_date, progress) in enumerate(
+                    zip(names, start_dates, end_dates, progresses)):
                 task = {
-                    'name': row[mapping['task_name']],
-                    'start_date': self.guess_date_format(row[mapping['start_date']]),
-                    'end_date': self.guess_date_format(row[mapping['end_date']]),
-                    'progress': self.convert_progress(row.get(mapping.get('progress', ''), 0))
+                    'name': name,
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'progress': progress
                 }
+                if hours is not None:
+                    task['duration'] = 0 if pd.isna(hours[i]) else float(hours[i])
+                if tickets is not None and pd.notna(tickets[i]):
+                    task['ticket'] = tickets[i]
+                if keys is not None and pd.notna(keys[i]):
+                    task['key'] = keys[i]
+                if parents is not None and pd.notna(parents[i]) and parents[i] != '':
+                    task['parent'] = parents[i]
                 
-                if all(task.values()):  # すべての値が有効な場合のみ追加
+                # タスク名と日付が有効な場合のみ追加（進捗率0%は有効な値）
+                if pd.notna(name) and name and start_date and end_date:
                     tasks.append(task)
                 else:
-                    self.logger.warning(f"無効なタスクデータ: {task}")
+                    invalid.warn(task)
             
+            invalid.flush()
             return tasks
         except Exception as e:
             self.logger.error(f"データ変換エラー: {str(e)}")
@@ -83,11 +158,7 @@ class GeminiCSVAnalyzer:
 
     def guess_date_format(self, date_str):
         """日付文字列のフォーマットを推測"""
-        try:
-            parsed_date = parser.parse(str(date_str))
-            return parsed_date.strftime('%Y-%m-%d')
-        except:
-            return None
+        return dates.normalize(date_str)
 
     def convert_progress(self, progress_str):
         """進捗値を標準形式（0-100の整数）に変換"""
@@ -107,13 +178,18 @@ class GeminiCSVAnalyzer:
     def analyze_and_convert(self, file_path):
         """CSVファイルを解析して変換"""
         try:
+            # 形式（エンコーディング・区切り文字）は一度だけ判定して以降の読み込みで共有
+            with span('csv.sniff'):
+                csv_format = sniff_csv(file_path)
             # 構造を解析
-            mapping = self.analyze_csv_structure(file_path)
+            mapping = self.analyze_csv_structure(file_path, csv_format)
             if not mapping:
                 raise ValueError("CSVの構造を解析できませんでした")
             
             # データを変換
-            result = self.validate_and_transform_data(pd.read_csv(file_path), mapping)
+            with span('csv.read'):
+                df = pd.read_csv(file_path, **csv_format.read_options())
+            result = self.validate_and_transform_data(df, mapping)
             if not result:
                 raise ValueError("データの変換に失敗しました")
             
@@ -0,0 +1,106 @@
+import hashlib
+import io
+import logging
+import os
+
+import pandas as pd
+
+from csv_format import sniff_csv
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class CSVFollower:
+    """追記され続けるCSVの追従読み込み（tail -f のように前回の続きの行だけを読む）
+
+    読み込み済みのバイト位置とヘッダー行のハッシュを覚えておき、ヘッダーが同じ間は
+    カラムのマッピングを再利用する（Geminiへの問い合わせはヘッダーが変わったときだけ）。
+    ファイルが短くなった・置き換えられた・ヘッダーが変わった場合は先頭から読み直す。
+    書きかけの最終行（改行で終わっていない行）は次回に回す。
+    CSVの形式（エンコーディング・区切り文字）は読み直すときだけ判定し、追記分の読み込みには同じものを使う。
+    """
+    def __init__(self, file_path, analyzer):
+        self.file_path = file_path
+        self.analyzer = analyzer
+        self.offset = 0  # 読み込み済みのバイト位置（改行の直後）
+        self.header = None  # ヘッダー行（改行を含むバイト列）
+        self.signature = None
+        self.file_id = None  # (デバイス, iノード)
+        self.format = None  # CSVFormat
+        self.mapping = None
+        self._mappings = {}  # ヘッダーのハッシュ -> マッピング
+
+    def start(self):
+        """先頭から読み込み、全行のタスクデータを返す"""
+        self.offset = 0
+        self.header = None
+        self.format = None
+        rows, _ = self.poll()
+        return rows
+
+    def poll(self):
+        """前回以降に追記された行を読み込み、(タスクデータのリスト, 読み直したかどうか) を返す"""
+        stat = os.stat(self.file_path)
+        file_id = (stat.st_dev, stat.st_ino)
+        reset = self.header is not None and (file_id != self.file_id or stat.st_size < self.offset)
+        if reset:
+            logger.info(f"CSVが置き換えられたため先頭から読み直します: {self.file_path}")
+        self.file_id = file_id
+        if self.format is None or reset:
+            self.format = sniff_csv(self.file_path)
+
+        with open(self.file_path, 'rb') as f:
+            header = self._read_header(f)
+            if header is None:
+                if self.header is None:
+                    self.format = None  # ヘッダーがそろってから判定し直す
+                return [], False  # ヘッダーの書き込み途中
+            signature = hashlib.sha1(header.strip()).hexdigest()
+            if self.header is not None and signature != self.signature:
+                logger.info(f"CSVのヘッダーが変わったため先頭から読み直します: {self.file_path}")
+                reset = True
+                self.format = sniff_csv(self.file_path)
+                header = self._read_header(f) or header
+                signature = hashlib.sha1(header.strip()).hexdigest()
+            if self.header is None or reset:
+                self.header = header
+                self.signature = signature
+                self.mapping = self._mapping(signature)
+                self.offset = len(header)
+            f.seek(self.offset)
+            data = f.read()
+
+        end = self.format.last_line_end(data)
+        if end < 0:
+            return [], reset
+        chunk = data[:end]
+        with span('follow.parse'):
+            df = pd.read_csv(io.BytesIO(self.header + chunk), **self.format.read_options())
+            rows = self.analyzer.validate_and_transform_data(df, self.mapping) if len(df) else []
+        if rows is None:
+            raise ValueError("追記された行の変換に失敗しました")
+        self.offset += len(chunk)
+        return rows, reset
+
+    def _read_header(self, f):
+        """先頭から改行までのバイト列（改行がまだ書かれていなければNone）"""
+        f.seek(0)
+        data = b''
+        while True:
+            block = f.read(65536)
+            if not block:
+                return None
+            data += block
+            end = self.format.line_end(data)
+            if end >= 0:
+                return data[:end]
+
+    def _mapping(self, signature):
+        """ヘッダーのマッピング（同じヘッダーなら問い合わせ済みの結果を使う）"""
+        if signature not in self._mappings:
+            mapping = self.analyzer.analyze_csv_structure(self.file_path, self.format)
+            if not mapping:
+                raise ValueError("CSVの構造解析に失敗しました")
+            self._mappings[signature] = mapping
+        return self._mappings[signature]
@@ -0,0 +1,186 @@
+import codecs
+import csv
+import io
+import os
+import unicodedata
+from itertools import islice
+
+SAMPLE_BYTES = 64 * 1024  # 判定に使う先頭のバイト数
+PROBE_BYTES = 16 * 1024  # 先頭がASCIIだけだった場合に追加で見る範囲のバイト数
+PROBE_COUNT = 4  # 追加で見る範囲の数（ファイル全体に等間隔に置く）
+SAMPLE_ROWS = 200  # 区切り文字の判定に使う行数
+
+# BOM -> (pandasに渡すエンコーディング, 本文のコーデック)
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig', 'utf-8'),
+        (codecs.BOM_UTF16_LE, 'utf-16', 'utf-16-le'),
+        (codecs.BOM_UTF16_BE, 'utf-16', 'utf-16-be'))
+# BOMのない場合に試すエンコーディング（UTF-8として正しく読めればUTF-8とみなす）
+ENCODINGS = ('utf-8', 'cp932', 'euc_jp')
+DELIMITERS = (',', '\t', ';', '|')
+QUOTECHARS = ('"', "'")
+
+
+class CSVFormat:
+    """CSVファイルの形式（エンコーディング・BOM・区切り文字・引用符）
+
+    sniff_csv で一度だけ判定し、ヘッダーの解析・本体の読み込み・追従のすべての読み込みに同じものを渡す。
+    """
+    __slots__ = ('encoding', 'codec', 'bom', 'delimiter', 'quotechar')
+
+    def __init__(self, encoding='utf-8', delimiter=',', quotechar='"', bom=b'', codec=None):
+        self.encoding = encoding  # pandasに渡すエンコーディング（BOMがあればBOMを読み飛ばすもの）
+        self.codec = codec or encoding  # BOMを除いた本文のコーデック
+        self.bom = bom
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+
+    def __repr__(self):
+        return (f"CSVFormat(encoding={self.encoding!r}, delimiter={self.delimiter!r}, "
+                f"quotechar={self.quotechar!r}, bom={self.bom!r})")
+
+    def read_options(self):
+        """pd.read_csv に渡す引数
+
+        判定は先頭の一部だけで行うため、後ろの行に変換できないバイトがあっても読み込みを止めずに置き換える。
+        """
+        return {'encoding': self.encoding, 'sep': self.delimiter, 'quotechar': self.quotechar,
+                'encoding_errors': 'replace'}
+
+    @property
+    def newline(self):
+        """改行のバイト列"""
+        return '\n'.encode(self.codec)
+
+    def line_end(self, data, start=0):
+        """data[start:] の最初の改行の直後の位置（改行がなければ -1）"""
+        newline = self.newline
+        position = data.find(newline, start)
+        # UTF-16では文字の境界にある改行だけを数える
+        while position >= 0 and (position - len(self.bom)) % len(newline):
+            position = data.find(newline, position + 1)
+        return position if position < 0 else position + len(newline)
+
+    def last_line_end(self, data):
+        """data の最後の改行の直後の位置（改行がなければ -1）"""
+        newline = self.newline
+        position = data.rfind(newline)
+        while position >= 0 and (position - len(self.bom)) % len(newline):
+            position = data.rfind(newline, 0, position + len(newline) - 1)
+        return position if position < 0 else position + len(newline)
+
+
+def sniff_csv(source, sample_size=SAMPLE_BYTES):
+    """ファイル（またはバイト列）の先頭の一部だけを読んでCSVの形式を判定
+
+    ファイル全体を読み直して試すことはしない。先頭がASCIIだけの大きなファイルは、
+    日本語の行が後ろにある場合に備えてファイルの途中の数か所も少しずつ見る。
+    """
+    if isinstance(source, (bytes, bytearray)):
+        sample = bytes(source[:sample_size])
+        probes = []
+        truncated = len(source) > sample_size
+    else:
+        with open(source, 'rb') as f:
+            sample = f.read(sample_size)
+            size = os.fstat(f.fileno()).st_size
+            truncated = size > len(sample)
+            probes = _read_probes(f, size) if truncated and sample.isascii() else []
+
+    encoding, codec, bom = detect_encoding(sample, probes)
+    text = codecs.getincrementaldecoder(codec)(errors='replace').decode(sample[len(bom):], final=not truncated)
+    delimiter, quotechar = detect_dialect(text, truncated)
+    return CSVFormat(encoding, delimiter, quotechar, bom, codec)
+
+
+def _read_probes(f, size):
+    """ファイルの途中の数か所から、改行の直後から始まるバイト列を読む"""
+    probes = []
+    for i in range(1, PROBE_COUNT + 1):
+        f.seek(size * i // (PROBE_COUNT + 1))
+        data = f.read(PROBE_BYTES)
+        start = data.find(b'\n')
+        if start >= 0:
+            probes.append(data[start + 1:])
+    return probes
+
+
+def detect_encoding(sample, probes=()):
+    """(pandasに渡すエンコーディング, 本文のコーデック, BOM) を判定"""
+    for bom, encoding, codec in BOMS:
+        if sample.startswith(bom):
+            return encoding, codec, bom
+    chunks = [sample, *probes]
+    decoded = {}
+    for encoding in ENCODINGS:
+        text = _decode_all(chunks, encoding)
+        if text is None:
+            continue
+        if encoding == 'utf-8':
+            return 'utf-8', 'utf-8', b''
+        decoded[encoding] = text
+    if not decoded:
+        return 'cp932', 'cp932', b''  # どれでも読めなければ（置き換えながら）Shift_JISとして読む
+    # Shift_JISとEUC-JPの両方で読める場合は、日本語として自然な文字の多いほう
+    encoding = max(decoded, key=lambda name: _japanese_score(decoded[name]))
+    return encoding, encoding, b''
+
+
+def _decode_all(chunks, encoding):
+    """すべてのバイト列を読めれば結合した文字列（末尾の書きかけの文字は無視）、読めなければNone"""
+    try:
+        return ''.join(codecs.getincrementaldecoder(encoding)().decode(chunk, final=False) for chunk in chunks)
+    except UnicodeDecodeError:
+        return None
+
+
+def _japanese_score(text):
+    """ひらがな・全角カタカナ・漢字の数から半角カタカナと制御文字の数を引いた値"""
+    score = 0
+    for char in text:
+        if 'ぁ' <= char <= 'ヿ' or '一' <= char <= '鿿':
+            score += 1
+        elif '｡' <= char <= 'ﾟ' or (char not in '\r\n\t' and unicodedata.category(char) == 'Cc'):
+            score -= 1
+    return score
+
+
+def detect_dialect(text, truncated=False):
+    """(区切り文字, 引用符) を判定
+
+    候補の区切り文字ごとに先頭の行をCSVとして読み、ヘッダーと同じ列数の行が最も多い
+    （同数なら列数の多い）ものを選ぶ。引用符は列の値を囲んでいる数の多いほう。
+    """
+    best = None
+    for delimiter in DELIMITERS:
+        quotechar = _detect_quotechar(text, delimiter)
+        counts = _field_counts(text, delimiter, quotechar, truncated)
+        if not counts or counts[0] < 2:
+            continue
+        consistent = sum(1 for count in counts if count == counts[0]) / len(counts)
+        score = (consistent, counts[0])
+        if best is None or score > best[0]:
+            best = (score, delimiter, quotechar)
+    if best is None:
+        return ',', '"'
+    return best[1], best[2]
+
+
+def _field_counts(text, delimiter, quotechar, truncated):
+    try:
+        rows = list(islice(csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar),
+                           SAMPLE_ROWS + 1))
+    except csv.Error:
+        return []
+    if truncated and len(rows) > 1:
+        rows.pop()  # 途中で切れた最後の行
+    return [len(row) for row in rows[:SAMPLE_ROWS] if row]
+
+
+def _detect_quotechar(text, delimiter):
+    counts = dict.fromkeys(QUOTECHARS, 0)
+    for line in islice(io.StringIO(text), SAMPLE_ROWS):
+        for field in line.rstrip('\r\n').split(delimiter):
+            field = field.strip()
+            if len(field) >= 2 and field[0] == field[-1] and field[0] in counts:
+                counts[field[0]] += 1
+    return "'" if counts["'"] > counts['"'] else '"'
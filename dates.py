@@ -0,0 +1,101 @@
+"""日付の共通表現
+
+アプリ内部では日付を「日の序数」（date.toordinal() の整数）で扱う。
+文字列やTimestampから序数への変換は入力の境界で一度だけ行い、同じ文字列の再解析はキャッシュで省く。
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+MISSING = 0  # 序数は1以上なので0を欠損値として使う
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+@lru_cache(maxsize=65536)
+def _parse_string(value):
+    """日付文字列を序数に変換（解析できなければNone）"""
+    value = value.strip()
+    if not value:
+        return None
+    if _ISO_DATE.match(value):
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            pass
+    try:
+        return parser.parse(value).date().toordinal()
+    except (ValueError, OverflowError):
+        return None
+
+
+def to_ordinal(value):
+    """日付を表す値（文字列・date・datetime・Timestamp・序数）を序数に変換"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return _parse_string(value)
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value) if value > MISSING else None
+    if isinstance(value, datetime):
+        # Timestamp もここで処理される（NaT を除く）
+        return None if pd.isna(value) else value.toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if pd.isna(value):
+        return None
+    return _parse_string(str(value))
+
+
+@lru_cache(maxsize=65536)
+def to_iso(ordinal):
+    """序数をISO形式の日付文字列に変換"""
+    return date.fromordinal(ordinal).isoformat()
+
+
+def normalize(value):
+    """日付を表す値をISO形式の日付文字列にそろえる（解析できなければNone）"""
+    ordinal = to_ordinal(value)
+    return to_iso(ordinal) if ordinal is not None else None
+
+
+def today():
+    return date.today().toordinal()
+
+
+def task_start(task):
+    """タスクの開始日の序数（旧形式の 'start' キーにも対応）"""
+    return to_ordinal(task.get('start_date', task.get('start')))
+
+
+def task_end(task):
+    """タスクの終了日の序数（旧形式の 'end' キーにも対応）"""
+    return to_ordinal(task.get('end_date', task.get('end')))
+
+
+def column_to_ordinals(values):
+    """列全体を序数の配列に変換（欠損・解析不能はMISSING）
+
+    日付の列は重複が多いため、ユニークな値だけを解析して配列に展開する。
+    """
+    series = pd.Series(values, copy=False)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        days = series.to_numpy(dtype='datetime64[D]')
+        ordinals = days.astype(np.int64) + EPOCH_ORDINAL
+        ordinals[np.isnat(days)] = MISSING
+        return ordinals
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = np.array([to_ordinal(value) or MISSING for value in uniques] + [MISSING], dtype=np.int64)
+    # 欠損値のコード(-1)は末尾のMISSINGを指す
+    return parsed[codes]
+
+
+def ordinals_to_iso(ordinals):
+    """序数の配列をISO形式の日付文字列のリストに変換（MISSINGはNone）"""
+    return [to_iso(int(ordinal)) if ordinal != MISSING else None for ordinal in ordinals]
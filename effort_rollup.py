@@ -0,0 +1,112 @@
+import dates
+
+
+def _present(value):
+    return value is not None and value == value and value != ''
+
+
+class TicketSummary:
+    """1チケット分の工数集計"""
+    __slots__ = ('key', 'name', 'start', 'end', 'hours', 'entry_count', 'progress', 'rows', 'parent', 'source_key')
+
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+        self.start = None  # 最初の作業日（序数）
+        self.end = None  # 最後の作業日（序数）
+        self.hours = 0.0
+        self.entry_count = 0
+        self.progress = 0
+        self.rows = []  # 明細の行番号（EffortRollup.entries の位置）
+        self.parent = None  # 親タスクのキー（最初に指定のあった明細から）
+        self.source_key = None  # キー列の値（最初に指定のあった明細から）
+
+    def add(self, row, start, end, hours, progress):
+        self.rows.append(row)
+        self.entry_count += 1
+        self.hours += hours
+        if start is not None and (self.start is None or start < self.start):
+            self.start = start
+        if end is not None and (self.end is None or end > self.end):
+            self.end = end
+        if progress > self.progress:
+            self.progress = progress
+
+    def to_task(self):
+        """TaskAgentに渡せる形式（validate_and_transform_data の出力と同じ形）"""
+        task = {
+            'name': self.name,
+            'start_date': dates.to_iso(self.start),
+            'end_date': dates.to_iso(self.end),
+            'progress': self.progress,
+            'duration': self.hours,
+            'ticket': self.key,
+            'entry_count': self.entry_count
+        }
+        if self.source_key is not None:
+            task['key'] = self.source_key
+        if self.parent is not None:
+            task['parent'] = self.parent
+        return task
+
+
+class EffortRollup:
+    """時間記録の明細をチケットごとに集計（期間・合計時間・件数）
+
+    明細は追加のたびに1回の走査で集計に反映し、明細そのものは行番号だけを保持して
+    チケットごとの内訳を必要なときに取り出せるようにする。
+    """
+    def __init__(self, key_field='ticket'):
+        self.key_field = key_field
+        self.entries = []
+        self.summaries = {}
+
+    def _key(self, entry):
+        key = entry.get(self.key_field)
+        if not _present(key):
+            # チケットのない明細はタスク名でまとめる
+            return entry.get('name')
+        return key
+
+    def add_entries(self, entries):
+        """明細を追加し、変更のあったチケットのキーを返す"""
+        changed = {}  # 順序付きの集合として使う
+        summaries = self.summaries
+        for entry in entries:
+            key = self._key(entry)
+            summary = summaries.get(key)
+            if summary is None:
+                summary = summaries[key] = TicketSummary(key, self._name(key, entry))
+            changed[key] = True
+            start = dates.to_ordinal(entry.get('start_date'))
+            end = dates.to_ordinal(entry.get('end_date')) or start
+            hours = entry.get('duration') or 0
+            summary.add(len(self.entries), start, end, 0 if hours != hours else hours,
+                        entry.get('progress') or 0)
+            # 親とキー列の値はチケットの属性なので最初に指定のあった明細のものを使う
+            if summary.parent is None and _present(entry.get('parent')):
+                summary.parent = entry['parent']
+            if summary.source_key is None and _present(entry.get('key')):
+                summary.source_key = entry['key']
+            self.entries.append(entry)
+        return list(changed)
+
+    def _name(self, key, entry):
+        name = entry.get('name')
+        if key == name or name is None:
+            return str(key)
+        return f"{key} {name}"
+
+    def to_tasks(self, keys=None):
+        """集計結果をタスクのリストに変換（keysを指定するとそのチケットだけ）"""
+        if keys is None:
+            keys = self.summaries.keys()
+        return [self.summaries[key].to_task() for key in keys
+                if self.summaries[key].start is not None]
+
+    def ticket_entries(self, key):
+        """チケットの明細（ドリルダウン用）"""
+        summary = self.summaries.get(key)
+        if summary is None:
+            return []
+        return [self.entries[row] for row in summary.rows]
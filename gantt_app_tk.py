@@ -1,31 +1,47 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import pandas as pd
 import logging
-import sys
-import re
+import os
+import queue
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from tkcalendar import DateEntry
 from csv_analyzer_ai import GeminiCSVAnalyzer
 from agents import TaskAgent, ChartAgent, DialogueAgent
-from dateutil import parser
+from gantt_layout import GanttLayout
+from timeline import TimelineSummary, bucket_start, bucket_end
+from effort_rollup import EffortRollup
+from load_analysis import LoadAnalyzer
+from task_history import TaskHistory
+from import_pipeline import CSVImportPipeline
+from project_service import ProjectClient, apply_change
+from name_index import TrigramIndex
+from csv_follower import CSVFollower
+from task_merge import KeyAssigner, merge_tasks, task_id
+from wbs import WBSTree, is_structural_change
+from spatial_index import GridIndex
+from progress_series import ProgressLog
+from chart_export import ChartModel, export_chart
+from tracing import tracer, span, traced
+from llm_meter import meter
+from log_config import setup_logging
+import dates
 
 # ロギングの設定
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('gantt_app.log', encoding='utf-8')
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# エージェントのリクエスト履歴の保存先
+HISTORY_DIR = os.getenv('GANTT_HISTORY_DIR', '.gantt_history')
+
+# CSV追従時の確認間隔（ミリ秒）
+FOLLOW_INTERVAL_MS = int(os.getenv('GANTT_FOLLOW_INTERVAL', '2000'))
+
 class GanttCanvas(tk.Canvas):
     def __init__(self, master, tasks=None, **kwargs):
         super().__init__(master, **kwargs)
         self.tasks = tasks or []
+        self.collapsed = set()  # 折りたたんだ親タスクのID
         self.cell_width = 30
         self.row_height = 30
         self.header_height = 50
@@ -35,24 +51,36 @@ class GanttCanvas(tk.Canvas):
     def on_resize(self, event):
         self.redraw()
     
+    @traced('canvas.redraw')
     def redraw(self):
         self.delete('all')
         if not self.tasks:
             return
         
-        # 日付の範囲を計算
-        start_date = min(datetime.datetime.strptime(task['start'], '%Y-%m-%d') for task in self.tasks)
-        end_date = max(datetime.datetime.strptime(task['end'], '%Y-%m-%d') for task in self.tasks)
-        days = (end_date - start_date).days + 1
+        # 表示する行（折りたたんだ部分木は親の1行）と日付の範囲を計算（日付は序数で扱う）
+        tree = WBSTree()
+        tree.build(self.tasks)
+        by_id = {task['id']: task for task in self.tasks}
+        rows = [by_id[task_id] for task_id in tree.visible_rows(self.collapsed)]
+        spans = []  # (開始日, 終了日, 進捗率, 字下げ) 親タスクは子孫の集計
+        for task in rows:
+            summary = tree.summaries[task['id']]
+            progress = round(summary.progress) if tree.has_children(task['id']) else task['progress']
+            spans.append((summary.start, summary.end, progress, tree.depth(task['id']) * 15))
+        start_date, end_date = tree.project_range()
+        if start_date is None:
+            # 日付のあるタスクがなければ今日の1日分の軸にする
+            start_date = end_date = date.today().toordinal()
+        days = end_date - start_date + 1
         
-        # キャンバスのサイズを設定
+        # キャンバスのサイズを設定（行数は表示中の行数）
         total_width = self.task_width + (days * self.cell_width)
-        total_height = self.header_height + (len(self.tasks) * self.row_height)
+        total_height = self.header_height + (len(rows) * self.row_height)
         self.configure(scrollregion=(0, 0, total_width, total_height))
         
         # 日付ヘッダーを描画
-        current_date = start_date
         for i in range(days):
+            current_date = date.fromordinal(start_date + i)
             x = self.task_width + (i * self.cell_width)
             # 日付
             self.create_text(x + self.cell_width/2, 15,
@@ -63,22 +91,21 @@ class GanttCanvas(tk.Canvas):
                 self.create_text(x + self.cell_width/2, 35,
                                text=current_date.strftime('%Y-%m'),
                                anchor='center')
-            current_date += datetime.timedelta(days=1)
         
         # グリッドと各タスクを描画
-        for i, task in enumerate(self.tasks):
+        for i, (task, (task_start, task_end, progress, indent)) in enumerate(zip(rows, spans)):
             y = self.header_height + (i * self.row_height)
             
             # タスク名を描画
-            self.create_text(5, y + self.row_height/2,
+            self.create_text(5 + indent, y + self.row_height/2,
                            text=task['name'],
                            anchor='w')
+            if task_start is None:
+                continue
             
             # タスクバーを描画
-            task_start = datetime.datetime.strptime(task['start'], '%Y-%m-%d')
-            task_end = datetime.datetime.strptime(task['end'], '%Y-%m-%d')
-            start_x = self.task_width + ((task_start - start_date).days * self.cell_width)
-            end_x = self.task_width + ((task_end - start_date).days * self.cell_width) + self.cell_width
+            start_x = self.task_width + ((task_start - start_date) * self.cell_width)
+            end_x = self.task_width + ((task_end - start_date) * self.cell_width) + self.cell_width
             
             # 進捗バーの背景
             self.create_rectangle(start_x, y + 5,
@@ -86,7 +113,7 @@ class GanttCanvas(tk.Canvas):
                                 fill='lightgray')
             
             # 進捗バー
-            progress_width = (end_x - start_x) * (task['progress'] / 100)
+            progress_width = (end_x - start_x) * (progress / 100)
             if progress_width > 0:
                 self.create_rectangle(start_x, y + 5,
                                     start_x + progress_width, y + self.row_height - 5,
@@ -94,7 +121,7 @@ class GanttCanvas(tk.Canvas):
             
             # 進捗率を表示
             self.create_text(start_x + (end_x - start_x)/2, y + self.row_height/2,
-                           text=f"{task['progress']}%",
+                           text=f"{progress}%",
                            anchor='center')
         
         # グリッド線を描画
@@ -130,15 +157,17 @@ class TaskEditor(tk.Toplevel):
         tk.Label(self, text="開始日:").grid(row=1, column=0, padx=5, pady=5)
         self.start_date = DateEntry(self, width=20, date_pattern='yyyy-mm-dd')
         self.start_date.grid(row=1, column=1, padx=5, pady=5)
-        if 'start' in self.task:
-            self.start_date.set_date(self.task['start'])
+        task_start = dates.task_start(self.task)
+        if task_start is not None:
+            self.start_date.set_date(date.fromordinal(task_start))
         
         # 終了日
         tk.Label(self, text="終了日:").grid(row=2, column=0, padx=5, pady=5)
         self.end_date = DateEntry(self, width=20, date_pattern='yyyy-mm-dd') # Changed to DateEntry
         self.end_date.grid(row=2, column=1, padx=5, pady=5)
-        if 'end' in self.task:
-            self.end_date.set_date(self.task['end'])
+        task_end = dates.task_end(self.task)
+        if task_end is not None:
+            self.end_date.set_date(date.fromordinal(task_end))
         
         # 進捗
         tk.Label(self, text="進捗 (%):").grid(row=3, column=0, padx=5, pady=5)
@@ -161,8 +190,8 @@ class TaskEditor(tk.Toplevel):
             
             self.result = {
                 'name': self.name_entry.get(),
-                'start': self.start_date.get_date().strftime('%Y-%m-%d'),
-                'end': self.end_date.get_date().strftime('%Y-%m-%d'),
+                'start_date': dates.to_iso(self.start_date.get_date().toordinal()),
+                'end_date': dates.to_iso(self.end_date.get_date().toordinal()),
                 'progress': progress
             }
             self.destroy()
@@ -178,14 +207,38 @@ class GanttChart(ttk.Frame):
         self.csv_analyzer = GeminiCSVAnalyzer()
         self.logger = logging.getLogger(__name__)
         self.tasks = []
+        self.history = TaskHistory()  # 取り消し・やり直し履歴
+        self.row_index = {}  # タスクID -> 描画中の行番号（表示中の行のみ）
+        self.positions = {}  # タスクID -> self.tasks での位置
+        self.wbs = WBSTree()  # 親子関係と親タスクの期間・進捗率の集計
+        self.collapsed = set()  # 折りたたんだ親タスクのID
+        self.hit_index = GridIndex()  # 描画中のバー・矢印の位置（ホバー・ドラッグの判定用）
+        self.hover = None  # ツールチップを表示中の (タスクID, 種類)
+        self.drag = None  # ドラッグ中のバーの状態
+        self.name_index = TrigramIndex()  # 対話コマンドのタスク名解決用（変更のあったタスクだけ更新）
+        self.project_start = None  # 描画中のプロジェクト開始日（序数）
+        self.project_end = None
+        self.follower = None  # 追従中のCSV
+        self.follow_keys = None  # 追従中のCSVの行に割り当てたキー
+        self.layout = GanttLayout()
+        self.timeline = TimelineSummary()  # 週・月表示用の集計
+        self.effort_rollup = None  # 時間記録CSVのチケット別集計
+        self.load_analyzer = LoadAnalyzer(weight='count')  # 日ごとの同時実行数
+        self.progress_log = self.load_progress_log()  # 進捗率・状態の変化の履歴（バーンダウン用）
         
         # エージェントの初期化
         self.task_agent = TaskAgent()
         self.chart_agent = ChartAgent()
         self.dialogue_agent = DialogueAgent()
+        self.load_agent_history()
+        self.display_settings = self.chart_agent.current_settings['display']
         
         # UIの初期化
         self.setup_ui()
+
+        # 共有サービスに接続（GANTT_SERVICE=host:port またはUnixソケットのパス）
+        self.service = None
+        self.connect_service(os.getenv('GANTT_SERVICE'))
     
     def setup_ui(self):
         """UIコンポーネントの初期化と配置"""
@@ -197,9 +250,43 @@ class GanttChart(ttk.Frame):
         import_btn = ttk.Button(toolbar, text="CSVインポート", command=self.import_csv)
         import_btn.pack(side=tk.LEFT, padx=5)
 
+        # 追記され続けるCSVの追従ボタン
+        self.follow_btn = ttk.Button(toolbar, text="CSV追従", command=self.follow_csv)
+        self.follow_btn.pack(side=tk.LEFT, padx=5)
+
+        # 取り消し・やり直しボタン（Ctrl+Z / Ctrl+Y）
+        ttk.Button(toolbar, text="元に戻す", command=self.undo).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="やり直し", command=self.redo).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="バーンダウン", command=self.show_burndown).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="画像に出力", command=self.export_chart_file).pack(side=tk.LEFT, padx=5)
+        self.winfo_toplevel().bind('<Control-z>', self.on_undo_key)
+        self.winfo_toplevel().bind('<Control-y>', self.on_redo_key)
+
+        # 計測結果の書き出しボタン（計測有効時のみ）
+        if tracer.enabled:
+            trace_btn = ttk.Button(toolbar, text="計測結果を保存", command=self.export_trace)
+            trace_btn.pack(side=tk.LEFT, padx=5)
+
+        # 表示モード（日/週/月）
+        ttk.Label(toolbar, text="表示:").pack(side=tk.LEFT, padx=(15, 2))
+        self.view_modes = {'日': 'days', '週': 'weeks', '月': 'months'}
+        self.view_mode_var = tk.StringVar(value='日')
+        view_mode_box = ttk.Combobox(toolbar, textvariable=self.view_mode_var, width=4,
+                                     values=list(self.view_modes), state='readonly')
+        view_mode_box.bind('<<ComboboxSelected>>', self.on_view_mode_change)
+        view_mode_box.pack(side=tk.LEFT)
+
         # キャンバス（ガントチャート表示用）を GanttCanvas に変更
         self.canvas = GanttCanvas(self, bg='white')
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.canvas.tag_bind('task_name', '<Double-Button-1>', self.on_task_name_double_click)
+        self.canvas.tag_bind('toggle', '<Button-1>', self.on_toggle_click)
+        # バーのホバーでツールチップ、ドラッグで移動（右端をつかむと期間の変更）
+        self.canvas.bind('<Motion>', self.on_canvas_motion)
+        self.canvas.bind('<Leave>', lambda event: self.hide_tooltip())
+        self.canvas.bind('<ButtonPress-1>', self.on_canvas_press, add='+')
+        self.canvas.bind('<B1-Motion>', self.on_canvas_drag)
+        self.canvas.bind('<ButtonRelease-1>', self.on_canvas_release)
 
         # テキスト入力エリア
         self.text_input = scrolledtext.ScrolledText(self, height=4)
@@ -209,16 +296,46 @@ class GanttChart(ttk.Frame):
         command_btn = ttk.Button(self, text="コマンド実行", command=self.process_dialogue)
         command_btn.pack(pady=5)
     
-    def convert_to_task_schema(self, raw_task):
-        """CSVから読み込んだタスクデータをスキーマ形式に変換"""
+    def load_agent_history(self):
+        """前回セッションのリクエスト履歴を読み込み"""
+        for agent in (self.task_agent, self.chart_agent):
+            agent.load_request_history(os.path.join(HISTORY_DIR, f"{agent.name}.json"))
+
+    def save_agent_history(self):
+        """リクエスト履歴を次回セッション用に保存"""
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        for agent in (self.task_agent, self.chart_agent):
+            agent.save_request_history(os.path.join(HISTORY_DIR, f"{agent.name}.json"))
+
+    def load_progress_log(self):
+        """前回セッションまでの進捗の履歴を読み込み"""
+        path = os.path.join(HISTORY_DIR, 'progress.npz')
+        if os.path.exists(path):
+            try:
+                return ProgressLog.load(path)
+            except Exception as e:
+                self.logger.error(f"進捗の履歴の読み込みに失敗: {str(e)}")
+        return ProgressLog()
+
+    def save_progress_log(self):
+        """進捗の履歴を次回セッション用に保存"""
+        try:
+            os.makedirs(HISTORY_DIR, exist_ok=True)
+            self.progress_log.save(os.path.join(HISTORY_DIR, 'progress.npz'))
+        except Exception as e:
+            self.logger.error(f"進捗の履歴の保存に失敗: {str(e)}")
+
+    def convert_to_task_schema(self, raw_task, key=None):
+        """CSVから読み込んだタスクデータをスキーマ形式に変換（keyを指定するとIDはキーから決まる）"""
         return {
-            'id': str(uuid.uuid4()),
+            'id': task_id(key) if key is not None else str(uuid.uuid4()),
             'name': raw_task['name'],
-            'start_date': raw_task['start_date'].isoformat(),
-            'end_date': raw_task['end_date'].isoformat(),
+            'start_date': dates.normalize(raw_task['start_date']),
+            'end_date': dates.normalize(raw_task['end_date']),
             'progress': raw_task.get('progress', 0),
             'status': 'created',
             'dependencies': [],
+            'parent': task_id(raw_task['parent']) if raw_task.get('parent') is not None else None,
             'metadata': {
                 'created_at': datetime.now().isoformat(),
                 'updated_at': datetime.now().isoformat(),
@@ -227,82 +344,580 @@ class GanttChart(ttk.Frame):
             }
         }
 
+    @traced('canvas.update_gantt_chart')
     def update_gantt_chart(self):
         """ガントチャートを更新"""
+        # 親子関係と親タスクの集計は1回だけ求める
+        self.wbs.build(self.tasks)
+        self.positions = {task['id']: i for i, task in enumerate(self.tasks)}
+        self.redraw_rows()
+
+    def redraw_rows(self):
+        """表示中の行をすべて描き直す（折りたたんだ部分木は親の1行だけ描くので、行数は表示中の行数）"""
         self.canvas.delete('all')
+        self.hit_index.clear()
+        self.hover = None
         
         if not self.tasks:
             return
 
-        for i, task in enumerate(self.tasks):
-            y = i * 30 + 10
-            
-            # タスク名と状態の表示
-            status_colors = {
-                'created': 'gray',
-                'in_progress': 'blue',
-                'completed': 'green'
-            }
-            
-            # タスク名
-            self.canvas.create_text(10, y, text=task['name'], anchor='w')
-            
-            # タスクバー
-            start_date = pd.to_datetime(task['start_date'])
-            end_date = pd.to_datetime(task['end_date'])
-            
-            x1 = self.date_to_x(start_date)
-            x2 = self.date_to_x(end_date)
-            
-            # 進捗バーの描画
-            bar_height = 20
-            self.canvas.create_rectangle(x1, y - bar_height/2, x2, y + bar_height/2,
-                                      fill=status_colors[task['status']],
-                                      outline='darkgray')
-            
-            # 進捗率の表示
-            if task['progress'] > 0:
-                progress_x = x1 + (x2 - x1) * task['progress'] / 100
-                self.canvas.create_rectangle(x1, y - bar_height/2, progress_x, y + bar_height/2,
-                                          fill='lightgreen', outline='darkgreen')
-            
-            # 依存関係の矢印を描画
-            for dep_id in task['dependencies']:
-                dep_task = next((t for t in self.tasks if t['id'] == dep_id), None)
-                if dep_task:
-                    dep_index = self.tasks.index(dep_task)
-                    dep_y = dep_index * 30 + 10
-                    self.canvas.create_line(x1, y, x2, dep_y,
-                                          arrow=tk.LAST, dash=(4, 2))
+        # プロジェクトの期間と各タスクの行番号は1回だけ求める
+        self.project_start, self.project_end = self.wbs.project_range()
+        rows = self.wbs.visible_rows(self.collapsed)
+        self.row_index = {task_id: i for i, task_id in enumerate(rows)}
+
+        for i, task_id in enumerate(rows):
+            self.draw_task_row(self.tasks[self.positions[task_id]], i)
         
+        self.draw_footer()
+
+    def draw_footer(self, sync=True):
+        """日付軸と負荷のヒストグラムを描画（行の下に置く要素には footer タグを付ける）
+
+        sync=False は負荷の集計を呼び出し側で差分更新済みの場合。
+        """
+        self.canvas.delete('footer')
+        if self.project_start is None:
+            return  # 日付のあるタスクがない
         self.draw_date_axis()
+        if self.display_settings.get('show_load', True):
+            self.draw_load_strip(self.project_start, self.layout.axis_y(len(self.row_index)) + 60, sync=sync)
+
+    def leaf_tasks(self):
+        """子を持たないタスク（負荷・週月表示の集計に使う。親タスクは子孫と二重に数えない）"""
+        has_children = self.wbs.has_children
+        return (task for task in self.tasks if not has_children(task['id']))
+
+    def draw_task_row(self, task, i):
+        """1タスク分の行を描画（すべての要素に task:<ID> タグを付ける）"""
+        y = i * 30 + 10
+        tag = f"task:{task['id']}"
+        indent = self.wbs.depth(task['id']) * 15
+        self.hit_index.remove(task['id'])
+        if self.wbs.has_children(task['id']):
+            self.draw_summary_row(task, y, indent, tag)
+            return
+        
+        # タスク名と状態の表示
+        status_colors = {
+            'created': 'gray',
+            'in_progress': 'blue',
+            'completed': 'green'
+        }
+        
+        # タスク名（ダブルクリックで明細を表示）
+        self.canvas.create_text(10 + indent, y, text=task['name'], anchor='w', tags=('task_name', tag))
+        
+        # タスクバー（終了日を含むので終了日のセルの右端まで。日付を解釈できないタスクは名前だけ）
+        start, end = dates.task_start(task), dates.task_end(task)
+        if start is None or end is None:
+            return
+        x1 = self.date_to_x(start, self.project_start)
+        x2 = self.date_to_x(end + 1, self.project_start)
+        
+        # 進捗バーの描画
+        bar_height = 20
+        self.canvas.create_rectangle(x1, y - bar_height/2, x2, y + bar_height/2,
+                                  fill=status_colors[task['status']],
+                                  outline='darkgray', tags=(tag,))
+        self.hit_index.add_rect(task['id'], x1, y - bar_height/2, x2, y + bar_height/2)
+        
+        # 進捗率の表示
+        if task['progress'] > 0:
+            progress_x = x1 + (x2 - x1) * task['progress'] / 100
+            self.canvas.create_rectangle(x1, y - bar_height/2, progress_x, y + bar_height/2,
+                                      fill='lightgreen', outline='darkgreen', tags=(tag,))
+        
+        # 依存関係の矢印を描画
+        for dep_id in task['dependencies']:
+            dep_index = self.row_index.get(dep_id)
+            if dep_index is not None:
+                dep_y = dep_index * 30 + 10
+                self.canvas.create_line(x1, y, x2, dep_y,
+                                      arrow=tk.LAST, dash=(4, 2), tags=(tag,))
+                self.hit_index.add_segment(task['id'], x1, y, x2, dep_y)
+
+    def draw_summary_row(self, task, y, indent, tag):
+        """親タスクの行を描画（子孫の期間と進捗率を集計した細いバー、▼/▶で折りたたみ）"""
+        summary = self.wbs.summaries[task['id']]
+        marker = '▶' if task['id'] in self.collapsed else '▼'
+        self.canvas.create_text(10 + indent, y, text=marker, anchor='w', tags=('toggle', tag))
+        self.canvas.create_text(24 + indent, y, text=task['name'], anchor='w', tags=('task_name', tag))
+        if summary.start is None:
+            return
+        x1 = self.date_to_x(summary.start, self.project_start)
+        x2 = self.date_to_x(summary.end + 1, self.project_start)
+        self.canvas.create_rectangle(x1, y - 5, x2, y + 5, fill='dimgray', outline='black', tags=(tag,))
+        self.hit_index.add_rect(task['id'], x1, y - 5, x2, y + 5, kind='summary')
+        if summary.progress > 0:
+            progress_x = x1 + (x2 - x1) * summary.progress / 100
+            self.canvas.create_rectangle(x1, y - 5, progress_x, y + 5,
+                                         fill='darkgreen', outline='black', tags=(tag,))
+        self.canvas.create_text(x2 + 5, y, text=f"{summary.progress:.0f}%", anchor='w', tags=(tag,))
+
+    def refresh_tasks(self, changed_ids, previous):
+        """変更のあったタスクの行だけを描き直す（previous: 変更前の TaskSnapshot）
+
+        末尾へのタスクの追加や日付・進捗の変更は、その行と集計の変わった祖先の行、日付軸・負荷だけを描画する。
+        行の削除・並べ替え・親の変更、プロジェクトの期間の先頭が変わる変更、日付を解釈できないタスクや
+        週・月表示では全体を再描画する。
+        タスク名のインデックスもここで変更のあったタスクだけ更新する。
+        """
+        current = self.history.current
+        self.name_index.apply_changes(current.tasks, changed_ids)
+        self.progress_log.record_changes(current.tasks, changed_ids)
+        old_count = len(previous.order)
+        if current.order is not previous.order and current.order[:old_count] != previous.order:
+            self.update_gantt_chart()
+            return
+        if (self.project_start is None or self.layout.view_mode != 'days'
+                or len(self.positions) != old_count):
+            self.update_gantt_chart()
+            return
+        dates_changed = len(current.order) > old_count
+        for task_id in changed_ids:
+            old, new = previous.tasks.get(task_id), current.tasks.get(task_id)
+            if is_structural_change(old, new):
+                self.update_gantt_chart()
+                return
+            start = dates.task_start(new)
+            # 日付のないタスクや期間の先頭より前に始まるタスクは全体を再描画
+            if start is None or dates.task_end(new) is None or start < self.project_start:
+                self.update_gantt_chart()
+                return
+            if old is None:
+                continue
+            old_start, old_end = dates.task_start(old), dates.task_end(old)
+            if old_start != start or old_end != dates.task_end(new):
+                # 期間の先頭・末尾だったタスクが縮んだ場合は期間を求め直す
+                if old_start == self.project_start or old_end == self.project_end:
+                    self.update_gantt_chart()
+                    return
+                dates_changed = True
+        with span('canvas.refresh_tasks'):
+            for i in range(old_count, len(current.order)):
+                task = self.tasks[i]
+                self.positions[task['id']] = i
+                self.row_index[task['id']] = len(self.row_index)
+                self.wbs.add_root(task)
+            redraw = {}  # 描き直すタスクのID（順序付きの集合として使う）
+            for task_id in changed_ids:
+                task = self.tasks[self.positions[task_id]]
+                redraw[task_id] = True
+                # 祖先の集計は祖先をたどって差分で更新する
+                redraw.update(dict.fromkeys(self.wbs.update(task), True))
+                if dates_changed and not self.wbs.has_children(task_id):
+                    self.project_end = max(self.project_end, dates.task_end(task))
+                    self.load_analyzer.update_task(task)
+            for task_id in redraw:
+                i = self.row_index.get(task_id)
+                if i is None:
+                    continue  # 折りたたんだ部分木の中
+                if task_id in previous.tasks:
+                    self.canvas.delete(f"task:{task_id}")
+                self.draw_task_row(self.tasks[self.positions[task_id]], i)
+            if dates_changed:
+                self.draw_footer(sync=False)
+
+    def apply_task_changes(self, updated=(), appended=(), label=''):
+        """一部のタスクの差し替えと末尾への追加を反映（タスク全体を走査しない）
+
+        appended のうち既に存在するIDのタスクは差し替えとして扱う。
+        """
+        previous = self.history.current
+        changed = self.history.commit_changes(updated, appended, label)
+        if not changed:
+            return
+        for task in list(updated) + list(appended):
+            i = self.positions.get(task['id'])
+            if i is None:
+                self.tasks.append(task)
+            else:
+                self.tasks[i] = task
+        self.refresh_tasks(changed, previous)
+
+    @traced('canvas.draw_load_strip')
+    def draw_load_strip(self, project_start, y, height=40, sync=True):
+        """日ごとの同時実行数をチャート下部にヒストグラムで描画（過負荷の日は赤）"""
+        self.load_analyzer.capacity = self.display_settings.get('load_capacity')
+        if sync:
+            self.load_analyzer.sync(self.leaf_tasks())
+        profile = self.load_analyzer.profile()
+        if not len(profile) or not profile.load.max():
+            return
+        overloaded = profile.overloaded
+        scale = height / profile.load.max()
+        self.canvas.create_text(10, y + height / 2, text=f"負荷（最大{profile.load.max():g}）", anchor='w',
+                                tags=('footer',))
+
+        if self.layout.view_mode == 'days':
+            cells = ((self.layout.date_to_x(profile.start + i, project_start), i, i + 1)
+                     for i in range(len(profile)))
+        else:
+            # 週・月表示ではセルごとの最大値を描画
+            cells = []
+            for x, _, key in self.layout.bucket_cells(project_start, profile.end):
+                first = max(profile.start, bucket_start(key, self.layout.view_mode))
+                last = min(profile.end + 1, bucket_end(key, self.layout.view_mode))
+                if first < last:
+                    cells.append((x, first - profile.start, last - profile.start))
+
+        for x1, begin, end in cells:
+            load = profile.load[begin:end].max()
+            if not load:
+                continue
+            x2 = x1 + self.layout.cell_width - 2
+            color = 'salmon' if overloaded[begin:end].any() else 'steelblue'
+            self.canvas.create_rectangle(x1, y + height - load * scale, x2, y + height,
+                                         fill=color, outline='', tags=('footer',))
+
+    def on_canvas_motion(self, event):
+        """ポインタの下のバー・矢印のツールチップを表示（空間インデックスで判定するのでタスク数によらない）"""
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        hit = self.hit_index.hit(x, y)
+        if hit == self.hover:
+            return
+        self.hide_tooltip()
+        if hit is not None:
+            self.show_tooltip(hit, x, y)
+
+    def tooltip_text(self, task_id, kind):
+        """ツールチップの文言"""
+        task = self.tasks[self.positions[task_id]]
+        if kind == 'summary':
+            summary = self.wbs.summaries[task_id]
+            return (f"{task['name']}\n{dates.to_iso(summary.start)} 〜 {dates.to_iso(summary.end)}\n"
+                    f"進捗 {summary.progress:.0f}%（{len(self.wbs.children[task_id])}件の子タスク）")
+        if kind == 'arrow':
+            names = [self.tasks[self.positions[dep_id]]['name'] for dep_id in task['dependencies']
+                     if dep_id in self.positions]
+            return f"{'・'.join(names)} → {task['name']}"
+        return f"{task['name']}\n{task['start_date']} 〜 {task['end_date']}\n進捗 {task['progress']}%"
+
+    def show_tooltip(self, hit, x, y):
+        self.hover = hit
+        text = self.canvas.create_text(x + 12, y + 12, text=self.tooltip_text(*hit), anchor='nw',
+                                       tags=('tooltip',))
+        bbox = self.canvas.bbox(text)
+        if bbox:
+            background = self.canvas.create_rectangle(bbox[0] - 3, bbox[1] - 2, bbox[2] + 3, bbox[3] + 2,
+                                                      fill='lightyellow', outline='gray', tags=('tooltip',))
+            self.canvas.tag_lower(background, text)
+
+    def hide_tooltip(self):
+        if self.hover is not None:
+            self.canvas.delete('tooltip')
+            self.hover = None
+
+    def on_canvas_press(self, event):
+        """バーのドラッグを開始（日表示のみ。バーの右端（終了日のセルの右端）から6ピクセル以内なら終了日の変更）"""
+        if self.layout.view_mode != 'days':
+            return
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        hit = self.hit_index.hit(x, y)
+        if hit is None or hit[1] != 'bar':
+            return
+        x1, y1, x2, y2 = self.hit_index.bounds(hit[0])
+        self.hide_tooltip()
+        self.drag = {
+            'task_id': hit[0],
+            # 短いバーでも左半分は移動に使えるようにする
+            'mode': 'resize' if x >= max(x2 - 6, (x1 + x2) / 2) else 'move',
+            'x': x,
+            'bounds': (x1, y1, x2, y2),
+            'days': 0,
+            'ghost': self.canvas.create_rectangle(x1, y1, x2, y2, outline='blue', dash=(2, 2), tags=('drag',))
+        }
+
+    def on_canvas_drag(self, event):
+        """ドラッグ中は枠だけを動かす（1回の更新は枠の座標の変更だけ）"""
+        drag = self.drag
+        if drag is None:
+            return
+        cell_width = self.layout.cell_width
+        days = round((self.canvas.canvasx(event.x) - drag['x']) / cell_width)
+        if drag['mode'] == 'resize':
+            x1, _, x2, _ = drag['bounds']
+            days = max(days, round((x1 - x2) / cell_width) + 1)  # 終了日は開始日より前にしない（最低1日）
+        if days == drag['days']:
+            return
+        drag['days'] = days
+        x1, y1, x2, y2 = drag['bounds']
+        if drag['mode'] == 'move':
+            x1 += days * cell_width
+        x2 += days * cell_width
+        self.canvas.coords(drag['ghost'], x1, y1, x2, y2)
+
+    def on_canvas_release(self, event):
+        """ドラッグを確定し、タスクの日程を変更"""
+        drag, self.drag = self.drag, None
+        if drag is None:
+            return
+        self.canvas.delete('drag')
+        if drag['days']:
+            self.shift_task_dates(drag['task_id'], drag['days'], resize=drag['mode'] == 'resize')
+
+    def shift_task_dates(self, task_id, days, resize=False):
+        """タスクの日程を日数でずらす（稼働日カレンダーに合わせる。resize=True なら終了日だけ）"""
+        try:
+            task = self.tasks[self.positions[task_id]]
+            start, end = dates.task_start(task), dates.task_end(task)
+            if start is None or end is None:
+                self.logger.error(f"日付のないタスクは移動できません: {task['name']}")
+                return
+            new_task = dict(task)
+            new_task['metadata'] = dict(task['metadata'], updated_at=datetime.now().isoformat())
+            if resize:
+                # 終了日は前の稼働日に合わせる（開始日より前にはしない）
+                calendar = self.task_agent.calendar
+                end = max(start, int(calendar.roll_backward(end + days)))
+                new_task['end_date'] = dates.to_iso(end)
+            else:
+                # 移動は稼働日数を保ち、開始日を稼働日に合わせる
+                self.task_agent.reschedule_task(new_task, start + days)
+            if self.service is not None:
+                self.service.mutate([{'type': 'update_tasks', 'tasks': [new_task]}])
+                return
+            self.apply_task_changes(updated=[new_task], label='期間の変更' if resize else '日程の変更')
+        except Exception as e:
+            self.logger.error(f"日程の変更中にエラー: {str(e)}")
+            messagebox.showerror("エラー", f"日程の変更に失敗しました: {str(e)}")
+
+    def on_toggle_click(self, event):
+        """▼/▶のクリックで親タスクの子を折りたたむ・展開する"""
+        for tag in self.canvas.gettags('current'):
+            if tag.startswith('task:'):
+                self.toggle_collapsed(tag[len('task:'):])
+                break
+
+    def toggle_collapsed(self, task_id):
+        """親タスクの折りたたみを切り替え（木は作り直さず、表示中の行だけを描き直す）"""
+        if not self.wbs.has_children(task_id):
+            return
+        if task_id in self.collapsed:
+            self.collapsed.discard(task_id)
+        else:
+            self.collapsed.add(task_id)
+        self.redraw_rows()
+
+    def on_task_name_double_click(self, event):
+        """タスク名のダブルクリックでチケットの明細を表示"""
+        for tag in self.canvas.gettags('current'):
+            if tag.startswith('task:'):
+                self.show_ticket_entries(tag[len('task:'):])
+                break
 
     def import_csv(self):
         """CSVファイルをインポート"""
         try:
             file_path = filedialog.askopenfilename(
-                filetypes=[("CSVファイル", "*.csv")]
+                filetypes=[("CSVファイル", "*.csv *.tsv *.txt")]
             )
             if file_path:
-                mapping = self.csv_analyzer.analyze_csv_structure(file_path)
-                if mapping:
-                    df = pd.read_csv(file_path)
-                    raw_tasks = self.csv_analyzer.validate_and_transform_data(df, mapping)
-                    if raw_tasks:
-                        # タスクデータをスキーマ形式に変換
-                        tasks = [self.convert_to_task_schema(task) for task in raw_tasks]
-                        # TaskAgentで処理
-                        processed_tasks = self.task_agent.process_tasks(tasks)
-                        self.set_tasks(processed_tasks)
-                        messagebox.showinfo("成功", "CSVファイルを正常にインポートしました")
-                    else:
-                        raise ValueError("タスクデータの変換に失敗しました")
+                # ヘッダー解析（Gemini）の応答待ちの間に読み込みと日付の変換を進める
+                self.effort_rollup = None
+                keys = KeyAssigner()
+                pipeline = CSVImportPipeline(self.csv_analyzer)
+                processed_tasks = pipeline.run(file_path, lambda batch: self.convert_import_batch(batch, keys),
+                                               rollup=self.rollup_entries)
+                if processed_tasks and self.service is not None:
+                    response = self.service.mutate([{'type': 'upsert_tasks', 'tasks': processed_tasks}])
+                    result = response['results'][0]
+                    if not result['ok']:
+                        raise ValueError(result['error'])
+                    messagebox.showinfo("成功", f"CSVファイルを正常にインポートしました（{result['message']}）")
+                elif processed_tasks:
+                    with span('import.merge'):
+                        result = self.merge_imported_tasks(processed_tasks, 'CSVインポート')
+                    messagebox.showinfo("成功", f"CSVファイルを正常にインポートしました（{result.summary()}）")
                 else:
-                    raise ValueError("CSVの構造解析に失敗しました")
+                    raise ValueError("タスクデータの変換に失敗しました")
         except Exception as e:
             self.logger.error(f"CSVインポート中にエラー: {str(e)}")
             messagebox.showerror("エラー", f"CSVのインポートに失敗しました: {str(e)}")
 
+    def convert_import_batch(self, raw_tasks, keys=None):
+        """インポートしたタスクデータのバッチをスキーマ形式に変換して検証
+
+        keys は1回のインポートで共有する KeyAssigner（省略するとバッチ内でキーを割り当てる）。
+        """
+        keys = keys or KeyAssigner()
+        tasks = [self.convert_to_task_schema(task, keys(task)) for task in raw_tasks]
+        return self.task_agent.process_tasks(tasks)
+
+    def merge_imported_tasks(self, tasks, label):
+        """インポートしたタスクを既存のタスクにキーで突き合わせて反映し、MergeResult を返す
+
+        変更のないタスクは描き直さず、変更・追加のあったタスクの行だけを更新する。
+        """
+        result = merge_tasks(self.history.current.tasks, tasks)
+        if result:
+            self.apply_task_changes(result.updated, result.appended, label)
+        return result
+
+    def rollup_entries(self, raw_tasks):
+        """チケット列のある明細をチケット単位のタスクに集計"""
+        if not any('ticket' in task for task in raw_tasks):
+            self.effort_rollup = None
+            return raw_tasks
+        with span('import.rollup'):
+            self.effort_rollup = EffortRollup()
+            self.effort_rollup.add_entries(raw_tasks)
+            return self.effort_rollup.to_tasks()
+
+    def follow_csv(self):
+        """CSVファイルを読み込み、以降は追記された行だけを定期的に取り込む（もう一度押すと停止）"""
+        if self.follower is not None:
+            self.follower = None
+            self.follow_btn.config(text="CSV追従")
+            return
+        try:
+            file_path = filedialog.askopenfilename(
+                filetypes=[("CSVファイル", "*.csv *.tsv *.txt")]
+            )
+            if file_path:
+                self.follower = CSVFollower(file_path, self.csv_analyzer)
+                self.load_followed_rows(self.follower.start())
+                self.follow_btn.config(text="追従を停止")
+                self.after(FOLLOW_INTERVAL_MS, self.poll_follow)
+        except Exception as e:
+            self.logger.error(f"CSVの追従開始中にエラー: {str(e)}")
+            self.follower = None
+            messagebox.showerror("エラー", f"CSVの追従に失敗しました: {str(e)}")
+
+    def load_followed_rows(self, raw_tasks):
+        """追従するCSVの全行を取り込む（開始時と、ファイルが置き換えられた場合）"""
+        self.effort_rollup = None
+        self.follow_keys = KeyAssigner()
+        if raw_tasks:
+            self.merge_imported_tasks(
+                self.convert_import_batch(self.rollup_entries(raw_tasks), self.follow_keys), 'CSV追従')
+
+    def poll_follow(self):
+        """追従中のCSVに追記された行を反映（Tkのスレッドで定期的に呼ぶ）"""
+        follower = self.follower
+        if follower is None:
+            return
+        try:
+            raw_tasks, reset = follower.poll()
+            if reset:
+                self.load_followed_rows(raw_tasks)
+            elif raw_tasks:
+                self.merge_followed_rows(raw_tasks)
+        except Exception as e:
+            self.logger.error(f"追記された行の反映中にエラー: {str(e)}")
+        if self.follower is follower:
+            self.after(FOLLOW_INTERVAL_MS, self.poll_follow)
+
+    def merge_followed_rows(self, raw_tasks):
+        """追記された行だけを変換して現在のプロジェクトに反映
+
+        チケット別に集計している場合は変更のあったチケットのタスクだけを作り直し（IDはチケットから決まる）、
+        そうでなければ新しいタスクとして末尾に追加する。
+        """
+        with span('follow.merge'):
+            if self.effort_rollup is None:
+                tasks = self.convert_import_batch(raw_tasks, self.follow_keys)
+            else:
+                keys = self.effort_rollup.add_entries(raw_tasks)
+                tasks = self.convert_import_batch(self.effort_rollup.to_tasks(keys))
+            self.merge_imported_tasks(tasks, 'CSV追従')
+
+    def show_ticket_entries(self, task_id):
+        """チケットの明細を別ウィンドウに表示（ドリルダウン）"""
+        task = next((t for t in self.tasks if t['id'] == task_id), None)
+        if task is None or self.effort_rollup is None:
+            return
+        ticket = task.get('metadata', {}).get('original_data', {}).get('ticket')
+        entries = self.effort_rollup.ticket_entries(ticket)
+        if not entries:
+            return
+        window = tk.Toplevel(self)
+        window.title(f"{task['name']} の明細（{len(entries)}件）")
+        tree = ttk.Treeview(window, columns=('date', 'hours', 'name'), show='headings')
+        for column, heading in (('date', '日付'), ('hours', '時間'), ('name', '内容')):
+            tree.heading(column, text=heading)
+        for entry in entries:
+            tree.insert('', tk.END, values=(entry.get('start_date'), entry.get('duration', ''), entry.get('name')))
+        tree.pack(fill=tk.BOTH, expand=True)
+
+    def show_burndown(self):
+        """記録した進捗の履歴からバーンダウン（残作業の推移）を別ウィンドウに表示
+
+        重みは子を持たないタスクの期間の日数。理想線は記録の初日の残作業からプロジェクトの終了日に0になる線。
+        """
+        if not len(self.progress_log) or not self.tasks:
+            messagebox.showinfo("バーンダウン", "進捗の履歴がありません")
+            return
+        weights = {}
+        for task in self.leaf_tasks():
+            start, end = dates.task_start(task), dates.task_end(task)
+            if start is not None and end is not None:
+                weights[task['id']] = float(max(end, start) - start + 1)
+        with span('burndown.compute'):
+            first_day = self.progress_log.first_day()
+            today = date.today().toordinal()
+            end = max(today, self.project_end or today)
+            burndown = self.progress_log.burndown(first_day, end, weights)
+        ideal_end = max(first_day, (self.project_end or end)) - first_day
+        window = tk.Toplevel(self)
+        window.title(f"バーンダウン（{dates.to_iso(first_day)} 〜 {dates.to_iso(end)}）")
+        width, height, margin = 600, 300, 40
+        canvas = tk.Canvas(window, width=width, height=height, bg='white')
+        canvas.pack(fill=tk.BOTH, expand=True)
+        top = max(float(burndown.remaining.max()), 1.0)
+        days = max(len(burndown) - 1, 1)
+
+        def point(day, value):
+            return (margin + (width - 2 * margin) * day / days,
+                    height - margin - (height - 2 * margin) * value / top)
+
+        canvas.create_line(margin, height - margin, width - margin, height - margin)
+        canvas.create_line(margin, margin, margin, height - margin)
+        canvas.create_text(margin, margin - 10, text=f"{top:.0f}日", anchor='w')
+        canvas.create_line(*point(0, burndown.remaining[0]), *point(ideal_end, 0), fill='gray', dash=(4, 2))
+        actual = [coordinate for day in range(min(today - first_day, len(burndown) - 1) + 1)
+                  for coordinate in point(day, burndown.remaining[day])]
+        if len(actual) >= 4:
+            canvas.create_line(*actual, fill='blue', width=2)
+        velocity = burndown.velocity()
+        current = min(today - first_day, len(burndown) - 1)
+        canvas.create_text(width - margin, margin - 10, anchor='e',
+                           text=f"残り {burndown.remaining[current]:.1f}日・直近7日の消化 {velocity[current]:.2f}日/日")
+
+    @traced('canvas.export_chart')
+    def export_chart_file(self):
+        """表示中のチャート（折りたたみ・表示モードを含む）をSVGまたはPNGで保存（PNGは大きければ分割）"""
+        if not self.tasks:
+            messagebox.showinfo("画像に出力", "タスクがありません")
+            return
+        try:
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".svg",
+                filetypes=[("SVGファイル", "*.svg"), ("PNGファイル", "*.png")]
+            )
+            if file_path:
+                model = ChartModel(self.tasks, self.layout, self.collapsed, self.wbs)
+                written = export_chart(model, file_path)
+                messagebox.showinfo("成功", f"チャートを保存しました（{len(written)}ファイル）")
+        except Exception as e:
+            self.logger.error(f"チャートの出力中にエラー: {str(e)}")
+            messagebox.showerror("エラー", f"チャートの出力に失敗しました: {str(e)}")
+
+    def export_trace(self):
+        """段階ごとの計測結果とLLM呼び出しの集計をJSONで保存"""
+        try:
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSONファイル", "*.json")]
+            )
+            if file_path:
+                tracer.dump(file_path, extra={'llm': meter.report()})
+                messagebox.showinfo("成功", "計測結果を保存しました")
+        except Exception as e:
+            self.logger.error(f"計測結果の保存中にエラー: {str(e)}")
+            messagebox.showerror("エラー", f"計測結果の保存に失敗しました: {str(e)}")
+
     def process_dialogue(self):
         """自然言語入力の処理"""
         try:
@@ -313,9 +928,12 @@ class GanttChart(ttk.Frame):
             self.text_input.delete("1.0", tk.END)
             
             # DialogueAgentによる入力の解釈
-            response = self.dialogue_agent.process_input(user_input, self.tasks)
+            response = self.dialogue_agent.process_input(user_input, self.tasks, self.name_index)
             
-            if response.get('action') == 'update_tasks':
+            if response.get('action') == 'update_tasks' and self.service is not None:
+                # 共有中はサービス側で適用し、変更通知で画面に反映する
+                self.service.command(user_input)
+            elif response.get('action') == 'update_tasks':
                 # TaskAgentによるタスクの更新
                 updated_tasks = self.task_agent.process_tasks(response.get('tasks', []))
                 self.set_tasks(updated_tasks)
@@ -330,6 +948,79 @@ class GanttChart(ttk.Frame):
             self.logger.error(f"対話処理中にエラー: {str(e)}")
             messagebox.showerror("エラー", f"処理に失敗しました: {str(e)}")
 
+    def connect_service(self, address):
+        """共有サービスに接続し、変更通知の受信を開始"""
+        if not address:
+            return
+        try:
+            self.service = ProjectClient.from_address(address)
+            tasks = self.service.subscribe()
+            self.history.reset(tasks)
+            self.tasks = self.history.current.to_list()
+            self.name_index.sync(self.tasks)
+            self.progress_log.sync(self.tasks)
+            self.update_gantt_chart()
+            self.after(200, self.poll_service)
+        except Exception as e:
+            self.logger.error(f"サービスへの接続に失敗: {str(e)}")
+            self.service = None
+
+    def poll_service(self):
+        """サービスからの変更通知を反映（Tkのスレッドで定期的に呼ぶ）"""
+        if self.service is None:
+            return
+        try:
+            while True:
+                event = self.service.events.get_nowait()
+                if event['event'] == 'changed':
+                    self.set_tasks(apply_change(self.tasks, event), 'サービス', validate=False)
+                elif event['event'] == 'resync':
+                    self.set_tasks(self.service.get_tasks(), 'サービス', validate=False)
+                elif event['event'] == 'closed':
+                    self.service = None
+                    messagebox.showwarning("警告", "サービスとの接続が切れました")
+                    return
+        except queue.Empty:
+            pass
+        except Exception as e:
+            self.logger.error(f"変更通知の反映中にエラー: {str(e)}")
+        self.after(200, self.poll_service)
+
+    def undo(self):
+        """直前の編集を取り消す"""
+        if self.service is not None:
+            # 共有中は他のクライアントの変更を巻き戻さないよう無効にする
+            return
+        previous = self.history.current
+        label, changed = self.history.undo()
+        if label is not None:
+            self.tasks = self.history.current.to_list()
+            self.refresh_tasks(changed, previous)
+
+    def redo(self):
+        """取り消した編集をやり直す"""
+        if self.service is not None:
+            return
+        previous = self.history.current
+        label, changed = self.history.redo()
+        if label is not None:
+            self.tasks = self.history.current.to_list()
+            self.refresh_tasks(changed, previous)
+
+    def on_undo_key(self, event):
+        if event.widget is not self.text_input:
+            self.undo()
+
+    def on_redo_key(self, event):
+        if event.widget is not self.text_input:
+            self.redo()
+
+    def on_view_mode_change(self, event=None):
+        """表示モードの切り替え"""
+        view_mode = self.view_modes[self.view_mode_var.get()]
+        chart_settings = self.chart_agent.process_settings({'display': {'view_mode': view_mode}})
+        self.update_chart_settings(chart_settings)
+
     def update_chart_settings(self, settings):
         """チャート設定の更新"""
         try:
@@ -339,6 +1030,7 @@ class GanttChart(ttk.Frame):
             if 'display' in settings:
                 # 表示設定を更新
                 self.display_settings = settings['display']
+                self.layout.view_mode = self.display_settings.get('view_mode', 'days')
             
             # チャートを再描画
             self.update_gantt_chart()
@@ -347,57 +1039,79 @@ class GanttChart(ttk.Frame):
             self.logger.error(f"チャート設定の更新中にエラー: {str(e)}")
             raise
 
-    def set_tasks(self, tasks):
-        """タスクリストを設定し、ガントチャートを更新"""
+    def set_tasks(self, tasks, label='', validate=True):
+        """タスクリストを設定し、ガントチャートを更新（変更は履歴に記録）
+
+        validate=False は検証済みのタスク（インポートのパイプラインの出力など）を渡す場合。
+        """
         try:
             # タスクの検証と前処理
-            processed_tasks = self.task_agent.validate_tasks(tasks)
+            processed_tasks = self.task_agent.validate_tasks(tasks) if validate else list(tasks)
+            previous = self.history.current
+            changed = self.history.commit(processed_tasks, label)
             self.tasks = processed_tasks
-            self.update_gantt_chart()
+            self.refresh_tasks(changed, previous)
             
         except Exception as e:
             self.logger.error(f"タスク設定中にエラー: {str(e)}")
             raise
 
+    @traced('canvas.draw_date_axis')
     def draw_date_axis(self):
         """日付軸を描画"""
         if not self.tasks:
             return
         
-        # プロジェクトの期間を取得
-        all_dates = [pd.to_datetime(task['start_date']) for task in self.tasks] + \
-                   [pd.to_datetime(task['end_date']) for task in self.tasks]
-        project_start = min(all_dates)
-        project_end = max(all_dates)
+        # プロジェクトの期間（update_gantt_chart で求めたもの）
+        project_start, project_end = self.project_start, self.project_end
         
-        # 日付軸の位置
-        y = len(self.tasks) * self.canvas.row_height + self.canvas.header_height + 30
+        # 日付軸の位置（表示中の行の下）
+        y = self.layout.axis_y(len(self.row_index))
         
         # 軸の線を描画
         canvas_width = self.canvas.winfo_width() - 100
-        self.canvas.create_line(100, y, 100 + canvas_width, y)
+        self.canvas.create_line(100, y, 100 + canvas_width, y, tags=('footer',))
         
-        # 日付ラベルを描画
-        days = (project_end - project_start).days + 1
-        for i in range(days):
-            date = project_start + pd.Timedelta(days=i)
-            x = self.canvas.task_width + ((date - pd.to_datetime(min(pd.to_datetime(task['start_date']) for task in self.tasks)))).days * self.canvas.cell_width
-            self.canvas.create_line(x, y-5, x, y+5)  # 目盛り
-            if i % 2 == 0:  # 2日おきに日付を表示
-                self.canvas.create_text(x, y+20, text=date.strftime('%m/%d'),
-                                              angle=45)
-
-    def date_to_x(self, date):
-        """日付をX座標に変換するメソッド"""
+        if self.layout.view_mode != 'days':
+            self.draw_bucket_axis(project_start, project_end, y)
+            return
+        
+        # 日付ラベルを描画（2日おきに日付を表示）
+        for x, label in self.layout.date_axis_ticks(project_start, project_end):
+            self.canvas.create_line(x, y-5, x, y+5, tags=('footer',))  # 目盛り
+            if label:
+                self.canvas.create_text(x, y+20, text=label, angle=45, tags=('footer',))
+
+    def draw_bucket_axis(self, project_start, project_end, y):
+        """週・月表示の日付軸を描画（1バケット1セルで、集計値を併記）"""
+        view_mode = self.layout.view_mode
+        self.timeline.sync(self.leaf_tasks())
+        stats = dict(self.timeline.summary(view_mode, project_start, project_end))
+        cell_width = self.layout.cell_width
+        for x, label, key in self.layout.bucket_cells(project_start, project_end):
+            bucket = stats.get(key)
+            # 稼働日の割合で目盛り下のセルを塗る
+            if bucket and bucket.busy_days:
+                span_days = 7 if view_mode == 'weeks' else 30
+                ratio = min(1, bucket.busy_days / span_days)
+                self.canvas.create_rectangle(x, y+2, x + cell_width * ratio, y+8,
+                                             fill='lightsteelblue', outline='', tags=('footer',))
+            self.canvas.create_line(x, y-5, x, y+5, tags=('footer',))  # 目盛り
+            self.canvas.create_text(x, y+20, text=label, angle=45, tags=('footer',))
+            if bucket and bucket.task_count:
+                self.canvas.create_text(x + cell_width/2, y+45,
+                                        text=f"{bucket.task_count}\n{bucket.progress:.0f}%",
+                                        font=('', 7), tags=('footer',))
+
+    def date_to_x(self, date, project_start=None):
+        """日付をX座標に変換するメソッド（日付は序数または日付を表す値）"""
         if not self.tasks:
             return 0
         
-        # プロジェクトの開始日を取得
-        project_start = min(pd.to_datetime(task['start_date']) for task in self.tasks)
-        
-        # 日付の差分を計算してピクセル座標に変換
-        days_diff = (date - project_start).days
-        return self.canvas.task_width + (days_diff * self.canvas.cell_width)
+        # プロジェクトの開始日を取得（呼び出し側で求めていればそれを使う）
+        if project_start is None:
+            project_start = self.layout.project_start(self.tasks)
+        return self.layout.date_to_x(dates.to_ordinal(date), project_start)
 
 def main():
     root = tk.Tk()
@@ -416,6 +1130,10 @@ def main():
     app.pack(fill=tk.BOTH, expand=True)
     
     root.mainloop()
+    app.save_agent_history()
+    app.save_progress_log()
+    if app.service is not None:
+        app.service.close()
 
 if __name__ == '__main__':
     main()
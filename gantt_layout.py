@@ -0,0 +1,70 @@
+from datetime import date
+from dates import task_start, task_end
+from timeline import bucket_key, bucket_start, bucket_end, bucket_label
+
+
+class GanttLayout:
+    """ガントチャートの座標計算（Tkに依存しないのでヘッドレスでも利用可能）
+
+    日付はすべて日の序数（dates.to_ordinal）で受け取る。
+    """
+    def __init__(self, task_width=200, cell_width=30, row_height=30, header_height=50,
+                 view_mode='days'):
+        self.task_width = task_width
+        self.cell_width = cell_width
+        self.row_height = row_height
+        self.header_height = header_height
+        self.view_mode = view_mode  # days, weeks, months（1セル = 1日/1週/1月）
+
+    def project_start(self, tasks):
+        """プロジェクトの開始日を取得"""
+        return min(ordinal for ordinal in map(task_start, tasks) if ordinal is not None)
+
+    def project_range(self, tasks):
+        """プロジェクトの開始日と終了日を取得"""
+        ordinals = [ordinal for task in tasks for ordinal in (task_start(task), task_end(task))
+                    if ordinal is not None]
+        return min(ordinals), max(ordinals)
+
+    def date_to_x(self, ordinal, project_start):
+        """日付をX座標に変換"""
+        if self.view_mode == 'days':
+            return self.task_width + ((ordinal - project_start) * self.cell_width)
+        return self.task_width + self.ordinal_to_cell(ordinal, project_start) * self.cell_width
+
+    def ordinal_to_cell(self, ordinal, start_ordinal):
+        """日付の序数を先頭セルからのセル位置（小数）に変換"""
+        first = bucket_key(start_ordinal, self.view_mode)
+        key = bucket_key(ordinal, self.view_mode)
+        if self.view_mode == 'weeks':
+            return (ordinal - first) / 7
+        start = bucket_start(key, self.view_mode)
+        length = bucket_end(key, self.view_mode) - start
+        return key - first + (ordinal - start) / length
+
+    def axis_y(self, task_count):
+        """日付軸のY座標"""
+        return task_count * self.row_height + self.header_height + 30
+
+    def date_axis_ticks(self, project_start, project_end, label_every=2):
+        """日付軸の目盛り (x, ラベル) を計算（ラベルなしの目盛りはNone）"""
+        if self.view_mode != 'days':
+            return [(x, label) for x, label, _ in self.bucket_cells(project_start, project_end)]
+        ticks = []
+        for i, ordinal in enumerate(range(project_start, project_end + 1)):
+            x = self.date_to_x(ordinal, project_start)
+            label = date.fromordinal(ordinal).strftime('%m/%d') if i % label_every == 0 else None
+            ticks.append((x, label))
+        return ticks
+
+    def bucket_cells(self, start_ordinal, end_ordinal):
+        """週・月表示のセル (x, ラベル, バケットキー) を計算（セル数は期間の日数ではなくバケット数）"""
+        cells = []
+        first = bucket_key(start_ordinal, self.view_mode)
+        key = first
+        index = 0
+        while bucket_start(key, self.view_mode) <= end_ordinal:
+            cells.append((self.task_width + index * self.cell_width, bucket_label(key, self.view_mode), key))
+            key = bucket_key(bucket_end(key, self.view_mode), self.view_mode)
+            index += 1
+        return cells
@@ -0,0 +1,203 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import dates
+from csv_format import sniff_csv
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # ストリームの終端
+
+
+class PipelineError(Exception):
+    """パイプラインのいずれかの段で発生した例外"""
+
+
+class Pipeline:
+    """段ごとのスレッドを上限付きキューでつないだパイプライン
+
+    source はバッチを返すイテラブル、stages は (名前, 関数) のリストで、関数はバッチのイテレータを
+    受け取りバッチを返すジェネレータ（集約が必要な段は入力をすべて読んでから返せばよい）。
+    キューが一杯になると上流の段は待つため、メモリ使用量は queue_size × 段数 のバッチに収まる。
+    """
+    def __init__(self, source, stages, queue_size=4, name='pipeline'):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.name = name
+        self.stage_seconds = {}  # 段の名前 -> 処理に費やした時間（待ち時間を除く）
+        self._wait_seconds = {}
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_queue(self, q, stage_name=None):
+        while True:
+            started = time.perf_counter()
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+            if stage_name is not None:
+                # 上流を待っていた時間は段の処理時間から除く
+                self._wait_seconds[stage_name] = (self._wait_seconds.get(stage_name, 0.0)
+                                                  + time.perf_counter() - started)
+            if item is None:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def _timed(self, stage_name, iterator):
+        """段の出力を1件ずつ取り出し、その処理時間を集計"""
+        while True:
+            started = time.perf_counter()
+            with span(f"{self.name}.{stage_name}"):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    item = _END
+            self.stage_seconds[stage_name] = self.stage_seconds.get(stage_name, 0.0) + time.perf_counter() - started
+            if item is _END:
+                self.stage_seconds[stage_name] -= self._wait_seconds.get(stage_name, 0.0)
+                return
+            yield item
+
+    def _run_stage(self, stage_name, produce, output):
+        try:
+            for item in self._timed(stage_name, iter(produce())):
+                if not self._put(output, item):
+                    return
+        except Exception as e:
+            logger.error(f"パイプラインの段 {stage_name} でエラー: {str(e)}")
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(output, _END)
+
+    def __iter__(self):
+        """最終段の出力を順に返す（いずれかの段で例外が起きたら PipelineError）"""
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._run_stage, args=('source', lambda: self.source, queues[0]),
+                                    name=f"{self.name}-source", daemon=True)]
+        for i, (stage_name, stage) in enumerate(self.stages):
+            produce = (lambda stage=stage, q=queues[i], stage_name=stage_name:
+                       stage(self._iter_queue(q, stage_name)))
+            threads.append(threading.Thread(target=self._run_stage, args=(stage_name, produce, queues[i + 1]),
+                                            name=f"{self.name}-{stage_name}", daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            yield from self._iter_queue(queues[-1])
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._errors:
+            raise PipelineError(str(self._errors[0])) from self._errors[0]
+
+    def run(self):
+        """最終段の出力をリストで返す"""
+        return list(self)
+
+
+def detect_date_columns(df, sample=20, threshold=0.8):
+    """文字列の列のうち日付として解釈できる列を判定し、列名 -> 日の序数の配列 を返す"""
+    ordinals = {}
+    for column in df.columns:
+        if df[column].dtype.kind not in 'OSU' and str(df[column].dtype) not in ('string', 'str'):
+            continue
+        values = df[column].dropna().head(sample).tolist()
+        if not values:
+            continue
+        parsed = sum(1 for value in values if dates.to_ordinal(value))
+        if parsed / len(values) >= threshold:
+            ordinals[column] = dates.column_to_ordinals(df[column])
+    return ordinals
+
+
+class CSVImportPipeline:
+    """CSVインポートのパイプライン（ヘッダー解析とデータの読み込み・変換を並行して行う）
+
+    0. 先頭の一部からCSVの形式（エンコーディング・区切り文字・引用符）を判定（以降の読み込みはすべてこれを使う）
+    1. Geminiによるヘッダー解析を別スレッドで開始
+    2. read: チャンクごとに読み込み、日付の列を判定して序数に変換（解析の応答を待たずに進む）
+    3. transform: 解析結果のマッピングでタスクデータに変換（最初のチャンクでマッピングを待つ）
+    4. convert: タスクのスキーマ形式に変換して検証（チケット列があれば全件を集計してから変換）
+    """
+    def __init__(self, analyzer, chunksize=20000, queue_size=4):
+        self.analyzer = analyzer
+        self.chunksize = chunksize
+        self.queue_size = queue_size
+        self.mapping = None
+        self.csv_format = None
+        self.stage_seconds = {}
+
+    def run(self, file_path, convert, rollup=None):
+        """CSVを読み込んでタスクのリストを返す
+
+        convert は生のタスクデータのバッチを検証済みタスクのリストに変換する関数、
+        rollup はチケット単位の集計を行う関数（生のタスクデータのリスト -> 同形式のリスト）。
+        """
+        with span('import.sniff'):
+            self.csv_format = csv_format = sniff_csv(file_path)
+        logger.info(f"CSVの形式: {csv_format}")
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='import-mapping') as executor:
+            future = executor.submit(self.analyzer.analyze_csv_structure, file_path, csv_format)
+
+            def mapping():
+                if self.mapping is None:
+                    with span('import.wait_mapping'):
+                        self.mapping = future.result()
+                    if not self.mapping:
+                        raise ValueError("CSVの構造解析に失敗しました")
+                return self.mapping
+
+            def read_chunks():
+                for chunk in pd.read_csv(file_path, chunksize=self.chunksize, **csv_format.read_options()):
+                    yield chunk, detect_date_columns(chunk)
+
+            def transform(batches):
+                for chunk, ordinals in batches:
+                    raw_tasks = self.analyzer.validate_and_transform_data(chunk, mapping(), ordinals)
+                    if raw_tasks is None:
+                        raise ValueError("タスクデータの変換に失敗しました")
+                    if raw_tasks:
+                        yield raw_tasks
+
+            def convert_batches(batches):
+                if rollup is not None and mapping().get('ticket'):
+                    # チケットごとの集計は全明細がそろってから行う
+                    raw_tasks = [task for batch in batches for task in batch]
+                    if raw_tasks:
+                        yield convert(rollup(raw_tasks))
+                    return
+                for batch in batches:
+                    yield convert(batch)
+
+            pipeline = Pipeline(read_chunks(), [('transform', transform), ('convert', convert_batches)],
+                                self.queue_size, name='import')
+            try:
+                tasks = [task for batch in pipeline for task in batch]
+            finally:
+                self.stage_seconds = pipeline.stage_seconds
+        if self.mapping is None:
+            # 空のCSVでもマッピングの失敗は報告する
+            mapping()
+        return tasks
@@ -0,0 +1,235 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from tracing import Histogram
+
+logger = logging.getLogger(__name__)
+
+# 1セッションあたりの予算（未設定なら無制限）と、呼び出し間隔の制限・再試行の回数
+MAX_CALLS_ENV = 'GANTT_LLM_MAX_CALLS'
+MAX_TOKENS_ENV = 'GANTT_LLM_MAX_TOKENS'
+RATE_ENV = 'GANTT_LLM_RATE'  # 1分あたりの呼び出し回数
+MAX_WAIT_ENV = 'GANTT_LLM_MAX_WAIT'  # 間隔の制限で待つ最大の秒数（超える場合は呼び出さない）
+RETRIES_ENV = 'GANTT_LLM_RETRIES'
+REPORT_FILE_ENV = 'GANTT_LLM_REPORT_FILE'
+
+# 一時的な失敗とみなして再試行する例外（google.api_core の例外はクラス名で判定）
+TRANSIENT_ERRORS = {'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded',
+                    'InternalServerError', 'GatewayTimeout'}
+
+
+class BudgetExceeded(Exception):
+    """LLM呼び出しの予算を超えた（呼び出しは行っていない）"""
+
+
+def estimate_tokens(text):
+    """おおよそのトークン数（ASCIIは4文字で1トークン、それ以外は1文字1トークンとして数える）"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for char in text if char < '\x80')
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+def _is_transient(error):
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in TRANSIENT_ERRORS
+
+
+class CallStats:
+    """操作ごとの呼び出しの集計"""
+    __slots__ = ('calls', 'errors', 'retries', 'throttled', 'rejected', 'prompt_tokens', 'response_tokens',
+                 'latency', 'throttle_seconds')
+
+    def __init__(self):
+        self.calls = 0  # 成功した呼び出し
+        self.errors = 0  # 再試行しても失敗した呼び出し
+        self.retries = 0
+        self.throttled = 0  # 間隔の制限で待たされた回数
+        self.rejected = 0  # 予算の超過で呼び出さなかった回数
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.latency = Histogram()  # 1回の呼び出し（再試行を含む）の所要時間
+        self.throttle_seconds = 0.0
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'rejected': self.rejected,
+            'prompt_tokens': self.prompt_tokens,
+            'response_tokens': self.response_tokens,
+            'throttle_seconds': self.throttle_seconds,
+            'latency': self.latency.summary()
+        }
+
+
+class LLMMeter:
+    """すべての generate_content 呼び出しの計量と予算の管理
+
+    操作（"TaskAgent.extract_task_info" など）ごとに所要時間の分布・おおよそのトークン数・失敗と再試行の
+    回数を集計する。予算は1セッションの呼び出し回数とトークン数の上限で、超えると BudgetExceeded を送出して
+    呼び出さない（呼び出し側はローカルの処理に切り替える）。rate を指定すると1分あたりの呼び出し回数を
+    トークンバケットで制限し、上限に達したときは max_wait 秒まで待つ。
+    """
+    def __init__(self, max_calls=None, max_tokens=None, rate=None, max_wait=30.0, retries=2, backoff=0.5,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.rate = rate
+        self.max_wait = max_wait
+        self.retries = retries
+        self.backoff = backoff  # 再試行の待ち時間（秒、回ごとに倍にする）
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = {}  # 操作 -> CallStats
+        self.started_at = datetime.now()
+        self._calls = 0  # 予算に数える呼び出し（失敗を含む）
+        self._tokens = 0
+        self._allowance = float(rate) if rate else 0.0  # トークンバケットの残り
+        self._checked_at = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        def number(name, convert=int):
+            value = os.getenv(name)
+            return convert(value) if value else None
+        return cls(max_calls=number(MAX_CALLS_ENV), max_tokens=number(MAX_TOKENS_ENV),
+                   rate=number(RATE_ENV, float), max_wait=float(os.getenv(MAX_WAIT_ENV, '30')),
+                   retries=int(os.getenv(RETRIES_ENV, '2')))
+
+    def _stats(self, operation):
+        stats = self.stats.get(operation)
+        if stats is None:
+            stats = self.stats[operation] = CallStats()
+        return stats
+
+    def _reserve(self, operation, prompt_tokens):
+        """予算を確認して1回分を確保し、間隔の制限で待つ秒数を返す"""
+        with self._lock:
+            stats = self._stats(operation)
+            if self.max_calls is not None and self._calls >= self.max_calls:
+                stats.rejected += 1
+                raise BudgetExceeded(f"LLM呼び出しの回数の上限（{self.max_calls}回）に達しました")
+            if self.max_tokens is not None and self._tokens + prompt_tokens > self.max_tokens:
+                stats.rejected += 1
+                raise BudgetExceeded(f"LLM呼び出しのトークン数の上限（{self.max_tokens}）に達しました")
+            wait = 0.0
+            if self.rate:
+                now = self.clock()
+                self._allowance = min(float(self.rate),
+                                      self._allowance + (now - self._checked_at) * self.rate / 60.0)
+                self._checked_at = now
+                if self._allowance < 1.0:
+                    wait = (1.0 - self._allowance) * 60.0 / self.rate
+                    if wait > self.max_wait:
+                        stats.rejected += 1
+                        raise BudgetExceeded(f"LLM呼び出しの間隔の制限で{wait:.1f}秒待つ必要があります")
+                    stats.throttled += 1
+                    stats.throttle_seconds += wait
+                self._allowance -= 1.0
+            self._calls += 1
+            self._tokens += prompt_tokens
+            return wait
+
+    def generate(self, model, prompt, operation):
+        """model.generate_content(prompt) を計量・予算の管理・再試行付きで呼び出す"""
+        prompt_tokens = estimate_tokens(prompt)
+        wait = self._reserve(operation, prompt_tokens)
+        if wait:
+            self.sleep(wait)
+        started = self.clock()
+        retries = 0
+        while True:
+            try:
+                response = model.generate_content(prompt)
+                break
+            except Exception as e:
+                if retries >= self.retries or not _is_transient(e):
+                    with self._lock:
+                        stats = self._stats(operation)
+                        stats.errors += 1
+                        stats.retries += retries
+                        stats.prompt_tokens += prompt_tokens
+                        stats.latency.add(self.clock() - started)
+                    raise
+                self.sleep(self.backoff * 2 ** retries)
+                retries += 1
+        elapsed = self.clock() - started
+        prompt_tokens, response_tokens = self._usage(response, prompt_tokens)
+        with self._lock:
+            stats = self._stats(operation)
+            stats.calls += 1
+            stats.retries += retries
+            stats.prompt_tokens += prompt_tokens
+            stats.response_tokens += response_tokens
+            stats.latency.add(elapsed)
+            self._tokens += response_tokens
+        return response
+
+    @staticmethod
+    def _usage(response, prompt_tokens):
+        """応答に含まれるトークン数（なければ推定値）"""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_count = getattr(usage, 'prompt_token_count', None)
+        response_count = getattr(usage, 'candidates_token_count', None)
+        if isinstance(prompt_count, int) and isinstance(response_count, int):
+            return prompt_count, response_count
+        try:
+            text = response.text
+        except Exception:
+            text = ''
+        return prompt_tokens, estimate_tokens(text if isinstance(text, str) else '')
+
+    def report(self):
+        """操作ごとの集計と予算の残り（所要時間の合計の多い順）"""
+        with self._lock:
+            operations = {operation: stats.summary() for operation, stats in self.stats.items()}
+            used = {'calls': self._calls, 'tokens': self._tokens}
+        operations = dict(sorted(operations.items(), key=lambda item: -item[1]['latency']['total']))
+        total = {key: sum(summary[key] for summary in operations.values())
+                 for key in ('calls', 'errors', 'retries', 'throttled', 'rejected', 'prompt_tokens',
+                             'response_tokens', 'throttle_seconds')}
+        total['seconds'] = sum(summary['latency']['total'] for summary in operations.values())
+        return {
+            'started_at': self.started_at.isoformat(),
+            'budget': {
+                'max_calls': self.max_calls,
+                'max_tokens': self.max_tokens,
+                'rate_per_minute': self.rate,
+                'used_calls': used['calls'],
+                'used_tokens': used['tokens']
+            },
+            'total': total,
+            'operations': operations
+        }
+
+    def dump(self, path=None):
+        """集計結果をJSONで出力（pathを指定するとファイルに書き出す）"""
+        data = json.dumps(dict(self.report(), generated_at=datetime.now().isoformat()),
+                          ensure_ascii=False, indent=2)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        return data
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self._calls = 0
+            self._tokens = 0
+            self._allowance = float(self.rate) if self.rate else 0.0
+            self._checked_at = self.clock()
+
+
+meter = LLMMeter.from_env()
+
+
+if os.getenv(REPORT_FILE_ENV):
+    atexit.register(meter.dump, os.getenv(REPORT_FILE_ENV))
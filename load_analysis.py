@@ -0,0 +1,147 @@
+import numpy as np
+
+import dates
+
+
+class LoadProfile:
+    """日ごとの同時実行数（または工数）と過負荷フラグ"""
+    def __init__(self, start, load, capacity=None, groups=None):
+        self.start = start  # 先頭の日付（序数）
+        self.load = load  # 日ごとの負荷（numpy配列）
+        self.capacity = capacity
+        self.groups = groups or {}  # 担当者 -> 日ごとの負荷（同じ期間の配列）
+
+    def __len__(self):
+        return len(self.load)
+
+    @property
+    def end(self):
+        """最終日（序数）"""
+        return self.start + len(self.load) - 1
+
+    @property
+    def overloaded(self):
+        """日ごとの過負荷フラグ（担当者ごとの集計がある場合はいずれかの担当者が超過した日）"""
+        if self.capacity is None:
+            return np.zeros(len(self.load), dtype=bool)
+        if self.groups:
+            return np.any([group > self.capacity for group in self.groups.values()], axis=0)
+        return self.load > self.capacity
+
+    def at(self, ordinal):
+        """指定日の負荷"""
+        index = ordinal - self.start
+        return self.load[index] if 0 <= index < len(self.load) else 0
+
+    def to_dict(self):
+        return {
+            'start': dates.to_iso(self.start),
+            'load': self.load.tolist(),
+            'overloaded': self.overloaded.tolist()
+        }
+
+
+def sweep(starts, ends, weights):
+    """開始・終了イベントを走査して日ごとの負荷を求める（O(n log n)）
+
+    starts/endsは序数（終了日を含む）。戻り値は (先頭の日付, 日ごとの負荷の配列)。
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(starts) == 0:
+        return None, np.zeros(0)
+    first, last = int(starts.min()), int(ends.max())
+
+    # 開始日に+w、終了日の翌日に-wのイベントを日付順に並べる
+    days = np.concatenate([starts, ends + 1])
+    deltas = np.concatenate([weights, -weights])
+    order = np.argsort(days, kind='stable')
+    days, deltas = days[order], deltas[order]
+    boundaries, first_index = np.unique(days, return_index=True)
+    levels = np.cumsum(np.add.reduceat(deltas, first_index))
+
+    # 区間ごとの値を日ごとに展開
+    lengths = np.diff(np.append(boundaries, last + 1))
+    load = np.repeat(levels[:-1], lengths[:-1]) if len(boundaries) > 1 else np.zeros(0)
+    return first, load[:last - first + 1]
+
+
+class LoadAnalyzer:
+    """タスクの重なりから日ごとの負荷を求める（結果はキャッシュし、タスクの変更時だけ再計算）
+
+    weight='count' は同時実行タスク数、weight='hours' はタスクの作業時間を期間の日数で均等に割った工数。
+    group_by を指定するとその項目（例: 'assignee'）ごとにも集計し、capacity超過を過負荷とする。
+    """
+    def __init__(self, weight='count', capacity=None, group_by=None):
+        self.weight = weight
+        self.capacity = capacity
+        self.group_by = group_by
+        self.entries = {}  # タスクID -> (開始日, 終了日, 重み, グループ)
+        self._profile = None
+
+    def _entry(self, task):
+        start, end = dates.task_start(task), dates.task_end(task)
+        if start is None or end is None:
+            return None
+        end = max(start, end)
+        weight = 1.0
+        if self.weight == 'hours':
+            hours = task.get('metadata', {}).get('duration') or task.get('duration') or 0
+            weight = float(hours) / (end - start + 1)
+        group = None
+        if self.group_by:
+            group = task.get(self.group_by)
+            if group is None:
+                group = task.get('metadata', {}).get('original_data', {}).get(self.group_by)
+        return start, end, weight, group
+
+    def update_task(self, task):
+        """タスクを追加・更新（変化があればキャッシュを破棄）"""
+        entry = self._entry(task)
+        if entry is None:
+            self.remove_task(task.get('id'))
+            return
+        if self.entries.get(task.get('id')) != entry:
+            self.entries[task.get('id')] = entry
+            self._profile = None
+
+    def remove_task(self, task_id):
+        if self.entries.pop(task_id, None) is not None:
+            self._profile = None
+
+    def sync(self, tasks):
+        """タスクリストとの差分を反映"""
+        seen = set()
+        for task in tasks:
+            seen.add(task.get('id'))
+            self.update_task(task)
+        for task_id in [task_id for task_id in self.entries if task_id not in seen]:
+            self.remove_task(task_id)
+
+    def profile(self):
+        """日ごとの負荷（キャッシュがあればそれを返す）"""
+        if self._profile is None:
+            self._profile = self._compute()
+        return self._profile
+
+    def _compute(self):
+        if not self.entries:
+            return LoadProfile(dates.today(), np.zeros(0), self.capacity)
+        starts, ends, weights, groups = zip(*self.entries.values())
+        start, load = sweep(starts, ends, weights)
+        profile_groups = {}
+        if self.group_by:
+            groups = np.array(groups, dtype=object)
+            starts, ends, weights = np.array(starts), np.array(ends), np.array(weights)
+            for group in set(groups.tolist()):
+                if group is None:
+                    continue
+                mask = groups == group
+                group_start, group_load = sweep(starts[mask], ends[mask], weights[mask])
+                # 全体と同じ期間の配列にそろえる
+                aligned = np.zeros(len(load))
+                offset = group_start - start
+                aligned[offset:offset + len(group_load)] = group_load
+                profile_groups[group] = aligned
+        return LoadProfile(start, load, self.capacity, profile_groups)
@@ -0,0 +1,107 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_FILE = 'gantt_app.log'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """キューが満杯のときは待たずに破棄するQueueHandler（UIスレッドを止めない）"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=None, log_file=LOG_FILE, max_bytes=5 * 1024 * 1024,
+                  backup_count=3, queue_size=10000):
+    """ロギングを設定（何度呼んでも出力先は1つ）
+
+    ログはキュー経由で別スレッドに渡し、コンソールとローテーションするファイルに書き出す。
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _queue_handler
+
+    if level is None:
+        level = os.getenv('GANTT_LOG_LEVEL', 'DEBUG').upper()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+    file_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    return _queue_handler
+
+
+def shutdown_logging():
+    """キューに残ったログを書き出してリスナーを停止"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    if _queue_handler.dropped:
+        sys.stderr.write(f"ログキューが満杯のため {_queue_handler.dropped} 件のログを破棄しました\n")
+    _listener = None
+    _queue_handler = None
+
+
+class SampledWarnings:
+    """行ごとに繰り返される警告を先頭の数件だけ出力し、残りは件数に集約
+
+    with SampledWarnings(logger, "無効なタスクデータ") as warnings:
+        for row in rows:
+            warnings.warn(row)
+    """
+    def __init__(self, logger, message, sample=5, level=logging.WARNING):
+        self.logger = logger
+        self.message = message
+        self.sample = sample
+        self.level = level
+        self.count = 0
+
+    def warn(self, detail):
+        self.count += 1
+        if self.count <= self.sample and self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, f"{self.message}: {detail}")
+
+    def flush(self):
+        """省略した件数をまとめて出力"""
+        if self.count > self.sample:
+            self.logger.log(self.level,
+                            f"{self.message}: 合計{self.count}件（{self.count - self.sample}件は省略）")
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
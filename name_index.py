@@ -0,0 +1,152 @@
+import heapq
+import unicodedata
+from collections import Counter
+
+N = 3  # n-gramの長さ
+
+
+def normalize(text):
+    """比較用の正規化（全角英数字を半角に、英字は小文字に）"""
+    return unicodedata.normalize('NFKC', str(text)).lower()
+
+
+def ngrams(text):
+    """n-gramの集合（n文字未満の文字列はそれ自体を1つのgramとする）"""
+    if len(text) < N:
+        return {text} if text else set()
+    return {text[i:i + N] for i in range(len(text) - N + 1)}
+
+
+def _query_grams(text):
+    """コマンド文中に現れうるgram（n文字未満の短い名前も拾えるよう短い部分文字列も含める）"""
+    grams = ngrams(text)
+    for length in range(1, N):
+        grams.update(text[i:i + length] for i in range(len(text) - length + 1))
+    return grams
+
+
+class TrigramIndex:
+    """タスク名のn-gram転置インデックス
+
+    追加・名前の変更・削除は変更のあったタスクだけ反映する。検索は問い合わせのgramのうち
+    出現数の少ないものから候補を集め、候補だけを正確に採点するため、タスク数に比例しない。
+    """
+    def __init__(self, max_postings=2000):
+        self.max_postings = max_postings  # 候補集めに使う転置リストの合計の上限
+        self.postings = {}  # gram -> キーの集合
+        self.grams = {}  # キー -> gramの集合
+        self.sizes = {}  # キー -> gramの数
+        self.names = {}  # キー -> 元の名前
+        self.normalized = {}  # キー -> 正規化した名前
+        self.by_name = {}  # 正規化した名前 -> キーの集合
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, key):
+        return key in self.names
+
+    def add(self, key, name):
+        """追加（既存のキーなら名前の変更として扱う）"""
+        if key in self.names:
+            if self.names[key] == name:
+                return
+            self.remove(key)
+        normalized = normalize(name)
+        grams = ngrams(normalized)
+        self.names[key] = name
+        self.normalized[key] = normalized
+        self.grams[key] = grams
+        self.sizes[key] = len(grams)
+        self.by_name.setdefault(normalized, set()).add(key)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+    rename = add
+
+    def remove(self, key):
+        if key not in self.names:
+            return
+        del self.names[key]
+        normalized = self.normalized.pop(key)
+        keys = self.by_name[normalized]
+        keys.discard(key)
+        if not keys:
+            del self.by_name[normalized]
+        del self.sizes[key]
+        for gram in self.grams.pop(key):
+            posting = self.postings[gram]
+            posting.discard(key)
+            if not posting:
+                del self.postings[gram]
+
+    def sync(self, tasks):
+        """タスクリストとの差分を反映（名前の比較だけなので毎回呼んでも軽い）"""
+        seen = set()
+        names = self.names
+        for task in tasks:
+            key = task['id']
+            seen.add(key)
+            if names.get(key) != task['name']:
+                self.add(key, task['name'])
+        if len(seen) != len(names):
+            for key in [key for key in names if key not in seen]:
+                self.remove(key)
+
+    def apply_changes(self, tasks_by_id, changed_keys):
+        """変更のあったキーだけを反映（tasks_by_id: ID -> タスク、存在しなければ削除）"""
+        for key in changed_keys:
+            task = tasks_by_id.get(key)
+            if task is None:
+                self.remove(key)
+            else:
+                self.add(key, task['name'])
+
+    def lookup(self, name):
+        """正規化した名前が一致するキー"""
+        return set(self.by_name.get(normalize(name), ()))
+
+    def _overlaps(self, grams):
+        """候補ごとの問い合わせと共通するgramの数
+
+        出現数の少ないgramから順に、転置リストの合計が max_postings に収まるところまでで候補を集め、
+        残りの（多くのタスクに現れる）gramは候補に含まれるかどうかだけを調べて数える。
+        """
+        postings = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+        hits = Counter()
+        total = 0
+        used = 0
+        for posting in postings:
+            if hits and total + len(posting) > self.max_postings:
+                break
+            hits.update(posting)
+            total += len(posting)
+            used += 1
+        if used < len(postings):
+            candidates = set(hits)
+            for posting in postings[used:]:
+                hits.update(candidates & posting)
+        return hits
+
+    def search(self, query, limit=5, min_score=0.0):
+        """名前の類似度（gramのDice係数）の高い順に (キー, スコア) を返す"""
+        query_grams = ngrams(normalize(query))
+        sizes = self.sizes
+        scored = [(2 * common / (sizes[key] + len(query_grams)), key)
+                  for key, common in self._overlaps(query_grams).items()]
+        top = heapq.nlargest(limit, (item for item in scored if item[0] >= min_score), key=lambda item: item[0])
+        return [(key, round(score, 3)) for score, key in top]
+
+    def find_in(self, text, limit=5, min_score=0.0):
+        """文中に含まれる（または一部が含まれる）名前を探す
+
+        スコアは名前のgramのうち文中に現れる割合（1.0なら名前がそのまま含まれる可能性が高い）。
+        同じスコアでは長い名前を優先する。
+        """
+        sizes = self.sizes
+        scored = [(common / sizes[key], key)
+                  for key, common in self._overlaps(_query_grams(normalize(text))).items()
+                  if common >= min_score * sizes[key]]
+        normalized = self.normalized
+        top = heapq.nlargest(limit, scored, key=lambda item: (item[0], len(normalized[item[1]])))
+        return [(key, round(score, 3)) for score, key in top]
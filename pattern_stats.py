@@ -0,0 +1,123 @@
+import heapq
+import json
+import math
+import time
+
+
+class DecayingSpaceSaving:
+    """時間減衰付きのSpace-Savingによる頻出パターン集計
+
+    保持するパターン数はcapacityで固定。古いリクエストほど重みが小さくなる（半減期half_life秒）。
+    減衰は前方減衰（forward decay）で表現し、新しいリクエストほど大きな重みで加算するため
+    既存のカウンタを書き換える必要がない。
+    """
+    # 重みがこの値を超えたら基準時刻を更新して桁あふれを防ぐ
+    RESCALE_LIMIT = 1e100
+
+    def __init__(self, capacity=64, half_life=7 * 24 * 3600, clock=time.time):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.clock = clock
+        self.rate = math.log(2) / half_life
+        self.landmark = clock()
+        self.counters = {}  # パターン -> [重み付きカウント, 誤差上限]
+        self._heap = []  # (重み付きカウント, パターン) の遅延削除付き最小ヒープ
+
+    def __len__(self):
+        return len(self.counters)
+
+    def __bool__(self):
+        return bool(self.counters)
+
+    def _weight(self, now):
+        return math.exp(self.rate * (now - self.landmark))
+
+    def _rescale(self, now):
+        """基準時刻をnowに移してカウンタを縮小"""
+        factor = 1 / self._weight(now)
+        for counter in self.counters.values():
+            counter[0] *= factor
+            counter[1] *= factor
+        self.landmark = now
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(counter[0], item) for item, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        """最小カウントのパターンを取り出す（古いヒープ要素は読み飛ばす）"""
+        while self._heap:
+            count, item = heapq.heappop(self._heap)
+            counter = self.counters.get(item)
+            if counter is not None and counter[0] == count:
+                return item, counter
+        return None, None
+
+    def add(self, item, now=None):
+        """パターンの出現を記録"""
+        now = self.clock() if now is None else now
+        weight = self._weight(now)
+        if weight > self.RESCALE_LIMIT:
+            self._rescale(now)
+            weight = 1.0
+
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[item] = [weight, 0.0]
+        else:
+            # 最小のパターンを置き換え、そのカウントを誤差として引き継ぐ
+            evicted, evicted_counter = self._pop_min()
+            del self.counters[evicted]
+            counter = self.counters[item] = [evicted_counter[0] + weight, evicted_counter[0]]
+        heapq.heappush(self._heap, (counter[0], item))
+
+        # 古いヒープ要素が溜まりすぎたら作り直す
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def count(self, item, now=None):
+        """現在時刻における減衰後のカウント"""
+        counter = self.counters.get(item)
+        if counter is None:
+            return 0.0
+        now = self.clock() if now is None else now
+        return counter[0] / self._weight(now)
+
+    def top(self, limit=3, now=None):
+        """減衰後のカウントが大きい順に (パターン, カウント) を返す"""
+        now = self.clock() if now is None else now
+        weight = self._weight(now)
+        largest = heapq.nlargest(limit, self.counters.items(), key=lambda x: x[1][0])
+        return [(item, round(counter[0] / weight, 2)) for item, counter in largest]
+
+    def to_dict(self, now=None):
+        """永続化用の辞書（カウントは保存時点の値に換算）"""
+        now = self.clock() if now is None else now
+        weight = self._weight(now)
+        return {
+            'capacity': self.capacity,
+            'half_life': self.half_life,
+            'saved_at': now,
+            'counters': {item: [counter[0] / weight, counter[1] / weight]
+                         for item, counter in self.counters.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, clock=time.time):
+        stats = cls(capacity=data['capacity'], half_life=data['half_life'], clock=clock)
+        stats.landmark = data['saved_at']
+        stats.counters = {item: list(counter) for item, counter in data['counters'].items()}
+        stats._rebuild_heap()
+        return stats
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, clock=time.time):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f), clock=clock)
@@ -0,0 +1,242 @@
+"""永続（イミュータブル）ハッシュマップ
+
+HAMT（Hash Array Mapped Trie）による実装。更新は変更のあった経路のノードだけを複製し、
+残りのノードは更新前のマップと共有するため、1回の更新のコストはO(log n)の時間とメモリで済む。
+"""
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+
+def _hash(key):
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+def _index(bitmap, bit):
+    return bin(bitmap & (bit - 1)).count('1')
+
+
+class _Node:
+    """ビットマップで子の有無を表す内部ノード（子は _Node・_Collision・(キー, 値)）"""
+    __slots__ = ('bitmap', 'array')
+
+    def __init__(self, bitmap, array):
+        self.bitmap = bitmap
+        self.array = array
+
+
+class _Collision:
+    """ハッシュ値が完全に一致したキーの集まり"""
+    __slots__ = ('hash', 'items')
+
+    def __init__(self, key_hash, items):
+        self.hash = key_hash
+        self.items = items  # ((キー, 値), ...)
+
+
+_EMPTY_NODE = _Node(0, ())
+
+
+def _pair_node(shift, leaf1, hash1, leaf2, hash2):
+    """2つの葉を持つ部分木を作成"""
+    if shift >= _HASH_BITS:
+        return _Collision(hash1, (leaf1, leaf2))
+    bit1 = 1 << ((hash1 >> shift) & _MASK)
+    bit2 = 1 << ((hash2 >> shift) & _MASK)
+    if bit1 == bit2:
+        return _Node(bit1, (_pair_node(shift + _BITS, leaf1, hash1, leaf2, hash2),))
+    array = (leaf1, leaf2) if bit1 < bit2 else (leaf2, leaf1)
+    return _Node(bit1 | bit2, array)
+
+
+def _get(node, shift, key_hash, key, default):
+    while True:
+        if isinstance(node, _Collision):
+            for item_key, value in node.items:
+                if item_key == key:
+                    return value
+            return default
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return default
+        child = node.array[_index(node.bitmap, bit)]
+        if isinstance(child, tuple):
+            return child[1] if child[0] == key else default
+        node = child
+        shift += _BITS
+
+
+def _assoc(node, shift, key_hash, key, value):
+    """キーを設定した新しいノードと、キーが新規かどうかを返す"""
+    if isinstance(node, _Collision):
+        items = list(node.items)
+        for i, (item_key, item_value) in enumerate(items):
+            if item_key == key:
+                if item_value is value:
+                    return node, False
+                items[i] = (key, value)
+                return _Collision(node.hash, tuple(items)), False
+        return _Collision(node.hash, node.items + ((key, value),)), True
+
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    index = _index(node.bitmap, bit)
+    array = node.array
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, array[:index] + ((key, value),) + array[index:]), True
+
+    child = array[index]
+    if isinstance(child, tuple):
+        if child[0] == key:
+            if child[1] is value:
+                return node, False
+            new_child, added = (key, value), False
+        else:
+            new_child = _pair_node(shift + _BITS, child, _hash(child[0]), (key, value), key_hash)
+            added = True
+    else:
+        new_child, added = _assoc(child, shift + _BITS, key_hash, key, value)
+        if new_child is child:
+            return node, False
+    return _Node(node.bitmap, array[:index] + (new_child,) + array[index + 1:]), added
+
+
+def _dissoc(node, shift, key_hash, key):
+    """キーを削除した新しいノード（空になったらNone）と、削除したかどうかを返す"""
+    if isinstance(node, _Collision):
+        items = tuple(item for item in node.items if item[0] != key)
+        if len(items) == len(node.items):
+            return node, False
+        if len(items) == 1:
+            return items[0], True
+        return _Collision(node.hash, items), True
+
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node, False
+    index = _index(node.bitmap, bit)
+    child = node.array[index]
+    if isinstance(child, tuple):
+        if child[0] != key:
+            return node, False
+        new_child = None
+    else:
+        new_child, removed = _dissoc(child, shift + _BITS, key_hash, key)
+        if not removed:
+            return node, False
+        # 葉1つだけになった部分木は葉に縮める
+        if isinstance(new_child, _Node) and len(new_child.array) == 1 and isinstance(new_child.array[0], tuple):
+            new_child = new_child.array[0]
+
+    if new_child is None:
+        if node.bitmap == bit:
+            return None, True
+        array = node.array[:index] + node.array[index + 1:]
+        return _Node(node.bitmap & ~bit, array), True
+    return _Node(node.bitmap, node.array[:index] + (new_child,) + node.array[index + 1:]), True
+
+
+def _items(node):
+    if isinstance(node, _Collision):
+        yield from node.items
+        return
+    for child in node.array:
+        if isinstance(child, tuple):
+            yield child
+        else:
+            yield from _items(child)
+
+
+def _as_node(entry):
+    """比較用に葉・衝突ノードを (キー, 値) の辞書にする"""
+    if isinstance(entry, tuple):
+        return {entry[0]: entry[1]}
+    return dict(_items(entry))
+
+
+def _diff(a, b, shift, changed):
+    """2つの部分木の差分のキーを集める（共有しているノードは読み飛ばす）"""
+    if a is b:
+        return
+    if isinstance(a, _Node) and isinstance(b, _Node):
+        for slot in range(1 << _BITS):
+            bit = 1 << slot
+            child_a = a.array[_index(a.bitmap, bit)] if a.bitmap & bit else None
+            child_b = b.array[_index(b.bitmap, bit)] if b.bitmap & bit else None
+            if child_a is child_b:
+                continue
+            if child_a is None or child_b is None:
+                changed.update(_as_node(child_a or child_b))
+            else:
+                _diff(child_a, child_b, shift + _BITS, changed)
+        return
+    items_a = _as_node(a)
+    items_b = _as_node(b)
+    for key in items_a.keys() | items_b.keys():
+        if items_a.get(key, changed) is not items_b.get(key, changed):
+            changed[key] = True
+
+
+class PersistentMap:
+    """イミュータブルなマップ（set/deleteは新しいマップを返す）"""
+    __slots__ = ('_root', '_count')
+
+    def __init__(self, root=_EMPTY_NODE, count=0):
+        self._root = root
+        self._count = count
+
+    @classmethod
+    def from_items(cls, items):
+        result = cls()
+        for key, value in items:
+            result = result.set(key, value)
+        return result
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return _get(self._root, 0, _hash(key), key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key):
+        value = _get(self._root, 0, _hash(key), key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (key for key, _ in _items(self._root))
+
+    def get(self, key, default=None):
+        return _get(self._root, 0, _hash(key), key, default)
+
+    def items(self):
+        return _items(self._root)
+
+    def set(self, key, value):
+        root, added = _assoc(self._root, 0, _hash(key), key, value)
+        if root is self._root:
+            return self
+        return PersistentMap(root, self._count + (1 if added else 0))
+
+    def delete(self, key):
+        root, removed = _dissoc(self._root, 0, _hash(key), key)
+        if not removed:
+            return self
+        if root is None:
+            root = _EMPTY_NODE
+        elif isinstance(root, tuple):
+            # 根が葉だけになった場合はノードに包み直す
+            root, _ = _assoc(_EMPTY_NODE, 0, _hash(root[0]), root[0], root[1])
+        elif isinstance(root, _Collision):
+            root = PersistentMap.from_items(root.items)._root
+        return PersistentMap(root, self._count - 1)
+
+    def diff(self, other):
+        """値が異なる（同一オブジェクトでない）キーの一覧。共有部分は比較しない"""
+        changed = {}
+        _diff(self._root, other._root, 0, changed)
+        return list(changed)
+
+
+_MISSING = object()
@@ -0,0 +1,243 @@
+import time
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+import dates
+
+# 状態のコード（フラグの下位2ビット）
+STATUS_CODES = {'created': 0, 'in_progress': 1, 'completed': 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+# 標本の種類のフラグ
+FIRST = 4  # タスクの最初の標本（進捗の差分は0からの値）
+REMOVED = 8  # タスクの削除（残作業の計算では進捗100%として扱う）
+RESTORED = 16  # 削除したタスクの復元（取り消しなど）
+
+
+class Burndown:
+    """日ごとの残作業・完了した作業・追加（削除）された作業"""
+    def __init__(self, start, remaining, completed, added):
+        self.start = start  # 先頭の日付（序数）
+        self.remaining = remaining  # その日の終わりの残作業（重み×未完了の割合の合計）
+        self.completed = completed  # その日に進んだ作業（ベロシティ）
+        self.added = added  # その日に増えた作業（タスクの追加・削除による範囲の変化）
+
+    def __len__(self):
+        return len(self.remaining)
+
+    def ideal(self):
+        """初日の残作業から最終日に0になる理想線"""
+        if not len(self.remaining):
+            return np.zeros(0)
+        return np.linspace(self.remaining[0], 0.0, len(self.remaining))
+
+    def velocity(self, window=7):
+        """直近 window 日の1日あたりの完了した作業の移動平均"""
+        if not len(self.completed):
+            return np.zeros(0)
+        sums = np.cumsum(np.insert(self.completed, 0, 0.0))
+        counts = np.minimum(np.arange(1, len(self.completed) + 1), window)
+        return (sums[1:] - sums[np.arange(1, len(sums)) - counts]) / counts
+
+    def to_dict(self):
+        return {
+            'start': dates.to_iso(self.start),
+            'remaining': self.remaining.tolist(),
+            'completed': self.completed.tolist(),
+            'added': self.added.tolist()
+        }
+
+
+class ProgressLog:
+    """タスクの進捗率・状態の変化の時系列（標本は配列に追記し、辞書は作らない）
+
+    標本は (タスク番号, 時刻, 進捗率, フラグ) の列で持ち、時刻は前の標本との差（秒）、進捗率は
+    同じタスクの前の標本との差で記録するため、1標本10バイトで済む。差分で持つことで、バーンダウンは
+    標本ごとの残作業の増減を日ごとに足し合わせる1回のベクトル演算で求められる。
+    """
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.ids = []  # タスク番号 -> タスクID
+        self.index = {}  # タスクID -> タスク番号
+        self.base_time = None  # 最初の標本の時刻（UNIX秒）
+        self.last_time = None
+        self.tasks = array('i')  # 標本ごとのタスク番号
+        self.time_deltas = array('i')  # 前の標本からの経過秒数
+        self.progress_deltas = array('b')  # 同じタスクの前の標本からの進捗率の差
+        self.flags = array('b')  # 状態のコードと標本の種類
+        self.last_progress = array('b')  # タスク番号ごとの最後の進捗率（削除後は100）
+        self.last_flags = array('b')  # タスク番号ごとの最後のフラグ（未記録は -1）
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def nbytes(self):
+        """標本の配列のバイト数"""
+        return sum(column.itemsize * len(column)
+                   for column in (self.tasks, self.time_deltas, self.progress_deltas, self.flags))
+
+    def _task_number(self, task_id):
+        number = self.index.get(task_id)
+        if number is None:
+            number = self.index[task_id] = len(self.ids)
+            self.ids.append(task_id)
+            self.last_progress.append(0)
+            self.last_flags.append(-1)
+        return number
+
+    def _append(self, number, timestamp, progress, flags):
+        timestamp = int(self.clock() if timestamp is None else timestamp)
+        if self.base_time is None:
+            self.base_time = self.last_time = timestamp
+        self.tasks.append(number)
+        self.time_deltas.append(timestamp - self.last_time)
+        self.progress_deltas.append(progress - self.last_progress[number])
+        self.flags.append(flags)
+        self.last_time = timestamp
+        self.last_progress[number] = progress
+        self.last_flags[number] = flags
+
+    def record(self, task, timestamp=None):
+        """タスクの進捗率・状態が前の標本から変わっていれば記録し、記録したかどうかを返す"""
+        number = self._task_number(task['id'])
+        progress = int(min(100, max(0, task.get('progress') or 0)))
+        status = STATUS_CODES.get(task.get('status'), 0)
+        last = self.last_flags[number]
+        if last < 0:
+            flags = FIRST | status
+        elif last & REMOVED:
+            flags = RESTORED | status
+        elif progress == self.last_progress[number] and status == last & 3:
+            return False
+        else:
+            flags = status
+        self._append(number, timestamp, progress, flags)
+        return True
+
+    def remove(self, task_id, timestamp=None):
+        """タスクの削除を記録"""
+        number = self.index.get(task_id)
+        if number is None or self.last_flags[number] < 0 or self.last_flags[number] & REMOVED:
+            return False
+        self._append(number, timestamp, 100, REMOVED | (self.last_flags[number] & 3))
+        return True
+
+    def record_changes(self, tasks_by_id, changed_ids, timestamp=None):
+        """変更のあったタスクだけを記録（tasks_by_id: ID -> タスク、存在しなければ削除）"""
+        timestamp = self.clock() if timestamp is None else timestamp
+        for task_id in changed_ids:
+            task = tasks_by_id.get(task_id)
+            if task is None:
+                self.remove(task_id, timestamp)
+            else:
+                self.record(task, timestamp)
+
+    def sync(self, tasks, timestamp=None):
+        """タスクリスト全体との差分を記録（リストにないタスクは削除として記録）"""
+        timestamp = self.clock() if timestamp is None else timestamp
+        seen = set()
+        for task in tasks:
+            seen.add(task['id'])
+            self.record(task, timestamp)
+        for task_id in self.ids:
+            if task_id not in seen:
+                self.remove(task_id, timestamp)
+
+    def times(self):
+        """標本ごとの時刻（UNIX秒の配列）"""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        return self.base_time + np.cumsum(np.frombuffer(self.time_deltas, dtype=np.int32), dtype=np.int64)
+
+    def ordinals(self, utc_offset=None):
+        """標本ごとの日付（ローカル時刻の日の序数の配列）"""
+        if utc_offset is None:
+            utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+        return (self.times() + int(utc_offset)) // 86400 + dates.EPOCH_ORDINAL
+
+    def first_day(self):
+        """最初の標本の日付（序数、標本がなければNone）"""
+        return int(self.ordinals()[0]) if len(self) else None
+
+    def history(self, task_id):
+        """タスクの (時刻, 進捗率, 状態) のリスト（削除は状態 'removed'）"""
+        number = self.index.get(task_id)
+        if number is None:
+            return []
+        tasks = np.frombuffer(self.tasks, dtype=np.int32)
+        positions = np.flatnonzero(tasks == number)
+        progress = np.cumsum(np.frombuffer(self.progress_deltas, dtype=np.int8)[positions], dtype=np.int64)
+        flags = np.frombuffer(self.flags, dtype=np.int8)[positions]
+        return [(datetime.fromtimestamp(int(timestamp)), int(value),
+                 'removed' if flag & REMOVED else STATUS_NAMES[flag & 3])
+                for timestamp, value, flag in zip(self.times()[positions], progress, flags)]
+
+    def burndown(self, start, end, weights=None, utc_offset=None):
+        """start〜end（序数、両端を含む）の日ごとのバーンダウン
+
+        weights はタスクID -> 重み（期間の日数など、省略すると1件を1とする）。重みのないタスクは数えない。
+        start より前の標本は初日の残作業に含め、end より後の標本は無視する。
+        """
+        days = max(0, end - start + 1)
+        if not len(self) or not days:
+            return Burndown(start, np.zeros(days), np.zeros(days), np.zeros(days))
+        if weights is None:
+            task_weights = np.ones(len(self.ids))
+        else:
+            task_weights = np.array([weights.get(task_id, 0.0) for task_id in self.ids], dtype=np.float64)
+
+        tasks = np.frombuffer(self.tasks, dtype=np.int32)
+        progress = np.frombuffer(self.progress_deltas, dtype=np.int8).astype(np.float64)
+        flags = np.frombuffer(self.flags, dtype=np.int8)
+        weight = task_weights[tasks] / 100.0
+        first = (flags & FIRST) != 0
+        # 標本ごとの残作業の増減（最初の標本は 100 - 進捗率、以降は進捗率の差の符号を反転）
+        remaining_delta = weight * (np.where(first, 100.0, 0.0) - progress)
+        # 追加・削除・復元による範囲の変化と、それ以外（作業の進み）に分ける
+        scope = first | ((flags & (REMOVED | RESTORED)) != 0)
+        added = np.where(scope, remaining_delta, 0.0)
+        completed = np.where(scope, 0.0, -remaining_delta)
+
+        bins = self.ordinals(utc_offset) - start
+        before = bins < 0
+        inside = ~before & (bins < days)
+        initial = remaining_delta[before].sum()
+        per_day = np.bincount(bins[inside], weights=remaining_delta[inside], minlength=days)
+        return Burndown(start, initial + np.cumsum(per_day),
+                        np.bincount(bins[inside], weights=completed[inside], minlength=days),
+                        np.bincount(bins[inside], weights=added[inside], minlength=days))
+
+    def save(self, path):
+        """標本をnumpyの圧縮形式で保存"""
+        np.savez_compressed(
+            path, ids=np.array(self.ids, dtype=str), base_time=np.int64(self.base_time or 0),
+            tasks=np.frombuffer(self.tasks, dtype=np.int32),
+            time_deltas=np.frombuffer(self.time_deltas, dtype=np.int32),
+            progress_deltas=np.frombuffer(self.progress_deltas, dtype=np.int8),
+            flags=np.frombuffer(self.flags, dtype=np.int8))
+
+    @classmethod
+    def load(cls, path, clock=time.time):
+        log = cls(clock=clock)
+        with np.load(path) as data:
+            log.ids = data['ids'].tolist()
+            log.tasks = array('i', data['tasks'].astype(np.int32).tobytes())
+            log.time_deltas = array('i', data['time_deltas'].astype(np.int32).tobytes())
+            log.progress_deltas = array('b', data['progress_deltas'].astype(np.int8).tobytes())
+            log.flags = array('b', data['flags'].astype(np.int8).tobytes())
+            base_time = int(data['base_time'])
+        log.index = {task_id: number for number, task_id in enumerate(log.ids)}
+        if len(log):
+            log.base_time = base_time
+            log.last_time = int(log.times()[-1])
+        # タスクごとの最後の進捗率とフラグを標本から復元
+        tasks = np.frombuffer(log.tasks, dtype=np.int32)
+        totals = np.bincount(tasks, weights=np.frombuffer(log.progress_deltas, dtype=np.int8),
+                             minlength=len(log.ids))
+        last_flags = np.full(len(log.ids), -1, dtype=np.int8)
+        numbers, last = np.unique(tasks[::-1], return_index=True)  # タスクごとの最後の標本
+        last_flags[numbers] = np.frombuffer(log.flags, dtype=np.int8)[len(tasks) - 1 - last]
+        log.last_progress = array('b', totals.astype(np.int8).tobytes())
+        log.last_flags = array('b', last_flags.tobytes())
+        return log
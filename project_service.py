@@ -0,0 +1,484 @@
+"""プロジェクト共有サービス
+
+タスクを1か所で保持し、複数のクライアント（TkのUI・スクリプト）から同時に読み書きできるようにする。
+通信は1行1メッセージのJSON（TCPまたはUnixソケット）。
+
+使い方:
+    python project_service.py --port 8765              # 127.0.0.1:8765 で待ち受け
+    python project_service.py --unix /tmp/gantt.sock   # Unixソケットで待ち受け
+    GANTT_SERVICE=127.0.0.1:8765 python gantt_app_tk.py
+
+リクエスト（id はそのまま応答に含まれる）:
+    {"id": 1, "op": "get"}
+    {"id": 2, "op": "mutate", "mutations": [{"type": "command", "text": "設計を完了"}, ...]}
+    {"id": 3, "op": "subscribe"}
+変更通知（subscribe したクライアントに送信）:
+    {"event": "changed", "version": 3, "tasks": [変更・追加されたタスク], "removed": [ID], "order": [ID]}
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+
+from agents import TaskAgent, DialogueAgent
+from effort_rollup import EffortRollup
+from name_index import TrigramIndex
+from task_history import TaskHistory, TaskSnapshot
+from task_merge import import_key, merge_tasks, task_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_LINE = 16 * 1024 * 1024  # 1メッセージの上限（バイト）
+
+
+class ServiceError(Exception):
+    """サービスがエラーを返した"""
+
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+
+def apply_change(tasks, event):
+    """変更通知をタスクリストに反映した新しいリストを返す（変更のないタスクは共有する）"""
+    by_id = {task['id']: task for task in tasks}
+    for task_id in event.get('removed', []):
+        by_id.pop(task_id, None)
+    order = event.get('order')
+    if order is None:
+        order = [task['id'] for task in tasks if task['id'] in by_id]
+        order += [task['id'] for task in event.get('tasks', []) if task['id'] not in by_id]
+    for task in event.get('tasks', []):
+        by_id[task['id']] = task
+    return [by_id[task_id] for task_id in order if task_id in by_id]
+
+
+class _Batch:
+    """1回の apply で作る次の版（変更したタスクIDと、表示順が変わったか）
+
+    タスク名のインデックスは変更のたびに更新する（同じバッチの後のコマンドが新しい名前を使えるように）。
+    """
+    __slots__ = ('snapshot', 'changed', 'reordered', 'results', 'name_index')
+
+    def __init__(self, snapshot, name_index):
+        self.snapshot = snapshot
+        self.changed = {}  # 変更したタスクID（順序付きの集合として使う）
+        self.reordered = False
+        self.results = []
+        self.name_index = name_index
+
+    def put(self, tasks):
+        """タスクを同じ位置で差し替え、新しいタスクは末尾に追加（変更したタスク数に比例）"""
+        current = self.snapshot.tasks
+        new_ids = []
+        for task in tasks:
+            if task['id'] not in current:
+                new_ids.append(task['id'])
+            current = current.set(task['id'], task)
+        order = self.snapshot.order + tuple(new_ids) if new_ids else self.snapshot.order
+        self._advance(TaskSnapshot(current, order), [task['id'] for task in tasks])
+
+    def reorder(self, snapshot):
+        """表示順の変わる変更（削除・置き換え）を反映"""
+        self._advance(snapshot, self.snapshot.tasks.diff(snapshot.tasks))
+        self.reordered = True
+
+    def _advance(self, snapshot, task_ids):
+        self.snapshot = snapshot
+        self.changed.update(dict.fromkeys(task_ids))
+        self.name_index.apply_changes(snapshot.tasks, task_ids)
+
+
+class ProjectStore:
+    """サービスが保持するタスク集合（変更は直列に適用する）
+
+    変更は prepare で次の版を作り、commit で履歴に記録する。commit は変更したタスク数に比例するので
+    イベントループ上で行い、タスク全体を扱う変更（コマンド・削除・置き換え）を含む prepare はサービスが
+    イベントループの外で実行する。
+    """
+    def __init__(self, tasks=()):
+        self.task_agent = TaskAgent()
+        self.dialogue_agent = DialogueAgent()
+        self.history = TaskHistory()
+        self.effort_rollup = EffortRollup()
+        self.name_index = TrigramIndex()  # コマンドのタスク名解決用（変更のあったタスクだけ更新）
+        self.version = 0
+        if tasks:
+            self.history.reset(self.task_agent.validate_tasks([dict(task) for task in tasks]))
+            self.name_index.sync(self.tasks)
+
+    @property
+    def tasks(self):
+        return self.history.current.to_list()
+
+    def snapshot(self):
+        return {'version': self.version, 'tasks': self.tasks}
+
+    def apply(self, mutations):
+        """変更をまとめて適用し、(各変更の結果, 変更通知またはNone) を返す
+
+        1回の呼び出しは1つの版として記録し、通知も1回にまとめる。
+        """
+        return self.commit(self.prepare(mutations))
+
+    def prepare(self, mutations):
+        """変更を順に適用した次の版を作る（履歴はまだ変えない。commit で記録する）"""
+        batch = _Batch(self.history.current, self.name_index)
+        for mutation in mutations:
+            try:
+                message = self._apply_one(batch, mutation)
+                batch.results.append({'ok': True, 'message': message})
+            except Exception as e:
+                logger.error(f"変更の適用に失敗: {str(e)}")
+                batch.results.append({'ok': False, 'error': str(e)})
+        return batch
+
+    def commit(self, batch):
+        """prepare で作った版を記録し、(各変更の結果, 変更通知またはNone) を返す"""
+        previous = self.history.current
+        if batch.reordered:
+            # 内容の変わらないタスクは元のオブジェクトに戻し、変更として扱わない
+            tasks = batch.snapshot.tasks
+            for task_id in batch.changed:
+                old, new = previous.tasks.get(task_id), tasks.get(task_id)
+                if new is not None and _unchanged(old, new) is old:
+                    tasks = tasks.set(task_id, old)
+            changed = self.history.commit_snapshot(TaskSnapshot(tasks, batch.snapshot.order), 'service')
+        else:
+            updated, appended = [], []
+            for task_id in batch.changed:
+                old, new = previous.tasks.get(task_id), batch.snapshot.tasks[task_id]
+                if old is None:
+                    appended.append(new)
+                elif _unchanged(old, new) is not old:
+                    updated.append(new)
+            changed = self.history.commit_changes(updated, appended, 'service')
+        current = self.history.current
+        if not changed and (current.order is previous.order or current.order == previous.order):
+            return batch.results, None
+        self.version += 1
+        event = {
+            'event': 'changed',
+            'version': self.version,
+            'tasks': [current.tasks[task_id] for task_id in changed if task_id in current.tasks],
+            'removed': [task_id for task_id in changed if task_id not in current.tasks]
+        }
+        if batch.reordered and current.order != previous.order:
+            event['order'] = list(current.order)
+        return batch.results, event
+
+    def _apply_one(self, batch, mutation):
+        kind = mutation.get('type')
+        snapshot = batch.snapshot
+        if kind == 'command':
+            # DialogueAgentのコマンド（複数行可）。変更したタスクだけを検証して反映する
+            tasks = snapshot.to_list()
+            response = self.dialogue_agent.process_input(mutation.get('text', ''), tasks, self.name_index)
+            if response.get('action') != 'update_tasks':
+                raise ValueError(response.get('message', 'コマンドを認識できませんでした'))
+            batch.put(self.task_agent.process_tasks(
+                [new for new, old in zip(response['tasks'], tasks) if new is not old]))
+            return response.get('message')
+        if kind == 'add_tasks':
+            # 既存のIDは末尾に移す
+            added = self.task_agent.validate_tasks([dict(task) for task in mutation.get('tasks', [])])
+            ids = {task['id'] for task in added}
+            existing = [task_id for task_id in ids if task_id in snapshot.tasks]
+            if existing:
+                tasks = snapshot.tasks
+                for task_id in existing:
+                    tasks = tasks.delete(task_id)
+                batch.reorder(TaskSnapshot(tasks, tuple(task_id for task_id in snapshot.order if task_id not in ids)))
+            batch.put(added)
+            return f"{len(added)}件のタスクを追加しました"
+        if kind == 'upsert_tasks':
+            # 再インポート（IDで突き合わせ、元データの変わった項目だけ更新）
+            incoming = self.task_agent.validate_tasks([dict(task) for task in mutation.get('tasks', [])])
+            result = merge_tasks(snapshot.tasks, incoming)
+            batch.put(result.updated + result.appended)
+            return result.summary()
+        if kind == 'update_tasks':
+            # 既存のタスクを同じ位置で差し替え（存在しないIDは無視）
+            incoming = self.task_agent.validate_tasks([dict(task) for task in mutation.get('tasks', [])])
+            updated = [task for task in incoming if task['id'] in snapshot.tasks]
+            batch.put(updated)
+            return f"{len(updated)}件のタスクを更新しました"
+        if kind == 'replace_tasks':
+            replaced = self.task_agent.validate_tasks([dict(task) for task in mutation.get('tasks', [])])
+            batch.reorder(snapshot.with_tasks(replaced))
+            return f"{len(replaced)}件のタスクに置き換えました"
+        if kind == 'remove_tasks':
+            ids = set(mutation.get('ids', []))
+            tasks = snapshot.tasks
+            for task_id in ids & set(snapshot.order):
+                tasks = tasks.delete(task_id)
+            batch.reorder(TaskSnapshot(tasks, tuple(task_id for task_id in snapshot.order if task_id not in ids)))
+            return f"{len(ids)}件のタスクを削除しました"
+        if kind == 'add_entries':
+            return self._add_entries(batch, mutation.get('entries', []))
+        raise ValueError(f"不明な変更の種類: {kind}")
+
+    def _add_entries(self, batch, entries):
+        """時間記録の明細を追加し、チケットごとのタスクを作成・更新（IDはインポートと同じくキーから決まる）"""
+        keys = self.effort_rollup.add_entries(entries)
+        rolled_up = self.effort_rollup.to_tasks(keys)
+        incoming = self.task_agent.validate_tasks([{
+            'id': task_id(import_key(raw_task)),
+            'name': raw_task['name'],
+            'start_date': raw_task['start_date'],
+            'end_date': raw_task['end_date'],
+            'progress': raw_task['progress'],
+            'parent': task_id(raw_task['parent']) if raw_task.get('parent') is not None else None,
+            'metadata': {'duration': raw_task['duration'], 'original_data': raw_task}
+        } for raw_task in rolled_up])
+        result = merge_tasks(batch.snapshot.tasks, incoming)
+        batch.put(result.updated + result.appended)
+        return f"{len(entries)}件の明細を{len(rolled_up)}件のチケットに反映しました"
+
+
+def _unchanged(old, new):
+    return old if old is not None and old is not new and old == new else new
+
+
+class _Connection:
+    """1クライアント分の送信キュー（応答と通知を1本の書き込みタスクで順に送る）"""
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.outgoing = asyncio.Queue(queue_size)
+        self.subscribed = False
+        self.overflowed = False  # 通知を取りこぼした（再取得が必要）
+
+    def notify(self, data):
+        try:
+            self.outgoing.put_nowait(data)
+        except asyncio.QueueFull:
+            # 読み出しの遅いクライアントのために他を待たせない
+            self.overflowed = True
+
+    async def send_loop(self, store):
+        try:
+            while True:
+                data = await self.outgoing.get()
+                if data is None:
+                    return
+                self.writer.write(data)
+                await self.writer.drain()
+                if self.overflowed and self.outgoing.empty():
+                    self.overflowed = False
+                    self.writer.write(encode({'event': 'resync', 'version': store.version}))
+                    await self.writer.drain()
+        except (ConnectionError, OSError):
+            pass
+
+
+class ProjectService:
+    """タスク集合を保持する非同期サービス（1スレッドのイベントループで多数のクライアントを処理）"""
+    def __init__(self, store=None, queue_size=256):
+        self.store = store or ProjectStore()
+        self.queue_size = queue_size
+        self.connections = set()
+        self.server = None
+        self.address = None
+        self._mutate_lock = asyncio.Lock()  # 変更は1件ずつ（prepare から commit まで）
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """待ち受けを開始（port=0 なら空いているポート）。待ち受けアドレスを返す"""
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=path, limit=MAX_LINE)
+            self.address = path
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+            self.address = self.server.sockets[0].getsockname()[:2]
+        logger.info(f"プロジェクトサービスを開始しました: {self.address}")
+        return self.address
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for connection in list(self.connections):
+                connection.writer.close()
+            await self.server.wait_closed()
+
+    def broadcast(self, event):
+        """購読中の全クライアントに通知（エンコードは1回だけ）"""
+        data = encode(event)
+        for connection in self.connections:
+            if connection.subscribed:
+                connection.notify(data)
+
+    async def mutate(self, mutations):
+        """変更を適用（タスク数に比例する prepare はスレッドで実行し、その間も他のクライアントに応答する）"""
+        async with self._mutate_lock:
+            loop = asyncio.get_running_loop()
+            batch = await loop.run_in_executor(None, self.store.prepare, mutations)
+            return self.store.commit(batch)
+
+    async def handle_client(self, reader, writer):
+        connection = _Connection(writer, self.queue_size)
+        self.connections.add(connection)
+        sender = asyncio.create_task(connection.send_loop(self.store))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.dispatch(connection, line)
+                await connection.outgoing.put(encode(response))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.warning(f"クライアントとの通信を終了: {str(e)}")
+        finally:
+            self.connections.discard(connection)
+            try:
+                connection.outgoing.put_nowait(None)
+            except asyncio.QueueFull:
+                sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            writer.close()
+
+    async def dispatch(self, connection, line):
+        """1件のリクエストを処理して応答を返す"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            op = request.get('op')
+            if op == 'get':
+                response = dict(self.store.snapshot(), ok=True)
+            elif op == 'mutate':
+                results, event = await self.mutate(request.get('mutations', []))
+                response = {'ok': True, 'version': self.store.version, 'results': results}
+                if event is not None:
+                    self.broadcast(event)
+            elif op == 'subscribe':
+                connection.subscribed = True
+                response = dict(self.store.snapshot(), ok=True)
+            elif op == 'unsubscribe':
+                connection.subscribed = False
+                response = {'ok': True}
+            elif op == 'ping':
+                response = {'ok': True, 'version': self.store.version}
+            else:
+                raise ValueError(f"不明な操作: {op}")
+        except Exception as e:
+            logger.error(f"リクエストの処理に失敗: {str(e)}")
+            response = {'ok': False, 'error': str(e)}
+        response['id'] = request_id
+        return response
+
+
+class ProjectClient:
+    """サービスの同期クライアント（スクリプト・TkのUI用）
+
+    受信は別スレッドで行い、応答はリクエストIDで待ち合わせ、変更通知は events キューに入れる。
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, timeout=10):
+        if path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout=timeout)
+            self.sock.settimeout(None)
+        self.timeout = timeout
+        self.events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, name='project-client', daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def from_address(cls, address, **kwargs):
+        """'host:port' またはUnixソケットのパスから接続"""
+        if ':' in address and not os.path.exists(address):
+            host, port = address.rsplit(':', 1)
+            return cls(host, int(port), **kwargs)
+        return cls(path=address, **kwargs)
+
+    def _read_loop(self):
+        try:
+            with self.sock.makefile('rb') as stream:
+                for line in stream:
+                    message = json.loads(line)
+                    if 'event' in message:
+                        self.events.put(message)
+                        continue
+                    waiter = self._waiting.pop(message.get('id'), None)
+                    if waiter is not None:
+                        waiter.put(message)
+        except (OSError, ValueError) as e:
+            logger.warning(f"サービスとの接続が切れました: {str(e)}")
+        finally:
+            self.events.put({'event': 'closed'})
+            for waiter in list(self._waiting.values()):
+                waiter.put({'ok': False, 'error': '接続が切れました'})
+
+    def request(self, op, **payload):
+        """リクエストを送信して応答を返す（エラー応答は ServiceError）"""
+        request_id = next(self._ids)
+        waiter = queue.Queue(1)
+        self._waiting[request_id] = waiter
+        with self._lock:
+            self.sock.sendall(encode(dict(payload, id=request_id, op=op)))
+        try:
+            response = waiter.get(timeout=self.timeout)
+        except queue.Empty:
+            self._waiting.pop(request_id, None)
+            raise ServiceError(f"応答がありません: {op}")
+        if not response.get('ok'):
+            raise ServiceError(response.get('error', '不明なエラー'))
+        return response
+
+    def get_tasks(self):
+        return self.request('get')['tasks']
+
+    def subscribe(self):
+        """変更通知の購読を開始し、現在のタスクリストを返す"""
+        return self.request('subscribe')['tasks']
+
+    def mutate(self, mutations):
+        return self.request('mutate', mutations=mutations)
+
+    def command(self, text):
+        """DialogueAgentのコマンドを実行"""
+        return self.mutate([{'type': 'command', 'text': text}])
+
+    def add_entries(self, entries):
+        """時間記録の明細を送信"""
+        return self.mutate([{'type': 'add_entries', 'entries': entries}])
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    service = ProjectService()
+    await service.start(host, port, path)
+    async with service.server:
+        await service.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='プロジェクト共有サービス')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help='Unixソケットのパス（指定時はTCPの代わりに使用）')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import math
+
+# ヒットテストで優先する図形の種類（小さいほど優先）
+KIND_PRIORITY = {'bar': 0, 'summary': 1, 'arrow': 2}
+
+
+class GridIndex:
+    """キャンバス上の図形（タスクバーの矩形・依存関係の線分）の階層グリッド索引
+
+    レベル (i, j) のセルは基本セルの幅の 2^i 倍・高さの 2^j 倍で、図形は外接矩形が収まるレベルに
+    登録するため、どの図形も高々4セルにしか入らない（長いバーや何行もまたぐ矢印でも追加・削除は定数時間）。
+    点の問い合わせは使われているレベルごとに1セルずつ見て、その候補だけを正確に判定する。
+    図形はキー（タスクID）ごとにまとめて追加・削除でき、行を描き直したときはその行のキーだけを入れ替える。
+    """
+    def __init__(self, cell_width=256, cell_height=64, tolerance=4):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.tolerance = tolerance  # 線分のヒット判定の幅（ピクセル）
+        self.cells = {}  # (レベル, 列, 行) -> キーの集合（レベルは (幅の段, 高さの段)）
+        self.shapes = {}  # キー -> [(種類, 図形, 座標, セルのリスト)]
+        self.level_counts = {}  # レベル -> 登録されている図形の数
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def __contains__(self, key):
+        return key in self.shapes
+
+    def clear(self):
+        self.cells.clear()
+        self.shapes.clear()
+        self.level_counts.clear()
+
+    def _cells(self, x1, y1, x2, y2):
+        """外接矩形が収まるレベルのセル（高々 2×2）"""
+        x_level, y_level = _level(x2 - x1, self.cell_width), _level(y2 - y1, self.cell_height)
+        cw, ch = self.cell_width << x_level, self.cell_height << y_level
+        level = (x_level, y_level)
+        return level, [(level, col, row)
+                       for col in range(math.floor(x1 / cw), math.floor(x2 / cw) + 1)
+                       for row in range(math.floor(y1 / ch), math.floor(y2 / ch) + 1)]
+
+    def _register(self, key, kind, shape, coords, bbox):
+        level, cells = self._cells(*bbox)
+        grid = self.cells
+        for cell in cells:
+            keys = grid.get(cell)
+            if keys is None:
+                grid[cell] = {key}
+            else:
+                keys.add(key)
+        self.level_counts[level] = self.level_counts.get(level, 0) + 1
+        shapes = self.shapes.get(key)
+        if shapes is None:
+            self.shapes[key] = [(kind, shape, coords, cells)]
+        else:
+            shapes.append((kind, shape, coords, cells))
+
+    def add_rect(self, key, x1, y1, x2, y2, kind='bar'):
+        """矩形を追加"""
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        self._register(key, kind, 'rect', (x1, y1, x2, y2), (x1, y1, x2, y2))
+
+    def add_segment(self, key, x1, y1, x2, y2, kind='arrow'):
+        """線分を追加（判定の幅の分だけ広げた外接矩形で登録する）"""
+        t = self.tolerance
+        bbox = (min(x1, x2) - t, min(y1, y2) - t, max(x1, x2) + t, max(y1, y2) + t)
+        self._register(key, kind, 'segment', (x1, y1, x2, y2), bbox)
+
+    def remove(self, key):
+        """キーの図形をすべて削除"""
+        for _, _, _, cells in self.shapes.pop(key, ()):
+            level = cells[0][0]
+            self.level_counts[level] -= 1
+            if not self.level_counts[level]:
+                del self.level_counts[level]
+            for cell in cells:
+                keys = self.cells.get(cell)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.cells[cell]
+
+    def query(self, x, y):
+        """点 (x, y) にかかる図形を (優先度, 距離, キー, 種類) の昇順で返す"""
+        hits = []
+        seen = set()
+        for level in self.level_counts:
+            keys = self.cells.get((level, math.floor(x / (self.cell_width << level[0])),
+                                   math.floor(y / (self.cell_height << level[1]))))
+            if keys:
+                seen.update(keys)
+        for key in seen:
+            for kind, shape, coords, _ in self.shapes[key]:
+                distance = _rect_distance(coords, x, y) if shape == 'rect' else _segment_distance(coords, x, y)
+                if distance <= (0 if shape == 'rect' else self.tolerance):
+                    hits.append((KIND_PRIORITY.get(kind, 9), distance, str(key), key, kind))
+        hits.sort()
+        return [(priority, distance, key, kind) for priority, distance, _, key, kind in hits]
+
+    def hit(self, x, y):
+        """点 (x, y) の最前面の図形の (キー, 種類)（なければ None）"""
+        hits = self.query(x, y)
+        return (hits[0][2], hits[0][3]) if hits else None
+
+    def bounds(self, key, kind='bar'):
+        """キーの指定した種類の図形の座標"""
+        for shape_kind, _, coords, _ in self.shapes.get(key, ()):
+            if shape_kind == kind:
+                return coords
+        return None
+
+
+def _level(size, cell_size):
+    """size が収まる最小の段（セルの大きさ cell_size × 2^段）"""
+    level = 0
+    while cell_size << level < size:
+        level += 1
+    return level
+
+
+def _rect_distance(coords, x, y):
+    x1, y1, x2, y2 = coords
+    return 0 if x1 <= x <= x2 and y1 <= y <= y2 else math.inf
+
+
+def _segment_distance(coords, x, y):
+    x1, y1, x2, y2 = coords
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    ratio = 0.0 if length == 0 else max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length))
+    return math.hypot(x - (x1 + ratio * dx), y - (y1 + ratio * dy))
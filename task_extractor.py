@@ -0,0 +1,228 @@
+import math
+import re
+import threading
+import unicodedata
+from datetime import date
+
+import dates
+
+# 日付（年月日・月日・相対表現）
+_MONTHS = {name: i + 1 for i, names in enumerate([
+    ('jan', 'january'), ('feb', 'february'), ('mar', 'march'), ('apr', 'april'), ('may',), ('jun', 'june'),
+    ('jul', 'july'), ('aug', 'august'), ('sep', 'sept', 'september'), ('oct', 'october'),
+    ('nov', 'november'), ('dec', 'december')]) for name in names}
+_WEEKDAYS = {name: i for i, names in enumerate([
+    ('月', 'mon', 'monday'), ('火', 'tue', 'tuesday'), ('水', 'wed', 'wednesday'), ('木', 'thu', 'thursday'),
+    ('金', 'fri', 'friday'), ('土', 'sat', 'saturday'), ('日', 'sun', 'sunday')]) for name in names}
+_RELATIVE_DAYS = {'今日': 0, '本日': 0, '明日': 1, 'あした': 1, '明後日': 2, 'あさって': 2,
+                  'today': 0, 'tomorrow': 1}
+
+_MONTH_NAMES = '|'.join(sorted(_MONTHS, key=len, reverse=True))
+_DATE_PATTERN = re.compile(
+    r'(?P<ymd>(?P<y>\d{4})[-/.年](?P<m>\d{1,2})[-/.月](?P<d>\d{1,2})日?)'
+    r'|(?P<md>(?<![\d/])(?P<m2>\d{1,2})(?:/|月)(?P<d2>\d{1,2})日?(?![\d/]))'
+    r'|(?P<en>\b(?P<mname>' + _MONTH_NAMES + r')\.?\s+(?P<d3>\d{1,2})(?:st|nd|rd|th)?\b)'
+    r'|(?P<rel>' + '|'.join(_RELATIVE_DAYS) + r')'
+    r'|(?P<wd>(?P<next>来週|next\s+)?(?P<wdname>[月火水木金土日](?=曜)|\b(?:monday|tuesday|wednesday|thursday'
+    r'|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)\b)(?:曜日?)?)'
+    r'|(?P<nextweek>来週|next\s+week)',
+    re.IGNORECASE)
+# 期間（日数・週数・時間）
+_DURATION_PATTERN = re.compile(
+    r'(?P<n>\d+(?:\.\d+)?)\s*(?P<unit>営業日|日間|日|週間|週|時間|business\s+days?|days?|weeks?|hours?|h)(?![a-z])',
+    re.IGNORECASE)
+# 依存関係（「Xに依存」「Xの後」「after X」など）
+_DEPENDENCY_PATTERN = re.compile(
+    r'(?P<ja>(?:^|(?<=[、,\s]))(?P<dep>[^、,\s]+?)(?:に依存|が終わってから|が終わったら|の完了後|完了後|の後|のあと)(?:に|で|から)?)'
+    r'|(?P<en>\b(?:depends\s+on|depending\s+on|after)\s+(?P<dep2>[^、,]+?)\s*(?=[、,]|$))',
+    re.IGNORECASE)
+# 語句の区切り（英語の単語間の空白はタスク名の一部として残す）
+_SEPARATOR_PATTERN = re.compile(r'[、,。;；:：〜~]+|\s{2,}|(?<=[^\x00-\x7f])\s+|\s+(?=[^\x00-\x7f])')
+# タスク名の前後から取り除く補助語
+_NAME_PREFIX_PATTERN = re.compile(r'^(?:(?:create|add|new)\s+(?:task\s+)?|task\s*[:：]?\s+|タスク(?:[:：「]|\s+))',
+                                  re.IGNORECASE)
+_NAME_SUFFIX_PATTERN = re.compile(
+    r'(?:」?(?:を作成|を追加|を登録|から|より|まで|で|に|を|は|して|する|します|を開始|開始)'
+    r'|\s+(?:starting|start|from|for|on|until|to|in|by|of|lasting|taking))$',
+    re.IGNORECASE)
+_FILLER_PATTERN = re.compile(
+    r'(?:から|より|まで|で|に|を|は|作成|追加|登録|開始|タスク|starting|start|from|for|on|until|to|in|by|of'
+    r'|lasting|taking|create|add|new|task)',
+    re.IGNORECASE)
+
+# タスク名らしくない（依頼文・会話文の）表現
+_CONVERSATIONAL_PATTERN = re.compile(
+    r'(?:て|た|たい|ください|下さい|おいて|しておく|ほしい|欲しい|かな|よね|ですか|ますか|[?？]|please|could|would)$'
+    r'|(?:なんか|たぶん|とりあえず|いい感じ|良い感じ|適当)',
+    re.IGNORECASE)
+
+_UNIT_DAYS = {'営業日': 1, '日間': 1, '日': 1, 'day': 1, 'days': 1, 'business day': 1, 'business days': 1,
+              '週間': 5, '週': 5, 'week': 5, 'weeks': 5}
+_UNIT_HOURS = {'時間', 'hour', 'hours', 'h'}
+
+
+class ExtractionResult:
+    """ローカル抽出の結果（タスク情報と確信度）"""
+    __slots__ = ('info', 'confidence', 'leftover')
+
+    def __init__(self, info, confidence, leftover=''):
+        self.info = info
+        self.confidence = confidence
+        self.leftover = leftover  # 解釈できなかった部分
+
+    def __bool__(self):
+        return bool(self.info.get('name'))
+
+
+class RuleBasedExtractor:
+    """正規表現による日本語・英語のタスク情報抽出（モデルを呼ばずに定型文を処理する）
+
+    日付・期間・依存関係を取り出した残りをタスク名とし、解釈できなかった文字の割合から確信度を求める。
+    期間は稼働日数で返す（週は5日、時間は hours_per_day で割って切り上げ）。
+    """
+    def __init__(self, hours_per_day=8, clock=None):
+        self.hours_per_day = hours_per_day
+        self.clock = clock or dates.today  # 基準日（序数）を返す関数
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # 集計は複数のスレッドから更新される
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hit_rate, 3)}
+
+    def record(self, hit):
+        """高速経路で処理できたかどうかを記録"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def extract(self, text):
+        """テキストからタスク情報を抽出し、ExtractionResult を返す"""
+        text = unicodedata.normalize('NFKC', text or '').strip()
+        if not text:
+            return ExtractionResult({}, 0.0)
+        today = self.clock()
+        info = {}
+        recognized = []  # 解釈済みの範囲
+
+        dependency = _DEPENDENCY_PATTERN.search(text)
+        if dependency:
+            info['depends_on'] = (dependency.group('dep') or dependency.group('dep2')).strip()
+            recognized.append(dependency.span())
+
+        found_dates = []
+        for match in _DATE_PATTERN.finditer(text):
+            if _overlaps(match.span(), recognized):
+                continue
+            ordinal = self._resolve_date(match, today)
+            if ordinal:
+                found_dates.append(ordinal)
+                recognized.append(match.span())
+        if found_dates:
+            info['start_date'] = dates.to_iso(found_dates[0])
+            if len(found_dates) > 1 and found_dates[1] >= found_dates[0]:
+                info['end_date'] = dates.to_iso(found_dates[1])
+
+        for match in _DURATION_PATTERN.finditer(text):
+            if _overlaps(match.span(), recognized):
+                continue
+            days = self._duration_days(float(match.group('n')), match.group('unit'))
+            if days is not None:
+                info['duration'] = days
+                recognized.append(match.span())
+                break
+
+        # 解釈済みの範囲で区切り、最初に残った語句をタスク名、それ以外を解釈できなかった部分とする
+        chars = list(text)
+        for start, end in recognized:
+            chars[start:end] = ['\x00'] * (end - start)
+        pieces = []
+        for chunk in ''.join(chars).split('\x00'):
+            pieces.extend(_strip_name(piece) for piece in _SEPARATOR_PATTERN.split(chunk))
+        pieces = [piece for piece in pieces if piece]
+        name = pieces[0] if pieces else ''
+        if name:
+            info['name'] = name
+        return ExtractionResult(info, self._confidence(text, name, pieces[1:]), ' '.join(pieces[1:]))
+
+    def _confidence(self, text, name, leftover):
+        if not name:
+            return 0.0
+        # 解釈できなかった文字は2倍に数え、取りこぼしが多い文ほど早くモデルに回す
+        unknown = sum(len(s) for s in leftover)
+        confidence = 1.0 - 2 * unknown / len(text)
+        if len(name) > 40 or _CONVERSATIONAL_PATTERN.search(name):
+            confidence *= 0.5
+        # タスク名に数字の区切りが残っている場合は日付の取りこぼしの可能性がある
+        if re.search(r'\d+[/月]\d+', name):
+            confidence *= 0.5
+        return round(max(0.0, confidence), 3)
+
+    def _resolve_date(self, match, today):
+        try:
+            if match.group('ymd'):
+                return date(int(match.group('y')), int(match.group('m')), int(match.group('d'))).toordinal()
+            if match.group('md'):
+                return _nearest_year(int(match.group('m2')), int(match.group('d2')), today)
+            if match.group('en'):
+                return _nearest_year(_MONTHS[match.group('mname').lower()], int(match.group('d3')), today)
+        except ValueError:
+            return None
+        if match.group('rel'):
+            return today + _RELATIVE_DAYS[match.group('rel').lower()]
+        if match.group('wd'):
+            weekday = _WEEKDAYS[match.group('wdname').lower()]
+            days_ahead = (weekday - date.fromordinal(today).weekday()) % 7
+            if match.group('next'):
+                # 来週の指定曜日
+                return today - date.fromordinal(today).weekday() + 7 + weekday
+            return today + days_ahead
+        if match.group('nextweek'):
+            # 来週の月曜日
+            return today - date.fromordinal(today).weekday() + 7
+        return None
+
+    def _duration_days(self, number, unit):
+        unit = re.sub(r'\s+', ' ', unit.lower())
+        if unit in _UNIT_HOURS:
+            return max(1, math.ceil(number / self.hours_per_day))
+        if unit in _UNIT_DAYS:
+            return max(1, math.ceil(number * _UNIT_DAYS[unit]))
+        return None
+
+
+def _overlaps(span, spans):
+    return any(span[0] < end and start < span[1] for start, end in spans)
+
+
+def _strip_name(name):
+    """前後の補助語を取り除く（補助語だけなら空文字）"""
+    name = name.strip(' \x00「」"\'')
+    previous = None
+    while previous != name:
+        previous = name
+        name = _NAME_PREFIX_PATTERN.sub('', name)
+        name = _NAME_SUFFIX_PATTERN.sub('', name).strip(' 「」"\'')
+    return '' if _FILLER_PATTERN.fullmatch(name) else name
+
+
+def _nearest_year(month, day, today):
+    """年の省略された月日を、基準日に最も近い年の日付にする"""
+    year = date.fromordinal(today).year
+    candidates = []
+    for y in (year - 1, year, year + 1):
+        try:
+            candidates.append(date(y, month, day).toordinal())
+        except ValueError:
+            continue
+    if not candidates:
+        raise ValueError(f"無効な日付: {month}/{day}")
+    return min(candidates, key=lambda ordinal: abs(ordinal - today))
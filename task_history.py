@@ -0,0 +1,110 @@
+from persistent_map import PersistentMap
+
+
+class TaskSnapshot:
+    """ある時点のタスク集合（IDからタスクへの永続マップと表示順）
+
+    変更のないタスクや表示順は前の版と共有する。保持しているタスクの辞書は書き換えないこと。
+    """
+    __slots__ = ('tasks', 'order')
+
+    def __init__(self, tasks=None, order=()):
+        self.tasks = tasks if tasks is not None else PersistentMap()
+        self.order = order  # タスクIDのタプル
+
+    def to_list(self):
+        return [self.tasks[task_id] for task_id in self.order]
+
+    def with_tasks(self, task_list):
+        """タスクリストから次の版を作成（同一オブジェクトのタスクは共有したまま）"""
+        tasks = self.tasks
+        for task in task_list:
+            tasks = tasks.set(task['id'], task)
+        order = tuple(task['id'] for task in task_list)
+        if order == self.order:
+            order = self.order
+        else:
+            for task_id in set(self.order) - set(order):
+                tasks = tasks.delete(task_id)
+        return TaskSnapshot(tasks, order)
+
+
+class TaskHistory:
+    """タスク編集の取り消し・やり直し履歴
+
+    各版は構造を共有した永続マップなので、1回の編集で増えるメモリは変更したタスク数×O(log n)。
+    """
+    def __init__(self, limit=500):
+        self.limit = limit
+        self.current = TaskSnapshot()
+        self.undo_stack = []  # (版, 操作名)
+        self.redo_stack = []
+
+    def commit(self, task_list, label=''):
+        """新しい版を記録し、変更のあったタスクIDを返す"""
+        return self._advance(self.current.with_tasks(task_list), label)
+
+    def commit_changes(self, updated=(), appended=(), label=''):
+        """一部のタスクの差し替えと末尾への追加だけを記録（タスク全体を走査しない）"""
+        tasks = self.current.tasks
+        for task in updated:
+            tasks = tasks.set(task['id'], task)
+        new_ids = []
+        for task in appended:
+            if task['id'] not in tasks:
+                new_ids.append(task['id'])
+            tasks = tasks.set(task['id'], task)
+        order = self.current.order + tuple(new_ids) if new_ids else self.current.order
+        return self._advance(TaskSnapshot(tasks, order), label)
+
+    def commit_snapshot(self, snapshot, label=''):
+        """作成済みの版（TaskSnapshot）を記録し、変更のあったタスクIDを返す"""
+        return self._advance(snapshot, label)
+
+    def _advance(self, snapshot, label):
+        """新しい版に進め、変更のあったタスクIDを返す（変更がなければ記録しない）"""
+        if snapshot.tasks is self.current.tasks and snapshot.order is self.current.order:
+            return []
+        changed = self.current.tasks.diff(snapshot.tasks)
+        self.undo_stack.append((self.current, label))
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+        self.redo_stack.clear()
+        self.current = snapshot
+        return changed
+
+    def reset(self, task_list=()):
+        """履歴を破棄して新しい起点にする"""
+        self.current = TaskSnapshot().with_tasks(list(task_list))
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """1つ前の版に戻し、(操作名, 変更のあったタスクID) を返す"""
+        if not self.undo_stack:
+            return None, []
+        previous, label = self.undo_stack.pop()
+        changed = self.current.tasks.diff(previous.tasks)
+        self.redo_stack.append((self.current, label))
+        self.current = previous
+        return label, changed
+
+    def redo(self):
+        """取り消した操作をやり直し、(操作名, 変更のあったタスクID) を返す"""
+        if not self.redo_stack:
+            return None, []
+        following, label = self.redo_stack.pop()
+        changed = self.current.tasks.diff(following.tasks)
+        self.undo_stack.append((self.current, label))
+        self.current = following
+        return label, changed
+
+    def order_changed(self, other_order):
+        """表示順が指定の順序と異なるか（行の追加・削除・並べ替えがあったか）"""
+        return self.current.order != other_order
@@ -0,0 +1,87 @@
+import uuid
+from collections import Counter
+from datetime import datetime
+
+# インポートしたタスクのIDを導出する名前空間（変更すると既存のIDと一致しなくなる）
+IMPORT_NAMESPACE = uuid.UUID('6f1c2a8e-5d3b-4e7a-9c41-0b8d2f6e3a15')
+
+# CSVから取り込む項目（タスクのフィールド, 元データのキー）
+SOURCE_FIELDS = (('name', 'name'), ('start_date', 'start_date'), ('end_date', 'end_date'),
+                 ('progress', 'progress'), ('parent', 'parent'))
+
+
+def task_id(key):
+    """キーから決まるタスクID（同じキーなら何度インポートしても同じID）"""
+    return str(uuid.uuid5(IMPORT_NAMESPACE, str(key)))
+
+
+def import_key(raw_task):
+    """タスクデータのキー（キー列 → チケット → タスク名 の順）"""
+    for field in ('key', 'ticket'):
+        key = raw_task.get(field)
+        if key is not None and key == key and key != '':
+            return key
+    return raw_task.get('name')
+
+
+class KeyAssigner:
+    """1回のインポート（または追従）の中でタスクデータにキーを割り当てる
+
+    同じキーが複数回現れた場合は2件目以降に出現順の番号を付け、別のタスクとして扱う。
+    """
+    def __init__(self):
+        self.seen = Counter()
+
+    def __call__(self, raw_task):
+        key = import_key(raw_task)
+        self.seen[key] += 1
+        count = self.seen[key]
+        return key if count == 1 else f"{key}#{count}"
+
+
+class MergeResult:
+    """インポートの反映内容"""
+    __slots__ = ('updated', 'appended', 'unchanged')
+
+    def __init__(self):
+        self.updated = []  # 変更のあった既存タスク（新しいオブジェクト）
+        self.appended = []  # 新しいタスク
+        self.unchanged = 0
+
+    def __bool__(self):
+        return bool(self.updated or self.appended)
+
+    def summary(self):
+        return f"追加 {len(self.appended)}件・更新 {len(self.updated)}件・変更なし {self.unchanged}件"
+
+
+def merge_tasks(current, incoming):
+    """インポートしたタスクを現在のタスクにキーで突き合わせて反映（件数に比例）
+
+    current は ID -> タスク の辞書（または PersistentMap）、incoming はスキーマ形式に変換済みのタスク。
+    元データ（metadata.original_data）が前回と同じタスクは何もしない。変わったタスクは元データで
+    値の変わった項目だけを更新し、状態・依存関係やアプリ上で編集した他の項目は保持する。
+    """
+    result = MergeResult()
+    for task in incoming:
+        old = current.get(task['id'])
+        if old is None:
+            result.appended.append(task)
+            continue
+        old_metadata = old.get('metadata', {})
+        old_source = old_metadata.get('original_data')
+        new_source = task['metadata'].get('original_data')
+        if old_source == new_source:
+            result.unchanged += 1
+            continue
+        old_source = old_source or {}
+        merged = dict(old)
+        for field, source_field in SOURCE_FIELDS:
+            if old_source.get(source_field) != new_source.get(source_field):
+                merged[field] = task[field]
+        metadata = dict(old_metadata, original_data=new_source, updated_at=datetime.now().isoformat())
+        if old_source.get('duration') != new_source.get('duration'):
+            metadata['duration'] = task['metadata'].get('duration', 0)
+        merged['metadata'] = metadata
+        result.updated.append(merged)
+    return result
@@ -0,0 +1,157 @@
+import itertools
+import logging
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from agents import TaskAgent, ChartAgent, DialogueAgent
+from llm_meter import LLMMeter
+
+THREADS = 8
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowModel:
+    """応答に latency 秒かかるモデル（同時に呼び出し中の数の最大を記録する）
+
+    together を指定すると、最初の together 件の呼び出しは全部が呼び出し中になるまで待ち合わせる。
+    """
+    def __init__(self, latency=0.01, together=0):
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._arrivals = itertools.count()
+        self.together = together
+        self.barrier = threading.Barrier(together, timeout=5) if together else None
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if next(self._arrivals) < self.together:
+                self.barrier.wait()
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.calls += 1
+        return FakeResponse('{"name": "設計", "duration": 3}')
+
+
+def run_parallel(function, items, workers=THREADS):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, items))
+
+
+class TestAgentConcurrency(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        # スレッドの切り替えを頻繁にして競合を起こりやすくする
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def make_task_agent(self):
+        agent = TaskAgent()
+        agent.extract_threshold = 1.1  # 常にモデルに問い合わせる
+        agent.model = SlowModel()
+        return agent
+
+    def test_model_calls_overlap(self):
+        """モデルの呼び出し中はエージェントのロックを持たないので、呼び出しが重なる"""
+        requests = [f"設計を{i % 5 + 1}日" for i in range(40)]
+        with mock.patch('agents.meter', LLMMeter(retries=0)):
+            agent = self.make_task_agent()
+            # 最初の呼び出しは全スレッドがそろうまで待つ（呼び出しが直列だと待ち合わせが時間切れになる）
+            agent.model = SlowModel(together=THREADS)
+            results = run_parallel(lambda text: agent.process_input(text, offline=False), requests)
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+        self.assertFalse(agent.model.barrier.broken)
+        self.assertEqual(agent.model.max_in_flight, THREADS)
+        self.assertEqual(agent.model.calls, len(requests))
+        # 更新が失われていない
+        self.assertEqual(agent.stats(), {'requests': len(requests), 'successes': len(requests)})
+        self.assertEqual(agent.extraction_stats()['misses'], len(requests))
+
+    def test_request_counts_are_exact(self):
+        agent = TaskAgent()
+        per_thread = 2000
+
+        def log(worker):
+            for i in range(per_thread):
+                agent.log_request(f"change view {worker}")
+                agent.record_success()
+
+        run_parallel(log, range(THREADS))
+        self.assertEqual(agent.stats(), {'requests': THREADS * per_thread, 'successes': THREADS * per_thread})
+        self.assertEqual(agent.get_top_patterns(1)[0][0], 'change view')
+
+    def test_settings_snapshots(self):
+        agent = ChartAgent()
+        before = agent.current_settings
+        with self.assertRaises(TypeError):
+            before['colors']['created'] = 'red'
+
+        def update(worker):
+            for i in range(50):
+                agent.process_settings({'colors': {f"state{worker}": f"#{i:06x}"},
+                                        'display': {'load_capacity': worker}})
+
+        run_parallel(update, range(THREADS))
+        colors = agent.current_settings['colors']
+        self.assertEqual({f"state{worker}" for worker in range(THREADS)} - set(colors), set())
+        self.assertEqual(colors[f"state{THREADS - 1}"], f"#{49:06x}")
+        # 既定値と以前に読み出した版は変わらない
+        self.assertEqual(set(agent.default_settings['colors']), {'created', 'in_progress', 'completed'})
+        self.assertEqual(agent.default_settings['display']['load_capacity'], 5)
+        self.assertNotIn('state0', before['colors'])
+        self.assertEqual(agent.stats()['requests'], THREADS * 50)
+
+    def test_dialogue_commands_on_separate_lists(self):
+        agent = DialogueAgent()
+
+        def command(worker):
+            tasks = [{'id': f"{worker}-{i}", 'name': f"工程{worker}の作業{i}", 'status': 'created', 'progress': 0}
+                     for i in range(20)]
+            results = []
+            for i in range(20):
+                results.append(agent.process_input(f"工程{worker}の作業{i}の進捗を50%に", tasks))
+            return tasks, results
+
+        for tasks, results in run_parallel(command, range(THREADS)):
+            for task, result in zip(tasks, results):
+                self.assertEqual(result['action'], 'update_tasks')
+                updated = [item for item in result['tasks'] if item['progress'] == 50]
+                self.assertEqual([item['id'] for item in updated], [task['id']])
+                # 渡したタスクリストは書き換えない
+                self.assertEqual(task['progress'], 0)
+
+    def test_validate_tasks_does_not_mutate_input(self):
+        agent = TaskAgent()
+        shared = [{'name': f"タスク{i}", 'metadata': {}} for i in range(100)]
+        results = run_parallel(lambda _: agent.validate_tasks(shared), range(THREADS))
+        self.assertEqual(shared[0], {'name': 'タスク0', 'metadata': {}})
+        ids = {task['id'] for result in results for task in result}
+        self.assertEqual(len(ids), THREADS * len(shared))
+        # 項目が揃っているタスクは複製しない
+        complete = results[0]
+        self.assertTrue(all(a is b for a, b in zip(agent.validate_tasks(complete), complete)))
+
+
+if __name__ == '__main__':
+    unittest.main()
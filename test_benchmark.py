@@ -0,0 +1,64 @@
+import unittest
+import logging
+from datetime import date
+import os
+import tempfile
+from benchmark import generate_tasks, generate_csv_frame, compare_results, run_benchmarks, write_csv_file, bench_csv_file
+from gantt_layout import GanttLayout
+
+class TestBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_generated_dependencies_are_acyclic(self):
+        """依存先は常に前方のタスク"""
+        tasks = generate_tasks(500)
+        index = {task['id']: i for i, task in enumerate(tasks)}
+        for i, task in enumerate(tasks):
+            for dep_id in task['dependencies']:
+                self.assertLess(index[dep_id], i)
+
+    def test_csv_frame_matches_mapping(self):
+        df, mapping = generate_csv_frame(10)
+        self.assertEqual(len(df), 10)
+        for column in mapping.values():
+            self.assertIn(column, df.columns)
+
+    def test_large_csv_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'large.csv')
+            written, mapping = write_csv_file(path, 100000, block_rows=500)
+            self.assertEqual(os.path.getsize(path), written)
+            self.assertGreaterEqual(written, 100000)
+            results = bench_csv_file(path, repeat=1)
+        self.assertGreater(results['read']['rows'], 0)
+        self.assertEqual(results['read']['rows'] % 500, 0)
+        self.assertEqual(results['sniff']['bytes'], written)
+
+    def test_compare_results(self):
+        baseline = {'results': {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}}}
+        current = {'results': {'a': {'seconds': 1.1}, 'b': {'seconds': 1.5}, 'c': {'seconds': 9.0}}}
+        regressions = compare_results(current, baseline, threshold=0.2)
+        self.assertEqual([r['name'] for r in regressions], ['b'])
+
+    def test_run_benchmarks_small(self):
+        results = run_benchmarks([50], repeat=1)
+        self.assertIn('TaskAgent.validate_tasks[50]', results['results'])
+        self.assertIn('layout.draw_date_axis[50]', results['results'])
+        self.assertIn('csv.sniff[50]', results['results'])
+        self.assertGreater(results['results']['ProgressLog.burndown[50]']['samples'], 50)
+        self.assertGreater(results['results']['export.svg[50]']['bytes'], 0)
+
+    def test_layout_date_to_x(self):
+        layout = GanttLayout()
+        tasks = [{'start_date': '2024-03-02', 'end_date': '2024-03-05'},
+                 {'start_date': '2024-03-01T00:00:00', 'end_date': '2024-03-03'}]
+        project_start, project_end = layout.project_range(tasks)
+        self.assertEqual(project_start, date(2024, 3, 1).toordinal())
+        self.assertEqual(layout.date_to_x(date(2024, 3, 3).toordinal(), project_start),
+                         layout.task_width + 2 * layout.cell_width)
+        self.assertEqual(len(layout.date_axis_ticks(project_start, project_end)), 5)
+
+if __name__ == '__main__':
+    unittest.main()
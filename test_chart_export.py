@@ -0,0 +1,167 @@
+import io
+import logging
+import os
+import struct
+import tempfile
+import tracemalloc
+import unittest
+import zlib
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+import numpy as np
+
+import chart_export
+import dates
+from benchmark import generate_tasks
+from chart_export import ChartModel, SVGWriter, PNGWriter, export_chart
+from gantt_layout import GanttLayout
+
+SVG = '{http://www.w3.org/2000/svg}'
+BASE = dates.to_ordinal('2024-04-01')
+
+
+def make_task(task_id, start, end, progress=0, dependencies=(), parent=None):
+    return {'id': task_id, 'name': task_id, 'start_date': dates.to_iso(start), 'end_date': dates.to_iso(end),
+            'progress': progress, 'status': 'in_progress' if progress else 'created',
+            'dependencies': list(dependencies), 'parent': parent}
+
+
+def decode_png(data):
+    """PNGの画素を (高さ, 幅, 3) の配列に戻す（Upフィルタのみ対応）"""
+    position = 8
+    compressed = b''
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        if kind == b'IHDR':
+            width, height = struct.unpack('>II', body[:8])
+        elif kind == b'IDAT':
+            compressed += body
+        position += length + 12
+    raw = np.frombuffer(zlib.decompress(compressed), dtype=np.uint8).reshape(height, width * 3 + 1)
+    assert (raw[:, 0] == 2).all()
+    return (np.cumsum(raw[:, 1:], axis=0, dtype=np.uint64) % 256).astype(np.uint8).reshape(height, width, 3)
+
+
+class TestChartExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def make_model(self, **kwargs):
+        tasks = [
+            make_task('design', BASE, BASE),
+            make_task('d1', BASE, BASE + 4, 100, parent='design'),
+            make_task('d2', BASE + 5, BASE + 9, 50, ['d1'], parent='design'),
+            make_task('release', BASE + 30, BASE + 30, dependencies=['d2']),
+        ]
+        return ChartModel(tasks, **kwargs)
+
+    def test_layout_model(self):
+        model = self.make_model()
+        layout = model.layout
+        self.assertEqual((len(model), model.columns), (4, 31))
+        self.assertEqual(model.markers, ['▼', None, None, None])
+        # バーは終了日のセルの右端まで
+        self.assertEqual(model.x1.tolist(), [layout.task_width + cells * layout.cell_width for cells in (0, 0, 5, 30)])
+        self.assertEqual(model.x2.tolist(), [layout.task_width + cells * layout.cell_width for cells in (10, 5, 10, 31)])
+        self.assertEqual(model.progress[0], 75.0)
+        self.assertEqual(list(zip(model.sources.tolist(), model.targets.tolist())), [(1, 2), (2, 3)])
+        # 折りたたんだ部分木は親の1行になり、隠れた行への矢印は描かない
+        model = self.make_model(collapsed={'design'})
+        self.assertEqual((model.names, model.markers), (['design', 'release'], ['▶', None]))
+        self.assertEqual(len(model.sources), 0)
+        # 週表示の列はバケット数
+        self.assertEqual(self.make_model(layout=GanttLayout(view_mode='weeks')).columns, 5)
+
+    def test_svg_pages(self):
+        model = self.make_model()
+        path = os.path.join(self.dir.name, 'chart.svg')
+        self.assertEqual(export_chart(model, path), [path])
+        root = ET.parse(path).getroot()
+        self.assertEqual(root.get('width'), f"{model.width:.1f}")
+        texts = [element.text for element in root.iter(SVG + 'text')]
+        self.assertIn('d2', texts)
+        self.assertIn('2024-04', texts)
+
+        written = export_chart(model, path, rows_per_page=2, columns_per_page=20)
+        self.assertEqual([os.path.basename(page) for page in written],
+                         ['chart-r001-c001.svg', 'chart-r001-c002.svg', 'chart-r002-c001.svg', 'chart-r002-c002.svg'])
+        arrows = {}
+        for page in written:
+            root = ET.parse(page).getroot()
+            arrows[os.path.basename(page)[6:15]] = sum(1 for line in root.iter(SVG + 'line')
+                                                       if line.get('marker-end'))
+        # d1 -> d2 は行のページ、d2 -> release は列のページをまたぐので両方のページに描く
+        self.assertEqual(arrows, {'r001-c001': 1, 'r001-c002': 0, 'r002-c001': 2, 'r002-c002': 1})
+        self.assertEqual(ET.parse(written[3]).getroot().get('width'),
+                         f"{model.layout.task_width + 11 * model.layout.cell_width:.1f}")
+
+    def test_png_matches_pixels(self):
+        model = self.make_model()
+        page = next(model.pages())
+        writer = PNGWriter(io.BytesIO(), *model.page_size(page))
+        for clip, elements in model.layers(page):
+            writer.begin_clip(*clip)
+            for element in elements:
+                writer.draw(element)
+            writer.end_clip()
+        pixels = writer.pixels.copy()
+        writer.close()
+        self.assertTrue((decode_png(writer.f.getvalue()) == pixels).all())
+        # 完了したタスクの進捗は進捗の色、タスク名の列には図形を描かない
+        layout = model.layout
+        y = layout.header_height + layout.row_height * 3 // 2
+        self.assertEqual(tuple(pixels[y, layout.task_width + 10]), chart_export.color_rgb('lightgreen'))
+        self.assertTrue((pixels[layout.header_height + 1:, layout.task_width // 2] == 255).all())
+
+        # ページ分割を省略すると上限の大きさで分割する
+        path = os.path.join(self.dir.name, 'chart.png')
+        with mock.patch.object(chart_export, 'MAX_PNG_SIDE', 500):
+            written = export_chart(model, path)
+        self.assertEqual(len(written), 4)  # 列（10日ずつ）で4ページ
+        for page in written:
+            height, width, _ = decode_png(open(page, 'rb').read()).shape
+            self.assertLessEqual(max(height, width), 500)
+        with self.assertRaises(ValueError):
+            export_chart(model, os.path.join(self.dir.name, 'chart.pdf'))
+
+    def test_memory_is_bounded(self):
+        """書き出し中のメモリ使用量は出力の大きさに比例しない"""
+        model = ChartModel(generate_tasks(5000))
+        path = os.path.join(self.dir.name, 'chart.svg')
+        tracemalloc.start()
+        try:
+            export_chart(model, path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(os.path.getsize(path), 2 * 1024 * 1024)
+        self.assertLess(peak, 1024 * 1024)
+
+    def test_tasks_without_dates(self):
+        """日付のあるタスクがなくても今日の1日分の軸で書き出せる"""
+        model = ChartModel([dict(make_task('t1', BASE, BASE), start_date='未定', end_date=None)])
+        self.assertEqual((model.start, model.columns), (dates.today(), 1))
+        path = os.path.join(self.dir.name, 'chart.svg')
+        export_chart(model, path)
+        self.assertIn('t1', [element.text for element in ET.parse(path).getroot().iter(SVG + 'text')])
+
+    def test_writer_escapes_text(self):
+        f = io.StringIO()
+        writer = SVGWriter(f, 100, 100)
+        writer.draw(('text', 0, 0, '<設計 & レビュー>', 'w', 10, 'black'))
+        writer.close()
+        self.assertEqual([element.text for element in ET.fromstring(f.getvalue()).iter(SVG + 'text')],
+                         ['<設計 & レビュー>'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import logging
+from unittest import mock
+import pandas as pd
+from csv_analyzer_ai import GeminiCSVAnalyzer
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class TestValidateAndTransform(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.analyzer = GeminiCSVAnalyzer()
+        self.mapping = {'task_name': '名前', 'start_date': '開始', 'end_date': '終了', 'progress': '進捗'}
+
+    def test_dates_are_normalized(self):
+        df = pd.DataFrame({'名前': ['設計'], '開始': ['2024/3/1'], '終了': ['2024-03-05'], '進捗': ['0.5']})
+        tasks = self.analyzer.validate_and_transform_data(df, self.mapping)
+        self.assertEqual(tasks, [{'name': '設計', 'start_date': '2024-03-01',
+                                  'end_date': '2024-03-05', 'progress': 50}])
+
+    def test_zero_progress_is_valid(self):
+        df = pd.DataFrame({'名前': ['設計'], '開始': ['2024-03-01'], '終了': ['2024-03-05'], '進捗': [0]})
+        tasks = self.analyzer.validate_and_transform_data(df, self.mapping)
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0]['progress'], 0)
+
+    def test_invalid_rows_are_skipped(self):
+        df = pd.DataFrame({'名前': ['設計', None, '実装'],
+                           '開始': ['2024-03-01', '2024-03-01', '不明'],
+                           '終了': ['2024-03-05', '2024-03-05', '2024-03-05'],
+                           '進捗': ['10%', '20%', '30%']})
+        tasks = self.analyzer.validate_and_transform_data(df, self.mapping)
+        self.assertEqual([task['name'] for task in tasks], ['設計'])
+
+    def test_key_column_is_kept(self):
+        analyzer = GeminiCSVAnalyzer(key_column='チケット')
+        df = pd.DataFrame({'チケット': ['PRJ-1', None], '名前': ['設計', '実装'], '開始': ['2024-03-01', '2024-03-02'],
+                           '終了': ['2024-03-05', '2024-03-06'], '進捗': [0, 0]})
+        tasks = analyzer.validate_and_transform_data(df, self.mapping)
+        self.assertEqual(tasks[0]['key'], 'PRJ-1')
+        self.assertNotIn('key', tasks[1])
+
+class TestAnalyzeWithGemini(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def analyze(self, text):
+        analyzer = GeminiCSVAnalyzer()
+        with mock.patch('csv_analyzer_ai.meter') as meter:
+            meter.generate.return_value = FakeResponse(text)
+            return analyzer._analyze_with_gemini(['名前', '開始', '工数'])
+
+    def test_json_reply_with_null(self):
+        text = """以下の通りです。
+```json
+{"column_mapping": {"task_name": "名前", "start_date": "開始", "end_date": null,
+                    "duration": "工数", "progress": null, "ticket": null, "parent": null}}
+```"""
+        self.assertEqual(self.analyze(text), {'task_name': '名前', 'start_date': '開始', 'end_date': None,
+                                              'duration': '工数', 'progress': None, 'ticket': None,
+                                              'parent': None})
+
+    def test_invalid_reply(self):
+        self.assertIsNone(self.analyze('該当するカラムがありません'))
+        self.assertIsNone(self.analyze('{"task_name": "名前", "start_date": null, "end_date": null}'))
+        self.assertIsNone(self.analyze('{"task_name": "名前",'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import logging
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from csv_follower import CSVFollower
+
+
+class FakeAnalyzer:
+    """ヘッダーの列名をそのまま使う解析器（問い合わせ回数を数える）"""
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_csv_structure(self, file_path, csv_format=None):
+        self.calls += 1
+        return {'columns': list(pd.read_csv(file_path, nrows=0, **csv_format.read_options()).columns)}
+
+    def validate_and_transform_data(self, df, mapping, ordinals=None):
+        return [{column: row[column] for column in mapping['columns']} for _, row in df.iterrows()]
+
+
+class TestCSVFollower(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'tasks.csv')
+        self.write('name,start_date\n設計,2024-01-01\n実装,2024-01-05\n')
+        self.analyzer = FakeAnalyzer()
+        self.follower = CSVFollower(self.path, self.analyzer)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, text, mode='w', encoding='utf-8'):
+        with open(self.path, mode, encoding=encoding, newline='') as f:
+            f.write(text)
+
+    def test_reads_only_appended_rows(self):
+        self.assertEqual([row['name'] for row in self.follower.start()], ['設計', '実装'])
+        self.assertEqual(self.follower.poll(), ([], False))
+
+        # 書きかけの行は改行が書かれるまで読まない
+        self.write('テスト,2024-01-10\nリリ', 'a')
+        rows, reset = self.follower.poll()
+        self.assertEqual([row['name'] for row in rows], ['テスト'])
+        self.assertFalse(reset)
+        self.write('ース,2024-01-20\n', 'a')
+        self.assertEqual([row['name'] for row in self.follower.poll()[0]], ['リリース'])
+        self.assertEqual(self.analyzer.calls, 1)
+
+    def test_truncated_file_is_read_again(self):
+        self.follower.start()
+        self.write('name,start_date\n再計画,2024-02-01\n')
+        rows, reset = self.follower.poll()
+        self.assertTrue(reset)
+        self.assertEqual([row['name'] for row in rows], ['再計画'])
+        # ヘッダーが同じならマッピングは再利用する
+        self.assertEqual(self.analyzer.calls, 1)
+
+    def test_changed_header_is_analyzed_again(self):
+        self.follower.start()
+        self.write('name,start_date,owner,extra\n設計,2024-01-01,佐藤,x\n実装,2024-01-05,鈴木,y\n')
+        rows, reset = self.follower.poll()
+        self.assertTrue(reset)
+        self.assertEqual([row['owner'] for row in rows], ['佐藤', '鈴木'])
+        self.assertEqual(self.analyzer.calls, 2)
+
+    def test_shift_jis_tab_separated(self):
+        self.write('name\tstart_date\r\n設計\t2024-01-01\r\n', encoding='cp932')
+        self.assertEqual([row['name'] for row in self.follower.start()], ['設計'])
+        self.assertEqual(self.follower.format.delimiter, '\t')
+        self.write('実装\t2024-01-05\r\nテス', 'a', encoding='cp932')
+        self.assertEqual([row['name'] for row in self.follower.poll()[0]], ['実装'])
+        self.write('ト\t2024-01-10\r\n', 'a', encoding='cp932')
+        self.assertEqual([row['start_date'] for row in self.follower.poll()[0]], ['2024-01-10'])
+
+    def test_utf16_lines_are_split_on_characters(self):
+        self.write('\ufeffname\tstart_date\n設計\t2024-01-01\n', encoding='utf-16-le')
+        self.assertEqual([row['name'] for row in self.follower.start()], ['設計'])
+        self.write('実装\t2024-01-05\n', 'a', encoding='utf-16-le')
+        self.assertEqual([row['name'] for row in self.follower.poll()[0]], ['実装'])
+        self.assertEqual(self.analyzer.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import codecs
+import logging
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from csv_format import CSVFormat, sniff_csv, detect_encoding, detect_dialect
+
+ROWS = [('タスク名', '開始日', '終了日', '進捗'),
+        ('設計', '2024/04/01', '2024/04/05', '100%'),
+        ('実装、単体テスト', '2024/04/08', '2024/04/19', '50%'),
+        ('結合テスト', '2024/04/22', '2024/04/26', '0%')]
+
+
+def encode_rows(rows, encoding, delimiter=',', quote=False):
+    lines = []
+    for row in rows:
+        fields = [f'"{field}"' if quote or delimiter in field else field for field in row]
+        lines.append(delimiter.join(fields))
+    return ('\r\n'.join(lines) + '\r\n').encode(encoding)
+
+
+class TestCSVFormat(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, data, name='tasks.csv'):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def assert_reads(self, path, csv_format):
+        df = pd.read_csv(path, **csv_format.read_options())
+        self.assertEqual(list(df.columns), list(ROWS[0]))
+        self.assertEqual(df['タスク名'].tolist(), [row[0] for row in ROWS[1:]])
+
+    def test_japanese_exports(self):
+        cases = [
+            (encode_rows(ROWS, 'cp932'), 'cp932', ','),
+            (encode_rows(ROWS, 'cp932', '\t'), 'cp932', '\t'),
+            (encode_rows(ROWS, 'euc_jp', ';'), 'euc_jp', ';'),
+            (encode_rows(ROWS, 'utf-8', quote=True), 'utf-8', ','),
+            (codecs.BOM_UTF8 + encode_rows(ROWS, 'utf-8', '\t'), 'utf-8-sig', '\t'),
+            (codecs.BOM_UTF16_LE + encode_rows(ROWS, 'utf-16-le', '\t'), 'utf-16', '\t'),
+        ]
+        for data, encoding, delimiter in cases:
+            with self.subTest(encoding=encoding, delimiter=delimiter):
+                path = self.write(data)
+                csv_format = sniff_csv(path)
+                self.assertEqual((csv_format.encoding, csv_format.delimiter), (encoding, delimiter))
+                self.assert_reads(path, csv_format)
+
+    def test_single_quotes(self):
+        rows = [('name', 'note')] + [(f"'task {i}'", "'a,b'") for i in range(5)]
+        self.assertEqual(detect_dialect('\n'.join(','.join(row) for row in rows)), (',', "'"))
+
+    def test_sample_is_bounded(self):
+        # 先頭はASCIIだけで、日本語の行はサンプルより後ろにある
+        body = ''.join(f"task{i},2024/04/01,2024/04/02,0%\r\n" for i in range(5000))
+        data = 'name,start,end,progress\r\n'.encode() + body.encode() + '日本語のタスク,2024/04/01,2024/04/02,0%\r\n'.encode('cp932') * 3000
+        path = self.write(data)
+        csv_format = sniff_csv(path, sample_size=4096)
+        self.assertEqual((csv_format.encoding, csv_format.delimiter), ('cp932', ','))
+        # 途中で切れた文字・行があっても判定できる
+        self.assertEqual(detect_encoding(encode_rows(ROWS, 'cp932')[:-3]), ('cp932', 'cp932', b''))
+        self.assertEqual(sniff_csv(encode_rows(ROWS, 'cp932', '\t')[:70]).delimiter, '\t')
+
+    def test_line_ends_in_utf16(self):
+        csv_format = CSVFormat('utf-16', '\t', bom=codecs.BOM_UTF16_LE, codec='utf-16-le')
+        # U+0A00 の上位バイトと次の文字の下位バイトで偽の改行ができる
+        data = codecs.BOM_UTF16_LE + 'a਀Āb\nc\nd'.encode('utf-16-le')
+        first = csv_format.line_end(data)
+        self.assertEqual(data[len(codecs.BOM_UTF16_LE):first].decode('utf-16-le'), 'a਀Āb\n')
+        last = csv_format.last_line_end(data)
+        self.assertEqual(data[last:].decode('utf-16-le'), 'd')
+        self.assertEqual(CSVFormat().last_line_end(b'no newline'), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
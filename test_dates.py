@@ -0,0 +1,36 @@
+import unittest
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import dates
+
+class TestDates(unittest.TestCase):
+    def test_to_ordinal_accepts_common_inputs(self):
+        expected = date(2024, 3, 1).toordinal()
+        for value in ['2024-03-01', '2024-03-01T12:30:00', '2024/03/01', date(2024, 3, 1),
+                      datetime(2024, 3, 1, 9), pd.Timestamp('2024-03-01'), expected]:
+            self.assertEqual(dates.to_ordinal(value), expected, value)
+
+    def test_invalid_values(self):
+        for value in [None, '', 'not a date', float('nan'), pd.NaT]:
+            self.assertIsNone(dates.to_ordinal(value), value)
+
+    def test_legacy_keys(self):
+        """旧形式の start/end キーも読める"""
+        task = {'start': '2024-03-01', 'end': '2024-03-02'}
+        self.assertEqual(dates.task_end(task) - dates.task_start(task), 1)
+
+    def test_column_to_ordinals(self):
+        column = pd.Series(['2024-03-01', '2024/03/02', None, 'x', '2024-03-01'])
+        ordinals = dates.column_to_ordinals(column)
+        start = date(2024, 3, 1).toordinal()
+        np.testing.assert_array_equal(ordinals, [start, start + 1, dates.MISSING, dates.MISSING, start])
+        self.assertEqual(dates.ordinals_to_iso(ordinals)[:3], ['2024-03-01', '2024-03-02', None])
+
+    def test_datetime_column(self):
+        column = pd.Series(pd.to_datetime(['2024-03-01', None]))
+        ordinals = dates.column_to_ordinals(column)
+        self.assertEqual(list(ordinals), [date(2024, 3, 1).toordinal(), dates.MISSING])
+
+if __name__ == '__main__':
+    unittest.main()
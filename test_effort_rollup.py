@@ -0,0 +1,52 @@
+import unittest
+from effort_rollup import EffortRollup
+
+def entry(ticket, day, hours, name='作業'):
+    return {'name': name, 'start_date': day, 'end_date': day, 'duration': hours, 'progress': 0, 'ticket': ticket}
+
+class TestEffortRollup(unittest.TestCase):
+    def setUp(self):
+        self.rollup = EffortRollup()
+        self.rollup.add_entries([
+            entry('T-1', '2025-03-03', 2, '設計'),
+            entry('T-2', '2025-03-04', 4),
+            entry('T-1', '2025-03-05', 3),
+            entry('T-1', '2025-03-01', 1),
+        ])
+
+    def test_span_hours_and_count(self):
+        tasks = {task['ticket']: task for task in self.rollup.to_tasks()}
+        self.assertEqual(len(tasks), 2)
+        self.assertEqual(tasks['T-1']['start_date'], '2025-03-01')
+        self.assertEqual(tasks['T-1']['end_date'], '2025-03-05')
+        self.assertEqual(tasks['T-1']['duration'], 6)
+        self.assertEqual(tasks['T-1']['entry_count'], 3)
+        self.assertEqual(tasks['T-1']['name'], 'T-1 設計')
+
+    def test_incremental_add_reports_changed_keys(self):
+        changed = self.rollup.add_entries([entry('T-2', '2025-03-10', 1), entry('T-3', '2025-03-10', 1),
+                                           entry('T-2', '2025-03-11', 1)])
+        self.assertEqual(changed, ['T-2', 'T-3'])
+        task = self.rollup.to_tasks(['T-2'])[0]
+        self.assertEqual((task['end_date'], task['duration'], task['entry_count']), ('2025-03-11', 6, 3))
+
+    def test_drill_down(self):
+        entries = self.rollup.ticket_entries('T-1')
+        self.assertEqual([e['start_date'] for e in entries], ['2025-03-03', '2025-03-05', '2025-03-01'])
+        self.assertEqual(self.rollup.ticket_entries('unknown'), [])
+
+    def test_entries_without_ticket_group_by_name(self):
+        rollup = EffortRollup()
+        rollup.add_entries([entry(None, '2025-03-03', 1, '会議'), entry(float('nan'), '2025-03-04', 1, '会議')])
+        self.assertEqual([task['duration'] for task in rollup.to_tasks()], [2])
+    def test_parent_and_key_are_kept(self):
+        rollup = EffortRollup()
+        rollup.add_entries([dict(entry('T-2', '2025-03-03', 1), parent=None),
+                            dict(entry('T-2', '2025-03-04', 2), parent='T-1', key='PRJ-2'),
+                            dict(entry('T-2', '2025-03-05', 2), parent=float('nan'))])
+        task = rollup.to_tasks()[0]
+        self.assertEqual((task['parent'], task['key'], task['duration']), ('T-1', 'PRJ-2', 5))
+        self.assertNotIn('parent', self.rollup.to_tasks()[0])
+
+if __name__ == '__main__':
+    unittest.main()
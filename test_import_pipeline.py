@@ -0,0 +1,138 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from import_pipeline import Pipeline, PipelineError, CSVImportPipeline, detect_date_columns
+
+
+class TestPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_stages_preserve_order(self):
+        def double(batches):
+            for batch in batches:
+                yield [x * 2 for x in batch]
+
+        def total(batches):
+            yield [sum(x for batch in batches for x in batch)]
+
+        source = ([i, i + 1] for i in range(0, 100, 2))
+        self.assertEqual(Pipeline(source, [('double', double)], queue_size=2).run(),
+                         [[i * 2, i * 2 + 2] for i in range(0, 100, 2)])
+        source = ([i] for i in range(10))
+        self.assertEqual(Pipeline(source, [('double', double), ('total', total)]).run(), [[90]])
+
+    def test_bounded_queue_limits_read_ahead(self):
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield [i]
+
+        pipeline = iter(Pipeline(source(), [('pass', lambda batches: batches)], queue_size=2))
+        next(pipeline)
+        time.sleep(0.2)
+        # 各キューに2件＋各段が保持中の1件まで
+        self.assertLess(len(produced), 10)
+        self.assertEqual(len(list(pipeline)), 99)
+
+    def test_error_in_stage_is_raised(self):
+        def fail(batches):
+            for batch in batches:
+                if batch[0] == 5:
+                    raise ValueError("不正なバッチ")
+                yield batch
+
+        with self.assertRaises(PipelineError):
+            Pipeline(([i] for i in range(1000)), [('fail', fail)], queue_size=1).run()
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('pipeline-')])
+
+
+class SlowAnalyzer:
+    """応答の遅いヘッダー解析を模したアナライザ"""
+    def __init__(self, mapping, delay=0.3):
+        from csv_analyzer_ai import GeminiCSVAnalyzer
+        self.inner = GeminiCSVAnalyzer()
+        self.mapping = mapping
+        self.delay = delay
+        self.mapping_returned_at = None
+        self.first_chunk_at = None
+
+    def analyze_csv_structure(self, file_path, csv_format=None):
+        time.sleep(self.delay)
+        self.mapping_returned_at = time.perf_counter()
+        return self.mapping
+
+    def validate_and_transform_data(self, df, mapping, ordinals=None):
+        return self.inner.validate_and_transform_data(df, mapping, ordinals)
+
+
+class TestCSVImportPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        rows = [{'作業': f"タスク{i}", '開始': f"2025/03/{i % 28 + 1:02d}", '終了': f"2025/04/{i % 28 + 1:02d}",
+                 '進捗': f"{i % 100}%", 'チケット': f"T-{i % 7}"} for i in range(1000)]
+        pd.DataFrame(rows).to_csv(self.path, index=False)
+        self.mapping = {'task_name': '作業', 'start_date': '開始', 'end_date': '終了', 'progress': '進捗'}
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_reading_overlaps_mapping_request(self):
+        analyzer = SlowAnalyzer(self.mapping)
+        started = []
+
+        def convert(batch):
+            return [dict(task, id=task['name']) for task in batch]
+
+        def detect(chunk):
+            started.append(time.perf_counter())
+            return detect_date_columns(chunk)
+
+        pipeline = CSVImportPipeline(analyzer, chunksize=100, queue_size=2)
+        with mock.patch('import_pipeline.detect_date_columns', side_effect=detect):
+            tasks = pipeline.run(self.path, convert)
+        self.assertEqual(len(tasks), 1000)
+        self.assertEqual(tasks[0]['start_date'], '2025-03-01')
+        self.assertEqual(tasks[999]['progress'], 99)
+        self.assertLess(started[0], analyzer.mapping_returned_at)
+        self.assertEqual(set(pipeline.stage_seconds), {'source', 'transform', 'convert'})
+
+    def test_rollup_waits_for_all_entries(self):
+        analyzer = SlowAnalyzer(dict(self.mapping, ticket='チケット'), delay=0)
+        batches = []
+
+        def rollup(raw_tasks):
+            batches.append(len(raw_tasks))
+            return raw_tasks[:7]
+
+        tasks = CSVImportPipeline(analyzer, chunksize=100).run(self.path, lambda batch: batch, rollup)
+        self.assertEqual(batches, [1000])
+        self.assertEqual(len(tasks), 7)
+
+    def test_mapping_failure(self):
+        with self.assertRaises(Exception) as context:
+            CSVImportPipeline(SlowAnalyzer(None, delay=0), chunksize=100).run(self.path, lambda batch: batch)
+        self.assertIn("CSVの構造解析に失敗しました", str(context.exception))
+
+    def test_detect_date_columns(self):
+        df = pd.DataFrame({'name': ['a', 'b'], 'date': ['2025/03/01', '2025-03-02'], 'n': [1, 2]})
+        self.assertEqual(list(detect_date_columns(df)), ['date'])
+
+
+if __name__ == '__main__':
+    unittest.main()
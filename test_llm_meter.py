@@ -0,0 +1,153 @@
+import logging
+import unittest
+from unittest import mock
+
+from agents import TaskAgent, ChartAgent
+from llm_meter import LLMMeter, BudgetExceeded, estimate_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class ServiceUnavailable(Exception):
+    """google.api_core の一時的な失敗を模した例外"""
+
+
+class FakeUsage:
+    prompt_token_count = 120
+    candidates_token_count = 30
+
+
+class FakeResponse:
+    def __init__(self, text, usage=None):
+        self.text = text
+        if usage is not None:
+            self.usage_metadata = usage
+
+
+class FakeModel:
+    """応答（または送出する例外）を順に返すモデル"""
+    def __init__(self, clock, results, latency=0.5):
+        self.clock = clock
+        self.results = list(results)
+        self.latency = latency
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        self.clock.now += self.latency
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestLLMMeter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_meter(self, **kwargs):
+        return LLMMeter(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertEqual(estimate_tokens('abcdefgh'), 2)
+        self.assertEqual(estimate_tokens('設計 review'), 2 + 2)
+
+    def test_records_latency_and_tokens(self):
+        meter = self.make_meter()
+        model = FakeModel(self.clock, [FakeResponse('{"a": 1}'), FakeResponse('ok', FakeUsage())])
+        meter.generate(model, 'x' * 40, 'TaskAgent.extract_task_info')
+        meter.generate(model, 'x' * 40, 'TaskAgent.extract_task_info')
+        stats = meter.report()['operations']['TaskAgent.extract_task_info']
+        self.assertEqual(stats['calls'], 2)
+        # 応答にトークン数があればそれを使い、なければ推定する
+        self.assertEqual(stats['prompt_tokens'], 10 + 120)
+        self.assertEqual(stats['response_tokens'], 2 + 30)
+        self.assertAlmostEqual(stats['latency']['total'], 1.0)
+        self.assertEqual(meter.report()['budget']['used_calls'], 2)
+
+    def test_transient_errors_are_retried(self):
+        meter = self.make_meter(retries=2, backoff=1.0)
+        model = FakeModel(self.clock, [ServiceUnavailable('503'), ServiceUnavailable('503'), FakeResponse('ok')])
+        self.assertEqual(meter.generate(model, 'prompt', 'op').text, 'ok')
+        self.assertEqual(self.clock.slept, [1.0, 2.0])
+        model = FakeModel(self.clock, [ValueError('bad request'), FakeResponse('unused')])
+        with self.assertRaises(ValueError):
+            meter.generate(model, 'prompt', 'op')
+        self.assertEqual(len(model.prompts), 1)
+        stats = meter.report()['operations']['op']
+        self.assertEqual((stats['calls'], stats['errors'], stats['retries']), (1, 1, 2))
+
+    def test_session_budget(self):
+        meter = self.make_meter(max_calls=2)
+        model = FakeModel(self.clock, [FakeResponse('ok')] * 3)
+        meter.generate(model, 'a', 'op')
+        meter.generate(model, 'b', 'op')
+        with self.assertRaises(BudgetExceeded):
+            meter.generate(model, 'c', 'op')
+        self.assertEqual(len(model.prompts), 2)
+        self.assertEqual(meter.report()['total']['rejected'], 1)
+
+        meter = self.make_meter(max_tokens=20)
+        with self.assertRaises(BudgetExceeded):
+            meter.generate(model, '長いプロンプト' * 5, 'op')
+        self.assertEqual(len(model.prompts), 2)
+
+    def test_rate_limit_throttles(self):
+        meter = self.make_meter(rate=60, max_wait=5)
+        model = FakeModel(self.clock, [FakeResponse('ok')] * 70, latency=0.0)
+        for _ in range(60):
+            meter.generate(model, 'p', 'op')
+        self.assertEqual(self.clock.slept, [])
+        # バケットが空になると1秒に1回の間隔で呼び出す
+        meter.generate(model, 'p', 'op')
+        meter.generate(model, 'p', 'op')
+        self.assertEqual(len(self.clock.slept), 2)
+        for seconds in self.clock.slept:
+            self.assertAlmostEqual(seconds, 1.0)
+        self.assertEqual(meter.report()['total']['throttled'], 2)
+
+        meter = self.make_meter(rate=1, max_wait=5)
+        meter.generate(model, 'p', 'op')
+        with self.assertRaises(BudgetExceeded):
+            meter.generate(model, 'p', 'op')
+
+    def test_agents_use_meter(self):
+        meter = self.make_meter(max_calls=1)
+        with mock.patch('agents.meter', meter):
+            agent = TaskAgent()
+            agent.extract_threshold = 1.1  # ローカル抽出の結果があってもモデルに問い合わせる
+            agent.model = FakeModel(self.clock, [FakeResponse('{"name": "設計", "duration": 3}')])
+            result = agent.process_input('設計を3日', offline=False)
+            self.assertEqual(result['task']['name'], '設計')
+            # 予算を使い切った後はローカル抽出の結果で処理する
+            result = agent.process_input('実装 4/1から5日', offline=False)
+            self.assertEqual(result['status'], 'success')
+            self.assertEqual((agent.request_count, agent.success_count), (2, 2))
+
+            chart = ChartAgent()
+            self.assertEqual(chart.process_input('週表示にして')['status'], 'error')
+            self.assertEqual(chart.success_count, 0)
+        report = meter.report()
+        self.assertEqual(report['operations']['TaskAgent.extract_task_info']['calls'], 1)
+        self.assertEqual(report['operations']['TaskAgent.extract_task_info']['rejected'], 1)
+        self.assertEqual(report['operations']['ChartAgent.chart_settings']['rejected'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from datetime import date
+import numpy as np
+from load_analysis import LoadAnalyzer, sweep
+
+def ordinal(text):
+    return date.fromisoformat(text).toordinal()
+
+def task(task_id, start, end, **extra):
+    return dict({'id': task_id, 'name': task_id, 'start_date': start, 'end_date': end}, **extra)
+
+class TestSweep(unittest.TestCase):
+    def test_matches_naive_count(self):
+        rng = np.random.default_rng(0)
+        starts = rng.integers(0, 300, 2000) + 700000
+        ends = starts + rng.integers(0, 30, 2000)
+        first, load = sweep(starts, ends, np.ones(2000))
+        naive = np.zeros(ends.max() - starts.min() + 1)
+        for s, e in zip(starts, ends):
+            naive[s - first:e - first + 1] += 1
+        np.testing.assert_array_equal(load, naive)
+
+class TestLoadAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = LoadAnalyzer(capacity=1)
+        self.analyzer.sync([
+            task('a', '2025-03-03', '2025-03-05'),
+            task('b', '2025-03-05', '2025-03-06'),
+        ])
+
+    def test_concurrency_and_overload(self):
+        profile = self.analyzer.profile()
+        self.assertEqual(profile.start, ordinal('2025-03-03'))
+        self.assertEqual(profile.load.tolist(), [1, 1, 2, 1])
+        self.assertEqual(profile.overloaded.tolist(), [False, False, True, False])
+
+    def test_cache_invalidated_only_on_change(self):
+        profile = self.analyzer.profile()
+        self.analyzer.sync([task('a', '2025-03-03', '2025-03-05'), task('b', '2025-03-05', '2025-03-06')])
+        self.assertIs(self.analyzer.profile(), profile)
+        self.analyzer.update_task(task('b', '2025-03-10', '2025-03-10'))
+        self.assertEqual(self.analyzer.profile().load.tolist(), [1, 1, 1, 0, 0, 0, 0, 1])
+
+    def test_hours_by_assignee(self):
+        analyzer = LoadAnalyzer(weight='hours', capacity=8, group_by='assignee')
+        analyzer.sync([
+            task('a', '2025-03-03', '2025-03-04', duration=16, assignee='佐藤'),
+            task('b', '2025-03-04', '2025-03-04', duration=4, assignee='鈴木'),
+            task('c', '2025-03-04', '2025-03-04', duration=2, assignee='佐藤'),
+        ])
+        profile = analyzer.profile()
+        self.assertEqual(profile.load.tolist(), [8, 14])
+        self.assertEqual(profile.groups['佐藤'].tolist(), [8, 10])
+        self.assertEqual(profile.overloaded.tolist(), [False, True])
+
+if __name__ == '__main__':
+    unittest.main()
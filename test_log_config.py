@@ -0,0 +1,39 @@
+import unittest
+import logging
+import queue
+from log_config import SampledWarnings, NonBlockingQueueHandler
+
+class TestLogConfig(unittest.TestCase):
+    def test_sampled_warnings_aggregates(self):
+        """先頭の数件のみ出力し、残りは件数にまとめる"""
+        logger = logging.getLogger('test_sampled')
+        with self.assertLogs(logger, level='WARNING') as captured:
+            with SampledWarnings(logger, "無効なタスクデータ", sample=3) as warnings:
+                for i in range(100):
+                    warnings.warn(i)
+        self.assertEqual(len(captured.records), 4)
+        self.assertIn("合計100件", captured.records[-1].getMessage())
+
+    def test_sampled_warnings_no_summary_when_few(self):
+        logger = logging.getLogger('test_sampled_few')
+        with self.assertLogs(logger, level='WARNING') as captured:
+            with SampledWarnings(logger, "警告", sample=3) as warnings:
+                warnings.warn(1)
+        self.assertEqual(len(captured.records), 1)
+
+    def test_queue_handler_drops_when_full(self):
+        """キューが満杯でもブロックしない"""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+        logger = logging.getLogger('test_queue_full')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for i in range(5):
+                logger.error("message %d", i)
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+if __name__ == '__main__':
+    unittest.main()
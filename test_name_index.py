@@ -0,0 +1,89 @@
+import logging
+import time
+import unittest
+from name_index import TrigramIndex
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex()
+        for key, name in [('1', '設計レビュー'), ('2', '詳細設計'), ('3', 'API実装'), ('4', '結合テスト')]:
+            self.index.add(key, name)
+
+    def test_search_ranks_similar_names(self):
+        self.assertEqual(self.index.search('設計レビュ')[0][0], '1')
+        self.assertEqual(self.index.search('api実装')[0], ('3', 1.0))
+        self.assertEqual(self.index.search('まったく別', min_score=0.3), [])
+
+    def test_find_in_command(self):
+        self.assertEqual(self.index.find_in('結合テストを完了')[0], ('4', 1.0))
+        key, score = self.index.find_in('設計レビュを開始')[0]
+        self.assertEqual(key, '1')
+        self.assertLess(score, 1.0)
+
+    def test_rename_and_remove(self):
+        self.index.rename('4', '総合テスト')
+        self.assertEqual(self.index.lookup('結合テスト'), set())
+        self.assertEqual(self.index.lookup('総合テスト'), {'4'})
+        self.index.remove('1')
+        self.assertNotIn('1', self.index)
+        self.assertNotIn('設計レ', self.index.postings)
+        self.assertEqual(self.index.find_in('設計レビューを完了', min_score=0.6), [])
+
+    def test_sync_and_apply_changes(self):
+        tasks = [{'id': '1', 'name': '設計レビュー'}, {'id': '5', 'name': 'リリース'}]
+        self.index.sync(tasks)
+        self.assertEqual(sorted(self.index.names), ['1', '5'])
+        self.index.apply_changes({'5': {'id': '5', 'name': 'リリース判定'}}, ['1', '5'])
+        self.assertEqual(self.index.names, {'5': 'リリース判定'})
+
+    def test_short_names(self):
+        self.index.add('6', 'QA')
+        self.assertEqual(self.index.find_in('qaを完了')[0], ('6', 1.0))
+
+
+class TestFuzzyResolution(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+        from agents import DialogueAgent, TaskAgent
+        from benchmark import generate_tasks
+        cls.dialogue_agent = DialogueAgent()
+        cls.task_agent = TaskAgent()
+        cls.tasks = generate_tasks(100000)
+        cls.index = TrigramIndex()
+        cls.index.sync(cls.tasks)
+
+    def test_dialogue_resolves_typos(self):
+        tasks = [{'id': '1', 'name': '設計レビュー', 'progress': 0, 'status': 'created'},
+                 {'id': '2', 'name': '設計', 'progress': 0, 'status': 'created'},
+                 {'id': '3', 'name': 'タスクA', 'progress': 0, 'status': 'created'}]
+        result = self.dialogue_agent.process_input('設計レビューを完了', tasks)
+        self.assertEqual(result['tasks'][0]['status'], 'completed')  # 長い名前を優先
+        self.assertEqual(result['tasks'][1]['status'], 'created')
+        result = self.dialogue_agent.process_input('設計レビュを開始', tasks)
+        self.assertEqual(result['tasks'][0]['status'], 'in_progress')
+        result = self.dialogue_agent.process_input('タスクCを完了', tasks)
+        self.assertEqual(result['action'], 'none')
+
+    def test_fast_on_large_projects(self):
+        started = time.perf_counter()
+        for i in range(0, 100000, 1000):
+            name = self.dialogue_agent.resolve_task_name(f"タスク{i + 7:07d}を完了", self.index)
+            self.assertEqual(name, f"タスク{i + 7:07d}")
+        self.assertLess((time.perf_counter() - started) / 100, 0.02)
+        # 全角数字の入力ミス
+        self.assertEqual(self.dialogue_agent.resolve_task_name("タスク001234５の進捗を50%に更新", self.index),
+                         "タスク0012345")
+
+    def test_dependency_by_partial_name(self):
+        task = self.task_agent.find_task_by_name('タスク', self.tasks, self.index)
+        self.assertIsNone(task)  # 候補が絞れない場合は採用しない
+        task = self.task_agent.find_task_by_name('タスク0099998', self.tasks, self.index)
+        self.assertEqual(task['id'], 'task-0099998')
+        task = self.task_agent.find_task_by_name('タスク009998', self.tasks[-10:])
+        self.assertEqual(task['id'], 'task-0099998')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import tempfile
+from pattern_stats import DecayingSpaceSaving
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestDecayingSpaceSaving(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_top_patterns(self):
+        stats = DecayingSpaceSaving(capacity=8, clock=self.clock)
+        for pattern, count in [('create task', 5), ('set depend', 3), ('change color', 1)]:
+            for _ in range(count):
+                stats.add(pattern)
+        self.assertEqual(stats.top(2), [('create task', 5.0), ('set depend', 3.0)])
+
+    def test_memory_is_bounded(self):
+        """容量を超えるパターンが来ても保持数は一定で、頻出パターンは残る"""
+        stats = DecayingSpaceSaving(capacity=10, clock=self.clock)
+        for i in range(10000):
+            stats.add('create task')
+            stats.add(f'noise {i}')
+        self.assertEqual(len(stats), 10)
+        self.assertLessEqual(len(stats._heap), 40)
+        self.assertEqual(stats.top(1)[0][0], 'create task')
+
+    def test_decay(self):
+        stats = DecayingSpaceSaving(capacity=8, half_life=100, clock=self.clock)
+        for _ in range(4):
+            stats.add('old pattern')
+        self.clock.now += 100
+        stats.add('new pattern')
+        self.assertAlmostEqual(stats.count('old pattern'), 2.0)
+        self.assertAlmostEqual(stats.count('new pattern'), 1.0)
+
+    def test_rescale_keeps_counts(self):
+        stats = DecayingSpaceSaving(capacity=8, half_life=1, clock=self.clock)
+        stats.add('a')
+        self.clock.now += 400  # 重みが上限を超える
+        stats.add('a')
+        self.assertAlmostEqual(stats.count('a'), 1.0)
+
+    def test_persistence(self):
+        stats = DecayingSpaceSaving(capacity=8, half_life=100, clock=self.clock)
+        for _ in range(3):
+            stats.add('create task')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'history.json')
+            stats.save(path)
+            self.clock.now += 100
+            loaded = DecayingSpaceSaving.load(path, clock=self.clock)
+        self.assertAlmostEqual(loaded.count('create task'), 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
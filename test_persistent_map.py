@@ -0,0 +1,53 @@
+import unittest
+from persistent_map import PersistentMap
+
+
+class CollidingKey:
+    """ハッシュ値が衝突するキー"""
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and other.name == self.name
+
+
+class TestPersistentMap(unittest.TestCase):
+    def test_set_and_delete_keep_old_versions(self):
+        base = PersistentMap.from_items((f"task-{i}", i) for i in range(1000))
+        updated = base.set('task-10', -1).delete('task-20')
+        self.assertEqual(len(base), 1000)
+        self.assertEqual(len(updated), 999)
+        self.assertEqual(base['task-10'], 10)
+        self.assertEqual(updated['task-10'], -1)
+        self.assertIn('task-20', base)
+        self.assertNotIn('task-20', updated)
+        self.assertEqual(dict(updated.items()), {**{f"task-{i}": i for i in range(1000) if i != 20}, 'task-10': -1})
+
+    def test_setting_same_object_returns_same_map(self):
+        value = {'name': 'A'}
+        base = PersistentMap().set('a', value)
+        self.assertIs(base.set('a', value), base)
+        self.assertIs(base.delete('missing'), base)
+
+    def test_diff_reports_only_changed_keys(self):
+        base = PersistentMap.from_items((i, {'n': i}) for i in range(500))
+        updated = base.set(3, {'n': -3}).set(600, {}).delete(7)
+        self.assertEqual(sorted(base.diff(updated)), [3, 7, 600])
+        self.assertEqual(base.diff(base), [])
+
+    def test_hash_collisions(self):
+        a, b, c = CollidingKey('a'), CollidingKey('b'), CollidingKey('c')
+        m = PersistentMap().set(a, 1).set(b, 2).set(c, 3)
+        self.assertEqual((m[a], m[b], m[c]), (1, 2, 3))
+        m2 = m.delete(b)
+        self.assertEqual(len(m2), 2)
+        self.assertNotIn(b, m2)
+        self.assertEqual(m2.get(c), 3)
+        self.assertEqual(sorted(k.name for k in m.diff(m2)), ['b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
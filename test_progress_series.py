@@ -0,0 +1,97 @@
+import logging
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+import dates
+from progress_series import ProgressLog
+
+DAY = 86400
+START = dates.to_ordinal('2025-03-03')
+T0 = (START - dates.EPOCH_ORDINAL) * DAY  # 2025-03-03 00:00 UTC
+
+
+def task(task_id, progress, status='in_progress'):
+    return {'id': task_id, 'progress': progress, 'status': status}
+
+
+class TestProgressLog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_records_only_changes(self):
+        log = ProgressLog()
+        self.assertTrue(log.record(task('a', 0, 'created'), T0))
+        self.assertFalse(log.record(task('a', 0, 'created'), T0 + 10))
+        self.assertTrue(log.record(task('a', 0, 'in_progress'), T0 + 20))
+        self.assertTrue(log.record(task('a', 60), T0 + DAY))
+        self.assertTrue(log.record(task('a', 100, 'completed'), T0 + 2 * DAY))
+        self.assertEqual(len(log), 4)
+        self.assertEqual(log.nbytes(), 4 * 10)
+        self.assertEqual([(progress, status) for _, progress, status in log.history('a')],
+                         [(0, 'created'), (0, 'in_progress'), (60, 'in_progress'), (100, 'completed')])
+        self.assertEqual(log.history('missing'), [])
+
+    def test_burndown(self):
+        log = ProgressLog()
+        log.record_changes({'a': task('a', 0), 'b': task('b', 0)}, ['a', 'b'], T0 - DAY)  # 範囲の前日
+        log.record(task('a', 50), T0 + 3600)
+        log.record(task('a', 100, 'completed'), T0 + DAY + 3600)
+        log.record(task('c', 20), T0 + 2 * DAY)  # 3日目に追加
+        log.remove('b', T0 + 3 * DAY)  # 4日目に削除
+        log.remove('b', T0 + 3 * DAY)  # 削除済み
+        log.record(task('b', 0), T0 + 10 * DAY)  # 範囲の後に復元
+        burndown = log.burndown(START, START + 4, {'a': 4, 'b': 2, 'c': 1}, utc_offset=0)
+        np.testing.assert_allclose(burndown.remaining, [4, 2, 2.8, 0.8, 0.8])
+        np.testing.assert_allclose(burndown.completed, [2, 2, 0, 0, 0])
+        np.testing.assert_allclose(burndown.added, [0, 0, 0.8, -2, 0])
+        np.testing.assert_allclose(burndown.ideal(), [4, 3, 2, 1, 0])
+        np.testing.assert_allclose(burndown.velocity(window=2), [2, 2, 1, 0, 0])
+        # 重みを省略すると1件を1とする
+        self.assertEqual(log.burndown(START + 10, START + 10, utc_offset=0).remaining.tolist(), [1.8])
+        self.assertEqual(len(ProgressLog().burndown(START, START + 2)), 3)
+
+    def test_matches_replay(self):
+        """ベクトル演算の結果が標本を1件ずつ再生した結果と一致する"""
+        rng = random.Random(5)
+        log = ProgressLog()
+        state = {}
+        snapshots = []
+        timestamp = T0
+        for day in range(30):
+            for _ in range(200):
+                timestamp = T0 + day * DAY + rng.randrange(DAY)
+                task_id = f"t{rng.randrange(60)}"
+                if task_id in state and rng.random() < 0.05:
+                    log.remove(task_id, timestamp)
+                    del state[task_id]
+                else:
+                    state[task_id] = rng.randrange(101)
+                    log.record(task(task_id, state[task_id]), timestamp)
+            snapshots.append(sum(100 - progress for progress in state.values()) / 100)
+        remaining = log.burndown(START, START + 29, utc_offset=0).remaining
+        np.testing.assert_allclose(remaining, snapshots)
+
+    def test_sync_save_and_load(self):
+        log = ProgressLog(clock=lambda: T0)
+        log.sync([task('a', 10), task('b', 0)])
+        log.sync([task('a', 30)], T0 + DAY)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'progress.npz')
+            log.save(path)
+            loaded = ProgressLog.load(path)
+        self.assertEqual(loaded.history('a'), log.history('a'))
+        self.assertEqual(loaded.history('b'), log.history('b'))
+        # 読み込んだ後も差分として続けて記録できる
+        self.assertFalse(loaded.record(task('a', 30), T0 + 2 * DAY))
+        loaded.record(task('b', 50), T0 + 2 * DAY)
+        self.assertEqual(loaded.history('b')[-1][1:], (50, 'in_progress'))
+        self.assertEqual(loaded.burndown(START, START + 2, utc_offset=0).remaining.tolist(), [1.9, 0.7, 1.2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import unittest
+from unittest import mock
+
+from name_index import TrigramIndex
+from project_service import ProjectStore, ProjectService, ProjectClient, ServiceError, apply_change
+from task_history import TaskSnapshot
+from task_merge import task_id
+
+
+def make_tasks(count):
+    return [{'id': f"task-{i}", 'name': f"タスク{i:03d}", 'start_date': '2025-03-03', 'end_date': '2025-03-07',
+             'progress': 0, 'status': 'created', 'dependencies': [], 'metadata': {}} for i in range(count)]
+
+
+async def send(writer, message):
+    writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+    await writer.drain()
+
+
+async def receive(reader):
+    return json.loads(await reader.readline())
+
+
+class TestProjectStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_batch_produces_single_event(self):
+        store = ProjectStore(make_tasks(10))
+        results, event = store.apply([
+            {'type': 'command', 'text': 'タスク001を完了'},
+            {'type': 'command', 'text': 'タスク002を開始\nタスク003の進捗を50%に更新'},
+            {'type': 'command', 'text': '存在しないタスクを完了'},
+        ])
+        self.assertEqual([result['ok'] for result in results], [True, True, False])
+        self.assertEqual(event['version'], 1)
+        self.assertEqual(sorted(task['id'] for task in event['tasks']), ['task-1', 'task-2', 'task-3'])
+        self.assertNotIn('order', event)
+        # 何も変わらなければ通知しない
+        self.assertIsNone(store.apply([{'type': 'command', 'text': 'タスク001を完了'}])[1])
+
+    def test_apply_change_reproduces_store(self):
+        store = ProjectStore(make_tasks(5))
+        tasks = store.tasks
+        for mutations in ([{'type': 'remove_tasks', 'ids': ['task-2']}],
+                          [{'type': 'add_tasks', 'tasks': [{'name': '追加'}]}],
+                          [{'type': 'command', 'text': 'タスク004を完了'}]):
+            tasks = apply_change(tasks, store.apply(mutations)[1])
+        self.assertEqual(tasks, store.tasks)
+
+    def test_update_tasks_keeps_order(self):
+        store = ProjectStore(make_tasks(3))
+        moved = dict(store.tasks[1], start_date='2025-03-10', end_date='2025-03-14')
+        results, event = store.apply([{'type': 'update_tasks', 'tasks': [moved, dict(moved, id='missing')]}])
+        self.assertTrue(results[0]['ok'])
+        self.assertEqual([task['id'] for task in store.tasks], ['task-0', 'task-1', 'task-2'])
+        self.assertEqual(store.tasks[1]['start_date'], '2025-03-10')
+        self.assertEqual([task['id'] for task in event['tasks']], ['task-1'])
+        self.assertNotIn('order', event)
+
+    def test_updates_do_not_walk_all_tasks(self):
+        """差し替え・追加・再インポートは変更したタスクだけを扱う"""
+        store = ProjectStore(make_tasks(1000))
+        moved = dict(store.tasks[10], start_date='2025-03-10')
+        with mock.patch.object(TaskSnapshot, 'to_list', side_effect=AssertionError('to_list')), \
+                mock.patch.object(TaskSnapshot, 'with_tasks', side_effect=AssertionError('with_tasks')):
+            results, event = store.apply([
+                {'type': 'update_tasks', 'tasks': [moved, dict(store.history.current.tasks['task-11'])]},
+                {'type': 'add_tasks', 'tasks': [{'id': 'new', 'name': '追加'}]},
+                {'type': 'upsert_tasks', 'tasks': [dict(moved, id='task-20', metadata={'original_data': {'name': 'x'}})]},
+            ])
+        self.assertTrue(all(result['ok'] for result in results))
+        # 内容の変わらないタスクは通知しない
+        self.assertEqual(sorted(task['id'] for task in event['tasks']), ['new', 'task-10', 'task-20'])
+        self.assertNotIn('order', event)
+        self.assertEqual(store.history.current.order[-2:], ('task-999', 'new'))
+        # 同じバッチで追加したタスクの名前もコマンドで使える
+        results, event = store.apply([{'type': 'add_tasks', 'tasks': [{'id': 'review', 'name': 'レビュー'}]},
+                                      {'type': 'command', 'text': 'レビューを開始'}])
+        self.assertEqual([result['ok'] for result in results], [True, True])
+        self.assertEqual(store.history.current.tasks['review']['status'], 'in_progress')
+
+    def test_commands_use_store_index(self):
+        """コマンドのタスク名はストアのインデックスで解決し、タスク全体での同期はしない"""
+        store = ProjectStore(make_tasks(100))
+        renamed = dict(store.tasks[5], name='レビュー')
+        with mock.patch.object(TrigramIndex, 'sync', side_effect=AssertionError('sync')):
+            store.apply([{'type': 'update_tasks', 'tasks': [renamed]}])
+            results, event = store.apply([{'type': 'command', 'text': 'レビューを完了'}])
+        self.assertTrue(results[0]['ok'])
+        self.assertEqual([task['id'] for task in event['tasks']], ['task-5'])
+        self.assertEqual(store.name_index.lookup('タスク005'), set())
+
+    def test_time_entries_roll_up_by_ticket(self):
+        store = ProjectStore()
+        entry = lambda day, hours: {'name': '設計', 'ticket': 'T-1', 'start_date': day, 'end_date': day,
+                                    'duration': hours, 'progress': 0}
+        store.apply([{'type': 'add_entries', 'entries': [entry('2025-03-03', 2)]}])
+        _, event = store.apply([{'type': 'add_entries', 'entries': [entry('2025-03-05', 3)]}])
+        self.assertEqual(len(store.tasks), 1)
+        self.assertEqual(event['tasks'][0]['end_date'], '2025-03-05')
+        self.assertEqual(event['tasks'][0]['metadata']['duration'], 5)
+        # IDはチケットから決まるので、作り直したストアやCSVのインポートでも同じタスクになる
+        self.assertEqual(store.tasks[0]['id'], task_id('T-1'))
+        store.apply([{'type': 'add_entries', 'entries': [dict(entry('2025-03-06', 1), ticket='T-2', parent='T-1')]}])
+        self.assertEqual(store.tasks[1]['parent'], task_id('T-1'))
+        other = ProjectStore()
+        other.apply([{'type': 'add_entries', 'entries': [entry('2025-03-03', 2), entry('2025-03-05', 3)]}])
+        _, event = store.apply([{'type': 'upsert_tasks', 'tasks': other.tasks}])
+        self.assertIsNone(event)
+
+
+class TestProjectService(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    async def asyncSetUp(self):
+        self.service = ProjectService(ProjectStore(make_tasks(50)))
+        self.host, self.port = await self.service.start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_many_clients_receive_notifications(self):
+        clients = []
+        for i in range(200):
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            await send(writer, {'id': i, 'op': 'subscribe'})
+            clients.append((reader, writer))
+        snapshots = await asyncio.gather(*(receive(reader) for reader, _ in clients))
+        self.assertTrue(all(len(snapshot['tasks']) == 50 for snapshot in snapshots))
+
+        reader, writer = clients[0]
+        await send(writer, {'id': 'm', 'op': 'mutate',
+                            'mutations': [{'type': 'command', 'text': 'タスク007を完了\nタスク008を開始'}]})
+        events = await asyncio.gather(*(receive(reader) for reader, _ in clients[1:]))
+        self.assertTrue(all(event['event'] == 'changed' and event['version'] == 1 for event in events))
+        self.assertEqual(sorted(task['name'] for task in events[0]['tasks']), ['タスク007', 'タスク008'])
+        # 変更したクライアントには通知と応答の両方が届く
+        messages = [await receive(reader), await receive(reader)]
+        self.assertEqual({message.get('id') for message in messages}, {None, 'm'})
+        for _, writer in clients:
+            writer.close()
+
+    async def test_slow_subscriber_gets_resync(self):
+        self.service.queue_size = 1
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        await send(writer, {'id': 1, 'op': 'subscribe'})
+        await receive(reader)
+        for i in range(20):
+            self.service.store.apply([{'type': 'command', 'text': f'タスク{i:03d}を完了'}])
+            self.service.broadcast({'event': 'changed', 'version': i})
+        messages = [await receive(reader) for _ in range(2)]
+        self.assertEqual([message['event'] for message in messages], ['changed', 'resync'])
+        writer.close()
+
+    async def test_loop_answers_during_mutation(self):
+        """変更の準備中も他のクライアントの要求に応答する"""
+        prepare = self.service.store.prepare
+
+        def slow_prepare(mutations):
+            time.sleep(0.3)
+            return prepare(mutations)
+
+        self.service.store.prepare = slow_prepare
+        reader1, writer1 = await asyncio.open_connection(self.host, self.port)
+        reader2, writer2 = await asyncio.open_connection(self.host, self.port)
+        await send(writer1, {'id': 'm', 'op': 'mutate', 'mutations': [{'type': 'command', 'text': 'タスク001を完了'}]})
+        await asyncio.sleep(0.05)
+        await send(writer2, {'id': 'p', 'op': 'ping'})
+        ping = await receive(reader2)
+        self.assertEqual((ping['id'], ping['version']), ('p', 0))
+        self.assertEqual((await receive(reader1))['version'], 1)
+        writer1.close()
+        writer2.close()
+
+    async def test_invalid_request(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(b'not json\n')
+        await send(writer, {'id': 2, 'op': 'unknown'})
+        self.assertFalse((await receive(reader))['ok'])
+        response = await receive(reader)
+        self.assertEqual((response['id'], response['ok']), (2, False))
+        writer.close()
+
+
+class TestProjectClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.service = ProjectService(ProjectStore(make_tasks(3)))
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.address = self.loop.run_until_complete(self.service.start('127.0.0.1', 0))
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait(5)
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.service.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    def test_script_and_ui_clients(self):
+        ui = ProjectClient(*self.address)
+        script = ProjectClient(*self.address)
+        tasks = ui.subscribe()
+        script.command('タスク001を完了')
+        script.add_entries([{'name': '打ち合わせ', 'ticket': 'T-9', 'start_date': '2025-03-04',
+                             'end_date': '2025-03-04', 'duration': 1, 'progress': 0}])
+        for _ in range(2):
+            tasks = apply_change(tasks, ui.events.get(timeout=5))
+        self.assertEqual(tasks, script.get_tasks())
+        self.assertEqual(len(tasks), 4)
+        with self.assertRaises(ServiceError):
+            script.request('unknown')
+        ui.close()
+        script.close()
+        self.assertEqual(ui.events.get(timeout=5)['event'], 'closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import logging
+import random
+import unittest
+
+from spatial_index import GridIndex, KIND_PRIORITY, _rect_distance, _segment_distance
+
+
+class TestGridIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_rect_and_segment_hits(self):
+        index = GridIndex()
+        index.add_rect('a', 10, 10, 110, 30)
+        index.add_segment('b', 110, 20, 300, 200)
+        self.assertEqual(index.hit(50, 20), ('a', 'bar'))
+        self.assertIsNone(index.hit(50, 40))
+        # 線分は判定の幅の内側だけ
+        self.assertEqual(index.hit(205, 112), ('b', 'arrow'))
+        self.assertIsNone(index.hit(205, 130))
+        self.assertEqual(index.bounds('a'), (10, 10, 110, 30))
+        self.assertIsNone(index.bounds('a', 'summary'))
+
+    def test_bar_has_priority_over_arrow(self):
+        index = GridIndex()
+        index.add_segment('x', 0, 20, 400, 20)
+        index.add_rect('y', 100, 10, 200, 30)
+        index.add_rect('y', 500, 10, 600, 30, kind='summary')
+        self.assertEqual(index.hit(150, 20), ('y', 'bar'))
+        self.assertEqual([hit[3] for hit in index.query(150, 20)], ['bar', 'arrow'])
+        self.assertEqual(index.hit(50, 20), ('x', 'arrow'))
+        self.assertEqual(index.hit(550, 20), ('y', 'summary'))
+
+    def test_remove_and_clear(self):
+        index = GridIndex()
+        index.add_rect('a', 0, 0, 50, 20)
+        index.add_segment('a', 50, 10, 400, 300)
+        index.add_rect('b', 0, 0, 50, 20)
+        index.remove('a')
+        self.assertNotIn('a', index)
+        self.assertEqual(index.hit(25, 10), ('b', 'bar'))
+        self.assertIsNone(index.hit(225, 155))
+        index.remove('missing')
+        index.clear()
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.cells, {})
+        self.assertEqual(index.level_counts, {})
+
+    def test_long_shapes_use_few_cells(self):
+        index = GridIndex()
+        index.add_rect('bar', 3, 0, 90000, 20)
+        index.add_segment('arrow', 100, 30, 700, 60000)
+        for key in ('bar', 'arrow'):
+            for _, _, _, cells in index.shapes[key]:
+                self.assertLessEqual(len(cells), 4)
+        self.assertEqual(index.hit(45000, 10), ('bar', 'bar'))
+        index.remove('bar')
+        index.remove('arrow')
+        self.assertEqual(index.cells, {})
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        index = GridIndex()
+        shapes = []
+        for i in range(400):
+            x1, y1 = rng.uniform(0, 5000), rng.randrange(200) * 24
+            if rng.random() < 0.6:
+                coords = (x1, y1 + 4, x1 + rng.uniform(1, 1500), y1 + 20)
+                index.add_rect(i, *coords)
+                shapes.append((i, 'bar', coords))
+            else:
+                coords = (x1, y1 + 12, x1 + rng.uniform(-300, 3000), rng.randrange(200) * 24 + 12)
+                index.add_segment(i, *coords)
+                shapes.append((i, 'arrow', coords))
+        for key in range(0, 400, 7):
+            index.remove(key)
+        shapes = [shape for shape in shapes if shape[0] % 7]
+        for _ in range(2000):
+            x, y = rng.uniform(-10, 6500), rng.uniform(-10, 4900)
+            expected = sorted(
+                (KIND_PRIORITY[kind], key) for key, kind, coords in shapes
+                if (_rect_distance(coords, x, y) == 0 if kind == 'bar'
+                    else _segment_distance(coords, x, y) <= index.tolerance))
+            self.assertEqual(sorted((hit[0], hit[2]) for hit in index.query(x, y)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import logging
+import unittest
+from datetime import date
+from task_extractor import RuleBasedExtractor
+
+TODAY = date(2025, 3, 10).toordinal()  # 月曜日
+
+
+class TestRuleBasedExtractor(unittest.TestCase):
+    def setUp(self):
+        self.extractor = RuleBasedExtractor(clock=lambda: TODAY)
+
+    def extract(self, text):
+        return self.extractor.extract(text)
+
+    def test_japanese_sentence(self):
+        result = self.extract("設計レビュー 3/25から3日間、実装に依存")
+        self.assertEqual(result.info, {'name': '設計レビュー', 'start_date': '2025-03-25',
+                                       'duration': 3, 'depends_on': '実装'})
+        self.assertEqual(result.confidence, 1.0)
+
+    def test_english_sentence(self):
+        result = self.extract("Design review on Mar 25 for 16 hours, depends on Implementation")
+        self.assertEqual(result.info, {'name': 'Design review', 'start_date': '2025-03-25',
+                                       'duration': 2, 'depends_on': 'Implementation'})
+
+    def test_relative_dates_and_ranges(self):
+        self.assertEqual(self.extract("明日から2週間 結合テスト").info,
+                         {'name': '結合テスト', 'start_date': '2025-03-11', 'duration': 10})
+        self.assertEqual(self.extract("タスク「資料作成」を来週水曜から").info,
+                         {'name': '資料作成', 'start_date': '2025-03-19'})
+        self.assertEqual(self.extract("3/25〜3/28 リリース準備").info,
+                         {'name': 'リリース準備', 'start_date': '2025-03-25', 'end_date': '2025-03-28'})
+        # 年の省略は基準日に最も近い年
+        self.assertEqual(self.extract("12/20 棚卸し").info['start_date'], '2024-12-20')
+
+    def test_full_width_input(self):
+        self.assertEqual(self.extract("ＡＰＩ設計　３日間").info, {'name': 'API設計', 'duration': 3})
+
+    def test_low_confidence_for_vague_text(self):
+        result = self.extract("なんか良い感じにスケジュールを調整しておいて、たぶん月末ぐらい")
+        self.assertLess(result.confidence, 0.8)
+        self.assertEqual(self.extract("3日間").confidence, 0.0)
+        self.assertFalse(self.extract(""))
+
+    def test_hit_rate(self):
+        self.assertEqual(self.extractor.hit_rate, 0.0)
+        for hit in (True, True, True, False):
+            self.extractor.record(hit)
+        self.assertEqual(self.extractor.stats(), {'hits': 3, 'misses': 1, 'hit_rate': 0.75})
+
+
+class TestTaskAgentExtraction(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        from agents import TaskAgent
+        self.agent = TaskAgent()
+        self.agent.extractor.clock = lambda: TODAY
+        self.remote_calls = []
+
+        def remote(text):
+            self.remote_calls.append(text)
+            return {'name': 'モデルの結果'}
+        self.agent._extract_task_info_remote = remote
+
+    def test_fast_path_skips_model(self):
+        info = self.agent.extract_task_info("設計レビュー 3/25から3日間", offline=False)
+        self.assertEqual(info['name'], '設計レビュー')
+        self.assertEqual(self.remote_calls, [])
+
+    def test_low_confidence_falls_back_to_model(self):
+        text = "なんか良い感じにスケジュールを調整しておいて、たぶん月末ぐらい"
+        self.assertEqual(self.agent.extract_task_info(text, offline=False), {'name': 'モデルの結果'})
+        self.assertEqual(self.remote_calls, [text])
+        # オフラインではモデルを呼ばずにローカルの結果を返す
+        self.assertEqual(self.agent.extract_task_info(text, offline=True)['name'],
+                         'なんか良い感じにスケジュールを調整しておいて')
+        self.assertEqual(len(self.remote_calls), 1)
+        self.assertEqual(self.agent.extraction_stats()['hit_rate'], 0.0)
+
+    def test_bulk_creation_offline(self):
+        created, failed = self.agent.create_tasks_from_text([
+            "要件定義 2025-03-10から5日間",
+            "設計 3/17〜3/21、要件定義に依存",
+            "",
+            "実装の後に結合テスト 1週間",
+            "3日間",
+        ])
+        self.assertEqual([task['name'] for task in created], ['要件定義', '設計', '結合テスト'])
+        self.assertEqual(failed, ["3日間"])
+        self.assertEqual(created[1]['dependencies'], [created[0]['id']])
+        self.assertEqual(created[1]['start_date'], '2025-03-17')
+        self.assertEqual(self.remote_calls, [])
+        self.assertEqual(self.agent.extraction_stats()['hits'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
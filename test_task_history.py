@@ -0,0 +1,81 @@
+import logging
+import unittest
+from task_history import TaskHistory
+
+
+def make_tasks(count):
+    return [{'id': f"task-{i}", 'name': f"タスク{i}", 'progress': 0, 'status': 'created'} for i in range(count)]
+
+
+class TestTaskHistory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_undo_redo_report_changed_ids(self):
+        history = TaskHistory()
+        tasks = make_tasks(100)
+        history.commit(tasks, 'インポート')
+        edited = list(tasks)
+        edited[5] = dict(tasks[5], progress=50)
+        self.assertEqual(history.commit(edited, '進捗更新'), ['task-5'])
+
+        label, changed = history.undo()
+        self.assertEqual((label, changed), ('進捗更新', ['task-5']))
+        self.assertEqual(history.current.to_list()[5]['progress'], 0)
+        label, changed = history.redo()
+        self.assertEqual(changed, ['task-5'])
+        self.assertEqual(history.current.to_list()[5]['progress'], 50)
+
+    def test_unchanged_commit_is_not_recorded(self):
+        history = TaskHistory()
+        tasks = make_tasks(10)
+        history.commit(tasks)
+        self.assertEqual(history.commit(list(tasks)), [])
+        self.assertEqual(len(history.undo_stack), 1)
+
+    def test_removed_tasks_and_limit(self):
+        history = TaskHistory(limit=3)
+        tasks = make_tasks(5)
+        history.commit(tasks)
+        self.assertEqual(history.commit(tasks[:4]), ['task-4'])
+        self.assertEqual(len(history.current.tasks), 4)
+        for progress in range(5):
+            history.commit([dict(tasks[0], progress=progress)] + tasks[1:4])
+        self.assertEqual(len(history.undo_stack), 3)
+        self.assertFalse(history.can_redo())
+
+    def test_commit_changes_appends_without_scanning(self):
+        history = TaskHistory()
+        tasks = make_tasks(10)
+        history.commit(tasks)
+        order = history.current.order
+        updated = dict(tasks[2], progress=30)
+        appended = make_tasks(12)[10:]
+        changed = history.commit_changes([updated], appended, '追従')
+        self.assertEqual(sorted(changed), ['task-10', 'task-11', 'task-2'])
+        self.assertEqual(history.current.order[:10], order)
+        self.assertEqual(len(history.current.order), 12)
+        self.assertEqual(history.current.to_list()[2]['progress'], 30)
+        self.assertEqual(history.commit_changes(), [])
+
+        label, changed = history.undo()
+        self.assertEqual(label, '追従')
+        self.assertEqual(len(history.current.to_list()), 10)
+
+    def test_dialogue_update_shares_unchanged_tasks(self):
+        from agents import DialogueAgent
+        tasks = make_tasks(20)
+        result = DialogueAgent().process_input("タスク3を完了", tasks)
+        updated = result['tasks']
+        self.assertEqual(updated[3]['status'], 'completed')
+        self.assertIsNot(updated[3], tasks[3])
+        self.assertTrue(all(updated[i] is tasks[i] for i in range(20) if i != 3))
+
+        history = TaskHistory()
+        history.commit(tasks)
+        self.assertEqual(history.commit(updated), ['task-3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
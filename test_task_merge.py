@@ -0,0 +1,94 @@
+import logging
+import unittest
+
+from task_merge import KeyAssigner, import_key, merge_tasks, task_id
+
+
+def imported(raw_task, key):
+    """GanttChart.convert_to_task_schema と同じ形のタスク"""
+    return {
+        'id': task_id(key),
+        'name': raw_task['name'],
+        'start_date': raw_task['start_date'],
+        'end_date': raw_task['end_date'],
+        'progress': raw_task.get('progress', 0),
+        'status': 'created',
+        'dependencies': [],
+        'metadata': {'created_at': '2024-01-01T00:00:00', 'updated_at': '2024-01-01T00:00:00',
+                     'duration': raw_task.get('duration', 0), 'original_data': raw_task}
+    }
+
+
+def import_rows(rows):
+    keys = KeyAssigner()
+    return [imported(dict(row), keys(row)) for row in rows]
+
+
+ROWS = [
+    {'key': 'PRJ-1', 'name': '設計', 'start_date': '2024-03-01', 'end_date': '2024-03-05', 'progress': 0},
+    {'key': 'PRJ-2', 'name': '実装', 'start_date': '2024-03-06', 'end_date': '2024-03-20', 'progress': 0},
+    {'key': 'PRJ-3', 'name': 'テスト', 'start_date': '2024-03-21', 'end_date': '2024-03-29', 'progress': 0},
+]
+
+
+class TestTaskMerge(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.current = {task['id']: task for task in import_rows(ROWS)}
+
+    def test_ids_are_derived_from_keys(self):
+        self.assertEqual(task_id('PRJ-1'), task_id('PRJ-1'))
+        self.assertNotEqual(task_id('PRJ-1'), task_id('PRJ-2'))
+        self.assertEqual(import_key({'ticket': 'T-9', 'name': '設計'}), 'T-9')
+        self.assertEqual(import_key({'key': float('nan'), 'name': '設計'}), '設計')
+        keys = KeyAssigner()
+        self.assertEqual([keys({'name': name}) for name in ['設計', '実装', '設計']], ['設計', '実装', '設計#2'])
+
+    def test_reimport_without_changes_is_skipped(self):
+        result = merge_tasks(self.current, import_rows(ROWS))
+        self.assertFalse(result)
+        self.assertEqual(result.unchanged, 3)
+
+    def test_changed_fields_keep_local_edits(self):
+        # アプリ上で進捗・状態・依存関係を編集済み
+        design_id, build_id = task_id('PRJ-1'), task_id('PRJ-2')
+        self.current[build_id] = dict(self.current[build_id], progress=40, status='in_progress',
+                                      dependencies=[design_id])
+        rows = [dict(row) for row in ROWS]
+        rows[1]['end_date'] = '2024-03-25'
+        rows.append({'key': 'PRJ-4', 'name': 'リリース', 'start_date': '2024-04-01',
+                     'end_date': '2024-04-01', 'progress': 0})
+
+        result = merge_tasks(self.current, import_rows(rows))
+        self.assertEqual(result.unchanged, 2)
+        self.assertEqual([task['name'] for task in result.appended], ['リリース'])
+        updated, = result.updated
+        self.assertEqual(updated['id'], build_id)
+        self.assertEqual(updated['end_date'], '2024-03-25')
+        self.assertEqual((updated['progress'], updated['status'], updated['dependencies']),
+                         (40, 'in_progress', [design_id]))
+        self.assertEqual(updated['metadata']['original_data']['end_date'], '2024-03-25')
+        self.assertEqual(result.summary(), "追加 1件・更新 1件・変更なし 2件")
+
+    def test_progress_changed_in_source_is_applied(self):
+        rows = [dict(row) for row in ROWS]
+        rows[0]['progress'] = 100
+        updated, = merge_tasks(self.current, import_rows(rows)).updated
+        self.assertEqual(updated['progress'], 100)
+
+    def test_upsert_through_project_store(self):
+        from project_service import ProjectStore
+        store = ProjectStore()
+        store.apply([{'type': 'upsert_tasks', 'tasks': import_rows(ROWS)}])
+        store.apply([{'type': 'command', 'text': '設計を完了'}])
+        results, event = store.apply([{'type': 'upsert_tasks', 'tasks': import_rows(ROWS)}])
+        self.assertIsNone(event)
+        self.assertEqual(results[0]['message'], "追加 0件・更新 0件・変更なし 3件")
+        self.assertEqual(store.tasks[0]['status'], 'completed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from datetime import date
+from timeline import TimelineSummary, bucket_key
+from gantt_layout import GanttLayout
+
+def task(task_id, start, end, progress=0):
+    return {'id': task_id, 'name': task_id, 'start_date': start, 'end_date': end, 'progress': progress}
+
+class TestTimelineSummary(unittest.TestCase):
+    def setUp(self):
+        self.timeline = TimelineSummary()
+        # 2024-03-04 は月曜日
+        self.timeline.sync([
+            task('a', '2024-03-04', '2024-03-10', 50),
+            task('b', '2024-03-09', '2024-03-12', 100),
+        ])
+
+    def stats(self, granularity, day):
+        key = bucket_key(date.fromisoformat(day).toordinal(), granularity)
+        return self.timeline.buckets[granularity][key]
+
+    def test_week_aggregates(self):
+        week = self.stats('weeks', '2024-03-04')
+        self.assertEqual(week.task_count, 2)
+        self.assertEqual(week.task_days, 7 + 2)
+        self.assertEqual(week.busy_days, 7)
+        self.assertAlmostEqual(week.progress, (7 * 50 + 2 * 100) / 9)
+        next_week = self.stats('weeks', '2024-03-11')
+        self.assertEqual(next_week.task_count, 1)
+        self.assertEqual(next_week.busy_days, 2)
+
+    def test_month_aggregates(self):
+        month = self.stats('months', '2024-03-01')
+        self.assertEqual(month.task_count, 2)
+        self.assertEqual(month.busy_days, 9)
+
+    def test_incremental_update(self):
+        """変更されたタスクだけを差し替える"""
+        self.timeline.sync([
+            task('a', '2024-03-04', '2024-03-10', 50),
+            task('b', '2024-04-01', '2024-04-02', 100),
+        ])
+        self.assertEqual(self.stats('months', '2024-03-01').busy_days, 7)
+        self.assertEqual(self.stats('months', '2024-04-01').task_count, 1)
+        self.timeline.sync([])
+        self.assertEqual(self.timeline.buckets['weeks'], {})
+        self.assertEqual(self.timeline.day_counts, {})
+
+    def test_summary_includes_empty_buckets(self):
+        start = date(2024, 1, 1).toordinal()
+        end = date(2024, 12, 31).toordinal()
+        self.assertEqual(len(self.timeline.summary('months', start, end)), 12)
+
+class TestBucketLayout(unittest.TestCase):
+    def test_cells_follow_bucket_count(self):
+        """数年のプロジェクトでもセル数はバケット数"""
+        layout = GanttLayout(view_mode='months')
+        cells = layout.bucket_cells(date(2020, 1, 15).toordinal(), date(2024, 12, 1).toordinal())
+        self.assertEqual(len(cells), 60)
+        self.assertEqual(cells[0][1], '2020-01')
+
+    def test_week_x(self):
+        layout = GanttLayout(view_mode='weeks')
+        start = date(2024, 3, 6).toordinal()  # 水曜日
+        self.assertEqual(layout.ordinal_to_cell(date(2024, 3, 11).toordinal(), start), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import json
+from tracing import Tracer, Histogram
+
+class TestTracing(unittest.TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span('stage'):
+            pass
+        self.assertEqual(tracer.stats(), {})
+
+    def test_span_records_histogram(self):
+        tracer = Tracer(enabled=True)
+        for _ in range(5):
+            with tracer.span('stage'):
+                pass
+        stats = tracer.stats()['stage']
+        self.assertEqual(stats['count'], 5)
+        self.assertLessEqual(stats['p50'], stats['max'])
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram(reservoir_size=200)
+        for i in range(1, 101):
+            histogram.add(i / 1000)
+        summary = histogram.summary()
+        self.assertAlmostEqual(summary['p50'], 0.050, places=3)
+        self.assertAlmostEqual(summary['p95'], 0.095, places=3)
+        self.assertEqual(summary['max'], 0.1)
+
+    def test_dump_is_json(self):
+        tracer = Tracer(enabled=True)
+        tracer.record('gemini', 0.5)
+        data = json.loads(tracer.dump())
+        self.assertEqual(data['stages']['gemini']['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
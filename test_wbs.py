@@ -0,0 +1,120 @@
+import logging
+import random
+import unittest
+
+import dates
+from wbs import WBSTree, is_structural_change
+
+
+def make_task(task_id, start, end, progress=0, parent=None):
+    return {'id': task_id, 'name': task_id, 'start_date': dates.to_iso(start), 'end_date': dates.to_iso(end),
+            'progress': progress, 'parent': parent}
+
+
+BASE = dates.to_ordinal('2024-04-01')
+
+
+def make_tree_tasks():
+    # 設計(d1, d2) と 実装(i1 -> i1a, i1b) の2つの工程
+    return [
+        make_task('design', BASE, BASE),
+        make_task('d1', BASE, BASE + 4, 100, 'design'),
+        make_task('d2', BASE + 5, BASE + 9, 0, 'design'),
+        make_task('impl', BASE, BASE),
+        make_task('i1', BASE, BASE, 0, 'impl'),
+        make_task('i1a', BASE + 10, BASE + 19, 50, 'i1'),
+        make_task('i1b', BASE + 20, BASE + 29, 0, 'i1'),
+        make_task('release', BASE + 30, BASE + 30),
+    ]
+
+
+class TestWBSTree(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def setUp(self):
+        self.tree = WBSTree()
+        self.tree.build(make_tree_tasks())
+
+    def test_rollup_span_and_weighted_progress(self):
+        design = self.tree.summaries['design']
+        self.assertEqual((design.start, design.end), (BASE, BASE + 9))
+        self.assertEqual(design.progress, 50)
+        impl = self.tree.summaries['impl']
+        self.assertEqual((impl.start, impl.end), (BASE + 10, BASE + 29))
+        self.assertEqual(impl.progress, 25)
+        self.assertEqual(self.tree.project_range(), (BASE, BASE + 30))
+
+    def test_project_range_without_dates(self):
+        tree = WBSTree()
+        tree.build([dict(make_task('t1', BASE, BASE), start_date='未定', end_date=None)])
+        self.assertEqual(tree.project_range(), (None, None))
+
+    def test_visible_rows_follow_collapsed_state(self):
+        self.assertEqual(self.tree.visible_rows(),
+                         ['design', 'd1', 'd2', 'impl', 'i1', 'i1a', 'i1b', 'release'])
+        self.assertEqual(self.tree.visible_rows({'impl'}), ['design', 'd1', 'd2', 'impl', 'release'])
+        self.assertEqual(self.tree.visible_rows({'design', 'i1'}), ['design', 'impl', 'i1', 'release'])
+        self.assertEqual(self.tree.depth('i1a'), 2)
+
+    def test_update_touches_only_ancestor_chain(self):
+        changed = self.tree.update(make_task('i1b', BASE + 20, BASE + 34, 20, 'i1'))
+        self.assertEqual(changed, ['i1', 'impl'])
+        self.assertEqual(self.tree.summaries['impl'].end, BASE + 34)
+        self.assertEqual(self.tree.summaries['design'].end, BASE + 9)
+        # 値が変わらなければ祖先も更新しない
+        self.assertEqual(self.tree.update(make_task('i1b', BASE + 20, BASE + 34, 20, 'i1')), [])
+
+    def test_incremental_update_matches_rebuild(self):
+        rng = random.Random(7)
+        tasks = [make_task(f"p{p}", BASE, BASE) for p in range(5)]
+        for p in range(5):
+            tasks += [make_task(f"p{p}-{c}", BASE + c, BASE + c + 3, 0, f"p{p}") for c in range(6)]
+            tasks += [make_task(f"p{p}-0-{g}", BASE + g, BASE + g + 1, 0, f"p{p}-0") for g in range(3)]
+        tree = WBSTree()
+        tree.build(tasks)
+        leaves = [i for i, task in enumerate(tasks) if not tree.has_children(task['id'])]
+        for _ in range(300):
+            i = rng.choice(leaves)
+            start = BASE + rng.randint(-5, 30)
+            tasks[i] = dict(tasks[i], start_date=dates.to_iso(start),
+                            end_date=dates.to_iso(start + rng.randint(0, 10)), progress=rng.randint(0, 100))
+            tree.update(tasks[i])
+        rebuilt = WBSTree()
+        rebuilt.build(tasks)
+        for task_id, summary in rebuilt.summaries.items():
+            self.assertEqual(tree.summaries[task_id].start, summary.start)
+            self.assertEqual(tree.summaries[task_id].end, summary.end)
+            self.assertAlmostEqual(tree.summaries[task_id].progress, summary.progress)
+
+    def test_missing_and_cyclic_parents_become_roots(self):
+        tasks = [make_task('a', BASE, BASE, parent='b'), make_task('b', BASE, BASE, parent='a'),
+                 make_task('c', BASE, BASE, parent='unknown')]
+        tree = WBSTree()
+        tree.build(tasks)
+        self.assertEqual(sorted(tree.visible_rows()), ['a', 'b', 'c'])
+        self.assertIn('c', tree.roots)
+        self.assertEqual(len([task_id for task_id in ('a', 'b') if task_id in tree.roots]), 1)
+
+    def test_structural_changes(self):
+        task = make_task('x', BASE, BASE)
+        self.assertFalse(is_structural_change(None, task))
+        self.assertTrue(is_structural_change(None, dict(task, parent='design')))
+        self.assertTrue(is_structural_change(task, None))
+        self.assertTrue(is_structural_change(task, dict(task, parent='design')))
+        self.assertFalse(is_structural_change(task, dict(task, progress=30)))
+
+    def test_set_parent_rejects_cycles(self):
+        from agents import TaskAgent
+        agent = TaskAgent()
+        tasks = agent.validate_tasks(make_tree_tasks())
+        by_id = {task['id']: task for task in tasks}
+        agent.set_parent(by_id['impl'], by_id['i1a'], tasks)
+        self.assertIsNone(by_id['impl']['parent'])
+        agent.set_parent(by_id['release'], by_id['impl'], tasks)
+        self.assertEqual(by_id['release']['parent'], 'impl')
+
+
+if __name__ == '__main__':
+    unittest.main()
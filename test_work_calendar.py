@@ -0,0 +1,95 @@
+import unittest
+import logging
+from datetime import date
+import numpy as np
+import pandas as pd
+from work_calendar import WorkCalendar
+from csv_analyzer_ai import GeminiCSVAnalyzer
+from agents import TaskAgent
+
+def ordinal(text):
+    return date.fromisoformat(text).toordinal()
+
+class TestWorkCalendar(unittest.TestCase):
+    def setUp(self):
+        # 2025-03-21(金) の翌月曜 03-24 を祝日にする
+        self.calendar = WorkCalendar(hours_per_day=8, holidays=['2025-03-24'])
+
+    def test_end_dates_vectorized(self):
+        starts = np.array([ordinal('2025-03-20'), ordinal('2025-03-20'), ordinal('2025-03-22'), 0])
+        hours = np.array([8, 16, 4, 8])
+        ends = self.calendar.end_dates(starts, hours)
+        self.assertEqual(ends[0], ordinal('2025-03-20'))
+        self.assertEqual(ends[1], ordinal('2025-03-21'))
+        # 土曜開始は週末と祝日を飛ばして火曜日に実施
+        self.assertEqual(ends[2], ordinal('2025-03-25'))
+        self.assertEqual(ends[3], 0)
+
+    def test_roll_to_workday(self):
+        # 土曜日は前なら金曜日、後なら祝日を飛ばして火曜日
+        saturday = ordinal('2025-03-22')
+        self.assertEqual(self.calendar.roll_backward(saturday), ordinal('2025-03-21'))
+        self.assertEqual(self.calendar.roll_forward(saturday), ordinal('2025-03-25'))
+        self.assertEqual(self.calendar.start_dates([saturday, 0]).tolist(), [ordinal('2025-03-25'), 0])
+
+    def test_missing_hours_take_one_day(self):
+        self.assertEqual(self.calendar.end_date(ordinal('2025-03-20'), float('nan')), ordinal('2025-03-20'))
+
+    def test_large_column(self):
+        starts = np.full(1_000_000, ordinal('2025-01-06'))
+        ends = self.calendar.end_dates(starts, np.full(1_000_000, 40.0))
+        self.assertTrue((ends == ordinal('2025-01-10')).all())
+
+class TestCalendarIntegration(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(level=logging.ERROR)
+
+    def test_duration_csv(self):
+        """終了日のないCSVは作業時間から終了日を求める"""
+        analyzer = GeminiCSVAnalyzer(calendar=WorkCalendar())
+        df = pd.read_csv('sample_template.csv')
+        mapping = {'task_name': 'task_name', 'start_date': 'start_date', 'end_date': None, 'duration': 'duration'}
+        self.assertTrue(analyzer._validate_mapping(mapping))
+        tasks = analyzer.validate_and_transform_data(df, mapping)
+        # 2025-03-22 は土曜日、週末の開始日は月曜日に送る
+        self.assertEqual([(t['start_date'], t['end_date']) for t in tasks], [
+            ('2025-03-24', '2025-03-24'),
+            ('2025-03-24', '2025-03-25'),
+            ('2025-03-24', '2025-03-24'),
+        ])
+        self.assertEqual(tasks[1]['duration'], 16)
+        # 対話で作るタスクと同じ日程になる
+        agent = TaskAgent()
+        agent.calendar = analyzer.calendar
+        task = agent.create_task('実装', '2025-03-23', duration=2)
+        self.assertEqual((task['start_date'], task['end_date']), ('2025-03-24', '2025-03-25'))
+
+    def test_create_task_skips_weekend(self):
+        agent = TaskAgent()
+        agent.calendar = WorkCalendar()
+        task = agent.create_task('設計', '2025-03-21', duration=1)
+        self.assertEqual((task['start_date'], task['end_date']), ('2025-03-21', '2025-03-21'))
+        task = agent.create_task('設計', '2025-03-21', duration=2)
+        self.assertEqual(task['end_date'], '2025-03-24')
+
+    def test_reschedule_keeps_workdays(self):
+        agent = TaskAgent()
+        agent.calendar = WorkCalendar()
+        task = agent.create_task('設計', '2025-03-17', duration=3)
+        agent.reschedule_task(task, '2025-03-20')
+        self.assertEqual((task['start_date'], task['end_date']), ('2025-03-20', '2025-03-24'))
+        agent.reschedule_task(task, '2025-03-22')
+        self.assertEqual((task['start_date'], task['end_date']), ('2025-03-24', '2025-03-26'))
+
+    def test_reschedule_tasks_skips_undated(self):
+        agent = TaskAgent()
+        agent.calendar = WorkCalendar()
+        tasks = [agent.create_task('設計', '2025-03-20', duration=2),
+                 {'name': '未定', 'start_date': None, 'end_date': '不明', 'metadata': {}}]
+        agent.reschedule_tasks(tasks, 2)
+        self.assertEqual((tasks[0]['start_date'], tasks[0]['end_date']), ('2025-03-24', '2025-03-25'))
+        self.assertEqual((tasks[1]['start_date'], tasks[1]['end_date']), (None, '不明'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import logging
+from datetime import date
+from dates import task_start, task_end
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('weeks', 'months')
+
+
+def bucket_key(ordinal, granularity):
+    """日付（序数）が属するバケットのキー"""
+    if granularity == 'weeks':
+        # 月曜日の序数
+        return ordinal - date.fromordinal(ordinal).weekday()
+    if granularity == 'months':
+        day = date.fromordinal(ordinal)
+        return day.year * 12 + day.month - 1
+    return ordinal
+
+
+def bucket_start(key, granularity):
+    """バケットの初日（序数）"""
+    if granularity == 'months':
+        return date(key // 12, key % 12 + 1, 1).toordinal()
+    return key
+
+
+def bucket_end(key, granularity):
+    """バケットの最終日の翌日（序数）"""
+    if granularity == 'weeks':
+        return key + 7
+    if granularity == 'months':
+        return bucket_start(key + 1, granularity)
+    return key + 1
+
+
+def bucket_label(key, granularity):
+    """バケットの表示ラベル"""
+    if granularity == 'months':
+        return f"{key // 12}-{key % 12 + 1:02d}"
+    return date.fromordinal(bucket_start(key, granularity)).strftime('%m/%d')
+
+
+def task_span(task):
+    """タスクの期間を (開始日, 終了日) の序数で返す（終了日を含む、解釈できなければNone）"""
+    start, end = task_start(task), task_end(task)
+    if start is None or end is None:
+        return None
+    return start, max(start, end)
+
+
+class BucketStats:
+    """1つのバケット（週・月）の集計値"""
+    __slots__ = ('task_count', 'task_days', 'progress_days', 'busy_days')
+
+    def __init__(self):
+        self.task_count = 0  # バケットと重なるタスク数
+        self.task_days = 0  # タスク日数の合計
+        self.progress_days = 0  # 進捗率×日数の合計
+        self.busy_days = 0  # タスクが1件以上ある日数
+
+    @property
+    def progress(self):
+        """日数で重み付けした平均進捗率"""
+        return self.progress_days / self.task_days if self.task_days else 0
+
+    def to_dict(self):
+        return {
+            'task_count': self.task_count,
+            'task_days': self.task_days,
+            'progress': self.progress,
+            'busy_days': self.busy_days
+        }
+
+
+class TimelineSummary:
+    """週・月単位のタイムライン集計（タスクの追加・変更・削除ごとに差分更新）"""
+    def __init__(self, granularities=GRANULARITIES):
+        self.granularities = granularities
+        self.buckets = {granularity: {} for granularity in granularities}
+        self.day_counts = {}  # 日付の序数 -> その日に実施中のタスク数
+        self.tasks = {}  # タスクID -> (開始日, 終了日, 進捗率)
+
+    def _apply(self, entry, sign):
+        start, end, progress = entry
+        for granularity in self.granularities:
+            buckets = self.buckets[granularity]
+            key = bucket_key(start, granularity)
+            while bucket_start(key, granularity) <= end:
+                days = min(end + 1, bucket_end(key, granularity)) - max(start, bucket_start(key, granularity))
+                stats = buckets.get(key)
+                if stats is None:
+                    stats = buckets[key] = BucketStats()
+                stats.task_count += sign
+                stats.task_days += sign * days
+                stats.progress_days += sign * days * progress
+                if stats.task_count == 0:
+                    del buckets[key]
+                key = bucket_key(bucket_end(key, granularity), granularity)
+
+        # 稼働日数は日ごとのタスク数が0と1の間で変化したときだけ更新
+        for day in range(start, end + 1):
+            count = self.day_counts.get(day, 0) + sign
+            if count:
+                self.day_counts[day] = count
+            else:
+                del self.day_counts[day]
+            if (sign > 0 and count == 1) or (sign < 0 and count == 0):
+                for granularity in self.granularities:
+                    stats = self.buckets[granularity].get(bucket_key(day, granularity))
+                    if stats is not None:
+                        stats.busy_days += sign
+
+    def add_task(self, task):
+        """タスクを集計に追加（既存のIDなら更新）"""
+        span = task_span(task)
+        if span is None:
+            logger.debug(f"期間を解釈できないタスクを集計から除外: {task.get('name')}")
+            self.remove_task(task.get('id'))
+            return
+        entry = (span[0], span[1], task.get('progress', 0) or 0)
+        old = self.tasks.get(task.get('id'))
+        if old == entry:
+            return
+        if old is not None:
+            self._apply(old, -1)
+        self._apply(entry, 1)
+        self.tasks[task.get('id')] = entry
+
+    def remove_task(self, task_id):
+        """タスクを集計から削除"""
+        old = self.tasks.pop(task_id, None)
+        if old is not None:
+            self._apply(old, -1)
+
+    def sync(self, tasks):
+        """タスクリストとの差分だけを反映"""
+        seen = set()
+        for task in tasks:
+            seen.add(task.get('id'))
+            self.add_task(task)
+        for task_id in [task_id for task_id in self.tasks if task_id not in seen]:
+            self.remove_task(task_id)
+
+    def summary(self, granularity, start=None, end=None):
+        """バケットの集計を時系列順に返す（start/endは日付の序数、空のバケットも含む）"""
+        buckets = self.buckets[granularity]
+        if start is None or end is None:
+            if not self.tasks:
+                return []
+            start = min(entry[0] for entry in self.tasks.values()) if start is None else start
+            end = max(entry[1] for entry in self.tasks.values()) if end is None else end
+        result = []
+        key = bucket_key(start, granularity)
+        while bucket_start(key, granularity) <= end:
+            result.append((key, buckets.get(key) or BucketStats()))
+            key = bucket_key(bucket_end(key, granularity), granularity)
+        return result
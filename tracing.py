@@ -0,0 +1,149 @@
+import atexit
+import functools
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+# 環境変数 GANTT_TRACE=1 で計測を有効化、GANTT_TRACE_FILE を指定すると終了時に書き出す
+TRACE_ENV = 'GANTT_TRACE'
+TRACE_FILE_ENV = 'GANTT_TRACE_FILE'
+
+
+class Histogram:
+    """処理時間の分布（固定サイズのリザーバサンプルで分位点を近似）"""
+    def __init__(self, reservoir_size=1024):
+        self.reservoir_size = reservoir_size
+        self.samples = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._random = random.Random(0)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(seconds)
+        else:
+            index = self._random.randrange(self.count)
+            if index < self.reservoir_size:
+                self.samples[index] = seconds
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        # nearest-rank法
+        ordered = sorted(self.samples)
+        index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': self.max
+        }
+
+
+class _NullSpan:
+    """計測無効時に使う何もしないスパン"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Tracer:
+    """処理段階ごとの所要時間を集計するトレーサー"""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """処理段階の計測（with文で使用）"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        """計測値を記録"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def stats(self):
+        """段階ごとの集計結果（秒）"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def dump(self, path=None, extra=None):
+        """集計結果をJSONで出力（pathを指定するとファイルに書き出す、extraは追加する項目の辞書）"""
+        data = json.dumps(dict({
+            'generated_at': datetime.now().isoformat(),
+            'unit': 'seconds',
+            'stages': self.stats()
+        }, **(extra or {})), ensure_ascii=False, indent=2)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        return data
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+
+tracer = Tracer(enabled=os.getenv(TRACE_ENV, '').lower() in ('1', 'true', 'yes'))
+
+
+def span(name):
+    """既定のトレーサーでスパンを開始"""
+    return tracer.span(name)
+
+
+def traced(name):
+    """関数全体を計測するデコレータ"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if tracer.enabled and os.getenv(TRACE_FILE_ENV):
+    atexit.register(tracer.dump, os.getenv(TRACE_FILE_ENV))
@@ -0,0 +1,191 @@
+from dates import task_start, task_end
+
+
+class Summary:
+    """1ノード分の集計（子を持つノードは子孫の集計、葉はタスク自身の値）"""
+    __slots__ = ('start', 'end', 'weight', 'done')
+
+    def __init__(self, start=None, end=None, weight=0.0, done=0.0):
+        self.start = start  # 最初の開始日（序数）
+        self.end = end  # 最後の終了日（序数）
+        self.weight = weight  # 重み（期間の日数）の合計
+        self.done = done  # 重み×進捗率の合計
+
+    @property
+    def progress(self):
+        return self.done / self.weight if self.weight else 0.0
+
+    def key(self):
+        return self.start, self.end, self.weight, self.done
+
+
+def _leaf_summary(task):
+    start, end = task_start(task), task_end(task)
+    if start is None:
+        return Summary()
+    end = start if end is None or end < start else end
+    weight = float(end - start + 1)
+    return Summary(start, end, weight, weight * (task.get('progress') or 0))
+
+
+class WBSTree:
+    """タスクの親子関係（task['parent'] に親のID）と親タスクの期間・進捗率の集計
+
+    親の期間は子孫の最初の開始日から最後の終了日まで、進捗率は期間の日数で重み付けした平均。
+    タスクの値の変更は祖先をたどって集計を差分で更新するため、木全体を集計し直さない。
+    親の変更・タスクの追加・削除のような構造の変更は build で作り直す。
+    """
+    def __init__(self):
+        self.parent = {}  # ID -> 親のID（ルートはNone）
+        self.children = {}  # ID -> 子のIDのリスト（タスクの並び順）
+        self.roots = []
+        self.summaries = {}  # ID -> Summary
+
+    def __len__(self):
+        return len(self.parent)
+
+    def __contains__(self, task_id):
+        return task_id in self.parent
+
+    def build(self, tasks):
+        """タスクのリストから木を作り、全ノードを集計（存在しない親・循環する親はルート扱い）"""
+        ids = {task['id'] for task in tasks}
+        self.parent = {}
+        self.children = {}
+        self.roots = []
+        self.summaries = {}
+        for task in tasks:
+            parent = task.get('parent')
+            self.parent[task['id']] = parent if parent in ids and parent != task['id'] else None
+        self._break_cycles()
+        for task in tasks:
+            parent = self.parent[task['id']]
+            if parent is None:
+                self.roots.append(task['id'])
+            else:
+                self.children.setdefault(parent, []).append(task['id'])
+            self.summaries[task['id']] = _leaf_summary(task)
+        # 子を持つノードは子孫から集計（深いノードから順に）
+        for task_id in reversed(list(self.walk())):
+            if task_id in self.children:
+                self.summaries[task_id] = self._aggregate(task_id)
+
+    def _break_cycles(self):
+        state = {}  # ID -> 1: 確認中, 2: 確認済み
+        for task_id in self.parent:
+            path = []
+            node = task_id
+            while node is not None and node not in state:
+                state[node] = 1
+                path.append(node)
+                node = self.parent[node]
+            if node is not None and state[node] == 1:
+                # 循環を見つけたら、循環に入った先のノードをルートにする
+                self.parent[node] = None
+            for node in path:
+                state[node] = 2
+
+    def _aggregate(self, task_id):
+        summary = Summary()
+        for child in self.children[task_id]:
+            self._merge(summary, self.summaries[child])
+        return summary
+
+    @classmethod
+    def _merge(cls, summary, child):
+        cls._merge_range(summary, child)
+        summary.weight += child.weight
+        summary.done += child.done
+
+    def has_children(self, task_id):
+        return task_id in self.children
+
+    def depth(self, task_id):
+        depth = 0
+        parent = self.parent.get(task_id)
+        while parent is not None:
+            depth += 1
+            parent = self.parent[parent]
+        return depth
+
+    def ancestors(self, task_id):
+        parent = self.parent.get(task_id)
+        while parent is not None:
+            yield parent
+            parent = self.parent[parent]
+
+    def walk(self, collapsed=()):
+        """深さ優先の並び順でIDを返す（collapsed に含まれるノードの子孫は飛ばす）"""
+        stack = list(reversed(self.roots))
+        while stack:
+            task_id = stack.pop()
+            yield task_id
+            if task_id not in collapsed:
+                stack.extend(reversed(self.children.get(task_id, ())))
+
+    def visible_rows(self, collapsed=()):
+        """表示する行のIDのリスト（折りたたんだ部分木は親の1行になる）"""
+        if not self.children:
+            return list(self.roots)
+        return list(self.walk(collapsed))
+
+    def project_range(self):
+        """プロジェクトの開始日と終了日（ルートの集計から求める。日付のあるタスクがなければ (None, None)）"""
+        starts = [self.summaries[task_id].start for task_id in self.roots]
+        ends = [self.summaries[task_id].end for task_id in self.roots]
+        return (min((start for start in starts if start is not None), default=None),
+                max((end for end in ends if end is not None), default=None))
+
+    def add_root(self, task):
+        """親のないタスクを末尾に追加"""
+        self.parent[task['id']] = None
+        self.roots.append(task['id'])
+        self.summaries[task['id']] = _leaf_summary(task)
+
+    def update(self, task):
+        """タスクの値の変更を反映し、集計が変わった祖先のIDを近い順に返す
+
+        祖先ごとの更新は合計の差分だけで済ませ、開始日・終了日が縮んだ場合だけその祖先の子を見直す。
+        """
+        task_id = task['id']
+        if task_id in self.children:
+            return []  # 子を持つタスクの値は集計に使わない
+        old = self.summaries[task_id]
+        new = _leaf_summary(task)
+        if old.key() == new.key():
+            return []
+        self.summaries[task_id] = new
+        changed = []
+        for ancestor in self.ancestors(task_id):
+            summary = self.summaries[ancestor]
+            before = summary.key()
+            summary.weight += new.weight - old.weight
+            summary.done += new.done - old.done
+            if (old.start is not None and old.start == summary.start
+                    and (new.start is None or new.start > old.start)) \
+                    or (old.end is not None and old.end == summary.end
+                        and (new.end is None or new.end < old.end)):
+                # 最初・最後だった子が縮んだ場合は子から求め直す
+                recomputed = self._aggregate(ancestor)
+                summary.start, summary.end = recomputed.start, recomputed.end
+            else:
+                self._merge_range(summary, new)
+            if summary.key() == before:
+                break
+            changed.append(ancestor)
+            old, new = Summary(*before), summary
+        return changed
+
+    @staticmethod
+    def _merge_range(summary, child):
+        if child.start is not None and (summary.start is None or child.start < summary.start):
+            summary.start = child.start
+        if child.end is not None and (summary.end is None or child.end > summary.end):
+            summary.end = child.end
+
+
+def is_structural_change(old, new):
+    """木を作り直す必要のある変更か（削除・親の変更・親のあるタスクの追加）"""
+    if old is None:
+        return new is None or new.get('parent') is not None
+    return new is None or old.get('parent') != new.get('parent')
@@ -0,0 +1,102 @@
+import logging
+import os
+
+import numpy as np
+
+import dates
+
+logger = logging.getLogger(__name__)
+
+
+def _to_days(ordinals):
+    """日の序数を numpy の datetime64[D] に変換"""
+    return (np.asarray(ordinals, dtype=np.int64) - dates.EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+def _to_ordinals(days):
+    return days.astype(np.int64) + dates.EPOCH_ORDINAL
+
+
+class WorkCalendar:
+    """稼働日カレンダー（1日の稼働時間・週の稼働曜日・祝日）
+
+    計算はnumpyの営業日関数で列ごとにまとめて行う。
+    """
+    def __init__(self, hours_per_day=8, weekmask='1111100', holidays=()):
+        self.hours_per_day = hours_per_day
+        self.weekmask = weekmask
+        self.holidays = sorted(ordinal for ordinal in map(dates.to_ordinal, holidays) if ordinal)
+        self.busdaycal = np.busdaycalendar(weekmask=weekmask, holidays=_to_days(self.holidays))
+
+    @classmethod
+    def from_env(cls):
+        """環境変数から作成（GANTT_WORK_HOURS, GANTT_WEEKMASK, GANTT_HOLIDAYS_FILE）"""
+        holidays = []
+        holidays_file = os.getenv('GANTT_HOLIDAYS_FILE')
+        if holidays_file:
+            try:
+                with open(holidays_file, encoding='utf-8') as f:
+                    holidays = [line.split('#')[0].strip() for line in f if line.split('#')[0].strip()]
+            except OSError as e:
+                logger.error(f"祝日ファイルの読み込みに失敗: {str(e)}")
+        return cls(hours_per_day=float(os.getenv('GANTT_WORK_HOURS', 8)),
+                   weekmask=os.getenv('GANTT_WEEKMASK', '1111100'),
+                   holidays=holidays)
+
+    def workdays_for_hours(self, hours):
+        """作業時間を稼働日数に換算（端数は切り上げ、最低1日）"""
+        hours = np.nan_to_num(np.asarray(hours, dtype=np.float64), nan=0.0)
+        return np.maximum(1, np.ceil(hours / self.hours_per_day)).astype(np.int64)
+
+    def roll_forward(self, ordinals):
+        """稼働日でない日付を次の稼働日に送る"""
+        return _to_ordinals(np.busday_offset(_to_days(ordinals), 0, roll='forward',
+                                             busdaycal=self.busdaycal))
+
+    def roll_backward(self, ordinals):
+        """稼働日でない日付を前の稼働日に戻す"""
+        return _to_ordinals(np.busday_offset(_to_days(ordinals), 0, roll='backward',
+                                             busdaycal=self.busdaycal))
+
+    def add_workdays(self, ordinals, workdays):
+        """開始日から稼働日数だけ進めた日付（開始日が非稼働日なら次の稼働日から数える）
+
+        終了日は当日を含むので、n稼働日のタスクの終了日は add_workdays(開始日, n - 1)。
+        """
+        return _to_ordinals(np.busday_offset(_to_days(ordinals), workdays, roll='forward',
+                                             busdaycal=self.busdaycal))
+
+    def end_dates(self, start_ordinals, hours):
+        """開始日と作業時間から終了日（最終稼働日、当日を含む）を列ごとに計算
+
+        開始日がMISSINGの行はMISSINGを返す。
+        """
+        start_ordinals = np.asarray(start_ordinals, dtype=np.int64)
+        valid = start_ordinals != dates.MISSING
+        result = np.full(start_ordinals.shape, dates.MISSING, dtype=np.int64)
+        workdays = np.broadcast_to(self.workdays_for_hours(hours), start_ordinals.shape)
+        result[valid] = self.add_workdays(start_ordinals[valid], workdays[valid] - 1)
+        return result
+
+    def end_date(self, start_ordinal, hours):
+        """1件分の終了日"""
+        return int(self.end_dates([start_ordinal], [hours])[0])
+
+    def workdays_between(self, start_ordinals, end_ordinals):
+        """開始日から終了日の前日までの稼働日数"""
+        return np.busday_count(_to_days(start_ordinals), _to_days(end_ordinals), busdaycal=self.busdaycal)
+
+    def workdays_in(self, start_ordinals, end_ordinals):
+        """開始日から終了日まで（終了日を含む）の稼働日数"""
+        return self.workdays_between(start_ordinals, np.asarray(end_ordinals, dtype=np.int64) + 1)
+
+    def start_dates(self, start_ordinals):
+        """開始日を稼働日に送った列（MISSINGの行はMISSINGのまま）"""
+        start_ordinals = np.asarray(start_ordinals, dtype=np.int64)
+        valid = start_ordinals != dates.MISSING
+        result = np.full(start_ordinals.shape, dates.MISSING, dtype=np.int64)
+        result[valid] = self.roll_forward(start_ordinals[valid])
+        return result
+
+    def is_workday(self, ordinals):
+        return np.is_busday(_to_days(ordinals), busdaycal=self.busdaycal)